@@ -1,4 +1,7 @@
-from cache_toolbox.core import get_cached_content, set_cached_content, del_cached_content
+from cache_toolbox.core import (
+    MISSING_CONTENT, get_cached_content, set_cached_content, del_cached_content, get_cached_content_metadata,
+    set_cached_content_metadata, set_cached_content_missing
+)
 from opaque_keys.edx.locations import Location
 from django.test import TestCase
 
@@ -10,6 +13,12 @@ class Content(object):
     def __init__(self, location, content):
         self.location = location
         self.content = content
+        self.name = location.name
+        self.content_type = 'image/jpeg'
+        self.length = len(content)
+        self.last_modified_at = None
+        self.thumbnail_location = None
+        self.import_path = None
 
     def get_id(self):
         return self.location.to_deprecated_son()
@@ -38,3 +47,20 @@ class CachingTestCase(TestCase):
                          'should not be stored in cache with unicodeLocation')
         self.assertEqual(None, get_cached_content(self.nonUnicodeLocation),
                          'should not be stored in cache with nonUnicodeLocation')
+
+    def test_metadata(self):
+        set_cached_content_metadata(self.mockAsset)
+        self.assertEqual(None, get_cached_content(self.unicodeLocation), 'should only cache the metadata')
+        metadata = get_cached_content_metadata(self.nonUnicodeLocation)
+        self.assertEqual(metadata['length'], len(self.mockAsset.content))
+        self.assertFalse(metadata['locked'])
+
+        del_cached_content(self.unicodeLocation)
+        self.assertEqual(None, get_cached_content_metadata(self.unicodeLocation))
+
+    def test_missing(self):
+        set_cached_content_missing(self.unicodeLocation)
+        self.assertEqual(MISSING_CONTENT, get_cached_content_metadata(self.unicodeLocation))
+
+        del_cached_content(self.unicodeLocation)
+        self.assertEqual(None, get_cached_content_metadata(self.unicodeLocation))
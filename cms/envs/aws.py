@@ -255,6 +255,14 @@ DATABASES = AUTH_TOKENS['DATABASES']
 MODULESTORE = convert_module_store_setting_if_needed(AUTH_TOKENS.get('MODULESTORE', MODULESTORE))
 CONTENTSTORE = AUTH_TOKENS['CONTENTSTORE']
 DOC_STORE_CONFIG = AUTH_TOKENS['DOC_STORE_CONFIG']
+COURSE_STRUCTURE_LOCAL_CACHE_MAX_BYTES = ENV_TOKENS.get(
+    'COURSE_STRUCTURE_LOCAL_CACHE_MAX_BYTES', COURSE_STRUCTURE_LOCAL_CACHE_MAX_BYTES
+)
+CONTENTSERVER_DISK_CACHE.update(ENV_TOKENS.get('CONTENTSERVER_DISK_CACHE', {}))
+INCREMENTAL_METADATA_INHERITANCE_UPDATES = ENV_TOKENS.get(
+    'INCREMENTAL_METADATA_INHERITANCE_UPDATES', INCREMENTAL_METADATA_INHERITANCE_UPDATES
+)
+COURSE_BLOCKS_CACHE_TIMEOUT = ENV_TOKENS.get('COURSE_BLOCKS_CACHE_TIMEOUT', COURSE_BLOCKS_CACHE_TIMEOUT)
 # Datadog for events!
 DATADOG = AUTH_TOKENS.get("DATADOG", {})
 DATADOG.update(ENV_TOKENS.get("DATADOG", {}))
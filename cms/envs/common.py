@@ -37,6 +37,8 @@ import lms.envs.common
 from lms.envs.common import (
     USE_TZ, TECH_SUPPORT_EMAIL, PLATFORM_NAME, BUGS_EMAIL, DOC_STORE_CONFIG, DATA_DIR, ALL_LANGUAGES, WIKI_ENABLED,
     update_module_store_settings, ASSET_IGNORE_REGEX, COPYRIGHT_YEAR, PARENTAL_CONSENT_AGE_LIMIT,
+    COURSE_STRUCTURE_LOCAL_CACHE_MAX_BYTES, CONTENTSERVER_DISK_CACHE, INCREMENTAL_METADATA_INHERITANCE_UPDATES,
+    COURSE_BLOCKS_CACHE_TIMEOUT,
     # The following PROFILE_IMAGE_* settings are included as they are
     # indirectly accessed through the email opt-in API, which is
     # technically accessible through the CMS via legacy URLs.
@@ -108,6 +108,15 @@ update_module_store_settings(
     },
 )
 
+# Tests count mongo queries, so don't let structures outlive a single test
+COURSE_STRUCTURE_LOCAL_CACHE_MAX_BYTES = 0
+# ... nor let edits skip the query that recomputes the metadata inheritance tree
+INCREMENTAL_METADATA_INHERITANCE_UPDATES = False
+# ... nor serve the table of contents without loading the course's chapters and sections
+COURSE_BLOCKS_CACHE_TIMEOUT = 0
+# ... nor let the enrollments of a user outlive a single test
+ENROLLMENT_USER_CACHE_TIMEOUT = 0
+
 CONTENTSTORE = {
     'ENGINE': 'xmodule.contentstore.mongo.MongoContentStore',
     'DOC_STORE_CONFIG': {
@@ -110,12 +110,62 @@ def instance_key(model, instance_or_pk):
     )
 
 
+# Value cached in the content metadata tier for assets which don't exist.
+MISSING_CONTENT = 'missing'
+# Assets which don't exist are only remembered for this many seconds, so that
+# broken links to them don't each reach the contentstore, while an asset which
+# is uploaded afterwards isn't hidden for long even if no invalidation reaches
+# this cache.
+MISSING_CONTENT_TIMEOUT = 60
+
+
+def _content_key(location):
+    return unicode(location).encode("utf-8")
+
+
+def _content_metadata_key(location):
+    return "content_metadata:" + _content_key(location)
+
+
 def set_cached_content(content):
-    cache.set(unicode(content.location).encode("utf-8"), content)
+    cache.set(_content_key(content.location), content)
 
 
 def get_cached_content(location):
-    return cache.get(unicode(location).encode("utf-8"))
+    return cache.get(_content_key(location))
+
+
+def set_cached_content_metadata(content):
+    """
+    Cache the metadata of `content` (but not its data), for assets too large
+    to be cached with `set_cached_content`.
+    """
+    cache.set(_content_metadata_key(content.location), {
+        'name': content.name,
+        'content_type': content.content_type,
+        'length': content.length,
+        'locked': getattr(content, 'locked', False),
+        'last_modified_at': content.last_modified_at,
+        'thumbnail_location': content.thumbnail_location,
+        'import_path': content.import_path,
+    })
+
+
+def set_cached_content_missing(location):
+    """
+    Remember, for MISSING_CONTENT_TIMEOUT seconds, that there is no asset at
+    `location`.
+    """
+    cache.set(_content_metadata_key(location), MISSING_CONTENT, MISSING_CONTENT_TIMEOUT)
+
+
+def get_cached_content_metadata(location):
+    """
+    Return the dict of metadata cached for the asset at `location`,
+    MISSING_CONTENT if the asset is known not to exist, or None if nothing is
+    cached for it.
+    """
+    return cache.get(_content_metadata_key(location))
 
 
 def del_cached_content(location):
@@ -124,14 +174,13 @@ def del_cached_content(location):
     it's possible that the content could have been cached without knowing the
     course_key - and so without having the run.
     """
-    def location_str(loc):
-        return unicode(loc).encode("utf-8")
-
-    locations = [location_str(location)]
+    locations = [location]
     try:
-        locations.append(location_str(location.replace(run=None)))
+        locations.append(location.replace(run=None))
     except InvalidKeyError:
         # although deprecated keys allowed run=None, new keys don't if there is no version.
         pass
 
-    cache.delete_many(locations)
+    cache.delete_many(
+        [_content_key(loc) for loc in locations] + [_content_metadata_key(loc) for loc in locations]
+    )
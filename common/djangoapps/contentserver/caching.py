@@ -0,0 +1,147 @@
+"""
+Local disk cache for course assets that are too large to keep in the django cache.
+
+Large assets (videos, PDFs) are typically requested over and over again, often
+as a series of Range requests while a user seeks around in them. Keeping a copy
+of them on local disk lets those requests be answered with a seek on a local
+file rather than another read of the asset's chunks out of GridFS.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+
+from django.conf import settings
+
+from xmodule.contentstore.content import StaticContentStream
+
+log = logging.getLogger(__name__)
+
+# Prefix of the files that assets are written to while they are being cached.
+TEMP_FILE_PREFIX = 'tmp-'
+
+
+class AssetDiskCache(object):
+    """
+    Keeps copies of large course assets in a local directory, bounded in total
+    size by evicting the least recently used files.
+
+    Cached files are keyed by the asset's location and upload date, so a new
+    version of an asset never gets served from an old copy.
+    """
+    def __init__(self, directory, max_bytes, max_file_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+    @classmethod
+    def from_settings(cls):
+        """
+        Return the disk cache configured by the `CONTENTSERVER_DISK_CACHE`
+        setting, or None if it has not been configured with a `DIRECTORY`.
+        """
+        config = getattr(settings, 'CONTENTSERVER_DISK_CACHE', {})
+        if not config.get('DIRECTORY'):
+            return None
+        return cls(config['DIRECTORY'], config['MAX_BYTES'], config['MAX_FILE_BYTES'])
+
+    def _path(self, content):
+        """
+        Return the path of the cached copy of `content`.
+        """
+        last_modified_at = content.last_modified_at.isoformat() if content.last_modified_at else ''
+        key = u'{}|{}'.format(content.location, last_modified_at).encode('utf-8')
+        return os.path.join(self.directory, hashlib.sha1(key).hexdigest())
+
+    def can_store(self, content):
+        """
+        Return whether `content` may be kept in this cache.
+        """
+        return content.length is not None and content.length <= self.max_file_bytes
+
+    def get(self, content):
+        """
+        Return a StaticContentStream of the cached copy of `content`, or None if
+        it hasn't been cached.
+        """
+        path = self._path(content)
+        try:
+            stream = open(path, 'rb')
+        except IOError:
+            return None
+
+        if os.fstat(stream.fileno()).st_size != content.length:
+            stream.close()
+            return None
+
+        # Mark the file as recently used, for eviction.
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        return StaticContentStream(
+            content.location, content.name, content.content_type, stream,
+            last_modified_at=content.last_modified_at, thumbnail_location=content.thumbnail_location,
+            import_path=content.import_path, length=content.length, locked=content.locked
+        )
+
+    def tee(self, content, chunks):
+        """
+        Yield `chunks`, the full data of `content`, while writing them into
+        the cache. The copy is only added to the cache once all of the data
+        has been read, so responses that are abandoned part of the way through
+        never leave a truncated file behind.
+        """
+        try:
+            handle, temp_path = tempfile.mkstemp(prefix=TEMP_FILE_PREFIX, dir=self.directory)
+        except OSError:
+            log.exception(u"Unable to create a file to cache asset %s", content.location)
+            for chunk in chunks:
+                yield chunk
+            return
+
+        complete = False
+        try:
+            with os.fdopen(handle, 'wb') as temp_file:
+                for chunk in chunks:
+                    temp_file.write(chunk)
+                    yield chunk
+            complete = os.path.getsize(temp_path) == content.length
+            if complete:
+                os.rename(temp_path, self._path(content))
+        finally:
+            if not complete and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        self._evict()
+
+    def _evict(self):
+        """
+        Remove the least recently used files until the cache fits within
+        `max_bytes`.
+        """
+        entries = []
+        total_size = 0
+        for filename in os.listdir(self.directory):
+            if filename.startswith(TEMP_FILE_PREFIX):
+                continue
+            path = os.path.join(self.directory, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+
+        for __, size, path in sorted(entries):
+            if total_size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # Another process got to it first.
+                pass
+            total_size -= size
@@ -2,7 +2,9 @@
 Middleware to serve assets.
 """
 
+import hashlib
 import logging
+from uuid import uuid4
 
 from django.http import (
     HttpResponse, HttpResponseNotModified, HttpResponseForbidden
@@ -10,21 +12,32 @@ from django.http import (
 from student.models import CourseEnrollment
 
 from xmodule.assetstore.assetmgr import AssetManager
-from xmodule.contentstore.content import StaticContent, XASSET_LOCATION_TAG
+from xmodule.contentstore.content import StaticContent, StaticContentStream, XASSET_LOCATION_TAG
 from xmodule.modulestore import InvalidLocationError
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.locator import AssetLocator
-from cache_toolbox.core import get_cached_content, set_cached_content
+from cache_toolbox.core import (
+    MISSING_CONTENT, get_cached_content, get_cached_content_metadata, set_cached_content,
+    set_cached_content_metadata, set_cached_content_missing
+)
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.exceptions import NotFoundError
 
+from contentserver.caching import AssetDiskCache
+
 # TODO: Soon as we have a reasonable way to serialize/deserialize AssetKeys, we need
 # to change this file so instead of using course_id_partial, we're just using asset keys
 
 log = logging.getLogger(__name__)
 
+# Size of the chunks that assets are streamed in; the default GridFS chunk size.
+STREAM_CHUNK_SIZE = 255 * 1024
+
 
 class StaticContentServer(object):
+    def __init__(self):
+        self.disk_cache = AssetDiskCache.from_settings()
+
     def process_request(self, request):
         # look to see if the request is prefixed with an asset prefix tag
         if (
@@ -43,22 +56,32 @@ class StaticContentServer(object):
 
             # first look in our cache so we don't have to round-trip to the DB
             content = get_cached_content(loc)
+            from_disk_cache = False
+            data_loaded = True
             if content is None:
-                # nope, not in cache, let's fetch from DB
-                try:
-                    content = AssetManager.find(loc, as_stream=True)
-                except (ItemNotFoundError, NotFoundError):
-                    response = HttpResponse()
-                    response.status_code = 404
-                    return response
-
-                # since we fetched it from DB, let's cache it going forward, but only if it's < 1MB
-                # this is because I haven't been able to find a means to stream data out of memcached
-                if content.length is not None:
-                    if content.length < 1048576:
-                        # since we've queried as a stream, let's read in the stream into memory to set in cache
-                        content = content.copy_to_in_mem()
-                        set_cached_content(content)
+                # next look for cached metadata, which is all we cache for larger assets and for missing ones
+                metadata = get_cached_content_metadata(loc)
+                if metadata == MISSING_CONTENT:
+                    return not_found_response()
+                elif metadata is not None:
+                    # the data isn't loaded until we know that it has to be sent
+                    content = StaticContent(loc, data=None, **metadata)
+                    data_loaded = False
+                else:
+                    # nope, not in cache, let's fetch from DB
+                    content, from_disk_cache = self._find_content(loc)
+                    if content is None:
+                        return not_found_response()
+
+                    # since we fetched it from DB, let's cache it going forward, but only if it's < 1MB
+                    # this is because I haven't been able to find a means to stream data out of memcached
+                    if content.length is not None:
+                        if content.length < 1048576:
+                            # since we've queried as a stream, let's read in the stream into memory to set in cache
+                            content = content.copy_to_in_mem()
+                            set_cached_content(content)
+                        else:
+                            set_cached_content_metadata(content)
             else:
                 # NOP here, but we may wish to add a "cache-hit" counter in the future
                 pass
@@ -80,13 +103,24 @@ class StaticContentServer(object):
             # convert over the DB persistent last modified timestamp to a HTTP compatible
             # timestamp, so we can simply compare the strings
             last_modified_at_str = content.last_modified_at.strftime("%a, %d-%b-%Y %H:%M:%S GMT")
+            etag = get_etag(content)
 
             # see if the client has cached this content, if so then compare the
-            # timestamps, if they are the same then just return a 304 (Not Modified)
-            if 'HTTP_IF_MODIFIED_SINCE' in request.META:
+            # entity tags, or if the client didn't send any, the timestamps.
+            # If they are the same then just return a 304 (Not Modified)
+            # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.26
+            if 'HTTP_IF_NONE_MATCH' in request.META:
+                if etag_matches(request.META['HTTP_IF_NONE_MATCH'], etag):
+                    return not_modified_response(etag, last_modified_at_str)
+            elif 'HTTP_IF_MODIFIED_SINCE' in request.META:
                 if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
                 if if_modified_since == last_modified_at_str:
-                    return HttpResponseNotModified()
+                    return not_modified_response(etag, last_modified_at_str)
+
+            if not data_loaded:
+                content, from_disk_cache = self._find_content(loc, content)
+                if content is None:
+                    return not_found_response()
 
             # *** File streaming within a byte range ***
             # If a Range is provided, parse Range attribute of the request
@@ -96,10 +130,6 @@ class StaticContentServer(object):
             # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
             response = None
             if request.META.get('HTTP_RANGE'):
-                # Data from cache (StaticContent) has no easy byte management, so we use the DB instead (StaticContentStream)
-                if type(content) == StaticContent:
-                    content = AssetManager.find(loc, as_stream=True)
-
                 header_value = request.META['HTTP_RANGE']
                 try:
                     unit, ranges = parse_range_header(header_value, content.length)
@@ -112,42 +142,180 @@ class StaticContentServer(object):
                     if unit != 'bytes':
                         # Only accept ranges in bytes
                         log.warning(u"Unknown unit in Range header: %s for content: %s", header_value, unicode(loc))
-                    elif len(ranges) > 1:
-                        # According to Http/1.1 spec content for multiple ranges should be sent as a multipart message.
-                        # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
-                        # But we send back the full content.
-                        log.warning(
-                            u"More than 1 ranges in Range header: %s for content: %s", header_value, unicode(loc)
-                        )
                     else:
-                        first, last = ranges[0]
-
-                        if 0 <= first <= last < content.length:
-                            # If the byte range is satisfiable
-                            response = HttpResponse(content.stream_data_in_range(first, last))
+                        # Unsatisfiable ranges are ignored, unless none of the ranges can be satisfied.
+                        ranges = [(first, last) for first, last in ranges if 0 <= first <= last < content.length]
+                        if not ranges:
+                            log.warning(
+                                u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
+                            )
+                            response = HttpResponse(status=416)  # Requested Range Not Satisfiable
+                            response['Content-Range'] = 'bytes */{length}'.format(length=content.length)
+                            return response
+                        elif ranges == [(0, content.length - 1)]:
+                            # The whole content was requested, which is just like a request without a Range,
+                            # except for the status of the response.
+                            response = HttpResponse(self._stream_full_content(content, from_disk_cache))
+                            response['Content-Range'] = 'bytes 0-{last}/{length}'.format(
+                                last=content.length - 1, length=content.length
+                            )
+                            response['Content-Length'] = str(content.length)
+                            response.status_code = 206  # Partial Content
+                        elif len(ranges) == 1:
+                            first, last = ranges[0]
+                            response = HttpResponse(content.stream_data_in_range(first, last, STREAM_CHUNK_SIZE))
                             response['Content-Range'] = 'bytes {first}-{last}/{length}'.format(
                                 first=first, last=last, length=content.length
                             )
                             response['Content-Length'] = str(last - first + 1)
                             response.status_code = 206  # Partial Content
                         else:
-                            log.warning(
-                                u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
-                            )
-                            return HttpResponse(status=416)  # Requested Range Not Satisfiable
+                            # According to Http/1.1 spec content for multiple ranges should be sent as a
+                            # multipart message.
+                            # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
+                            response = multipart_byteranges_response(content, ranges)
 
             # If Range header is absent or syntactically invalid return a full content response.
             if response is None:
-                response = HttpResponse(content.stream_data())
+                response = HttpResponse(self._stream_full_content(content, from_disk_cache))
                 response['Content-Length'] = content.length
 
             # "Accept-Ranges: bytes" tells the user that only "bytes" ranges are allowed
             response['Accept-Ranges'] = 'bytes'
-            response['Content-Type'] = content.content_type
+            if not response['Content-Type'].startswith('multipart/byteranges'):
+                response['Content-Type'] = content.content_type
             response['Last-Modified'] = last_modified_at_str
+            response['ETag'] = etag
 
             return response
 
+    def _find_content(self, loc, metadata_content=None):
+        """
+        Return a tuple of the content at `loc`, streamed from the disk cache
+        if it's there or otherwise from the DB, and whether it came from the
+        disk cache. The content is None if there's no such asset, which is
+        remembered for a short while.
+
+        `metadata_content` is content without data which was built from cached
+        metadata, which lets the disk cache be checked before going to the DB.
+        """
+        if self.disk_cache is not None and metadata_content is not None:
+            content = self.disk_cache.get(metadata_content)
+            if content is not None:
+                return content, True
+
+        try:
+            content = AssetManager.find(loc, as_stream=True)
+        except (ItemNotFoundError, NotFoundError):
+            set_cached_content_missing(loc)
+            return None, False
+
+        if self.disk_cache is not None and content.length is not None and content.length >= 1048576:
+            # larger assets are served from local disk once they've been read from the DB
+            cached_content = self.disk_cache.get(content)
+            if cached_content is not None:
+                content.close()
+                return cached_content, True
+        return content, False
+
+    def _stream_full_content(self, content, from_disk_cache):
+        """
+        Return an iterator over all of the data of `content`. Content that is
+        being read from the DB is copied to the disk cache as it is sent, if
+        it is large enough not to be kept in the django cache.
+        """
+        chunks = content.stream_data(STREAM_CHUNK_SIZE)
+        if (
+            self.disk_cache is not None and not from_disk_cache and
+            isinstance(content, StaticContentStream) and self.disk_cache.can_store(content)
+        ):
+            chunks = self.disk_cache.tee(content, chunks)
+        return chunks
+
+
+def not_found_response():
+    """
+    Return a 404 (Not Found) response.
+    """
+    response = HttpResponse()
+    response.status_code = 404
+    return response
+
+
+def get_etag(content):
+    """
+    Return an entity tag for `content`. A new version of an asset is a new
+    GridFS file, with a new upload date, so the location, upload date and
+    length identify the asset's data.
+    """
+    key = u'{}|{}|{}'.format(content.location, content.last_modified_at, content.length)
+    return '"{}"'.format(hashlib.md5(key.encode('utf-8')).hexdigest())
+
+
+def etag_matches(header_value, etag):
+    """
+    Return whether the If-None-Match `header_value` matches `etag`. Weak
+    comparison is used, as is required for If-None-Match.
+
+    See spec for details: http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.26
+    """
+    for value in header_value.split(','):
+        value = value.strip()
+        if value.startswith('W/'):
+            value = value[2:]
+        if value == '*' or value == etag:
+            return True
+    return False
+
+
+def not_modified_response(etag, last_modified_at_str):
+    """
+    Return a 304 (Not Modified) response for content with the given `etag`
+    and last modification time.
+    """
+    response = HttpResponseNotModified()
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified_at_str
+    return response
+
+
+def multipart_byteranges_response(content, ranges):
+    """
+    Return a 206 (Partial Content) response with the requested `ranges` of
+    `content`, each as a part of a multipart/byteranges message.
+
+    See spec for details: http://www.w3.org/Protocols/rfc2616/rfc2616-sec19.html#sec19.2
+    """
+    boundary = uuid4().hex
+    part_headers = [
+        (
+            '--{boundary}\r\nContent-Type: {content_type}\r\n'
+            'Content-Range: bytes {first}-{last}/{length}\r\n\r\n'
+        ).format(
+            boundary=boundary, content_type=content.content_type, first=first, last=last, length=content.length
+        )
+        for first, last in ranges
+    ]
+    closing = '--{boundary}--\r\n'.format(boundary=boundary)
+
+    def _stream_parts():
+        """Yield the parts of the message, reading each range as it is reached."""
+        for part_header, (first, last) in zip(part_headers, ranges):
+            yield part_header
+            for chunk in content.stream_data_in_range(first, last, STREAM_CHUNK_SIZE):
+                yield chunk
+            yield '\r\n'
+        yield closing
+
+    response = HttpResponse(_stream_parts())
+    response['Content-Type'] = 'multipart/byteranges; boundary={boundary}'.format(boundary=boundary)
+    response['Content-Length'] = str(
+        sum(len(part_header) + (last - first + 1) + 2 for part_header, (first, last) in zip(part_headers, ranges)) +
+        len(closing)
+    )
+    response.status_code = 206  # Partial Content
+    return response
+
 
 def parse_range_header(header_value, content_length):
     """
@@ -4,9 +4,17 @@ Tests for StaticContentServer
 import copy
 import ddt
 import logging
+import os
+import shutil
+import tempfile
 import unittest
+from cStringIO import StringIO
+from mock import patch
+from datetime import datetime
 from uuid import uuid4
 
+from pytz import UTC
+
 from django.conf import settings
 from django.test.client import Client
 from django.test.utils import override_settings
@@ -17,6 +25,11 @@ from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.xml_importer import import_course_from_xml
 
+from opaque_keys.edx.locations import SlashSeparatedCourseKey
+from xmodule.assetstore.assetmgr import AssetManager
+from xmodule.contentstore.content import StaticContent, StaticContentStream
+
+from contentserver.caching import AssetDiskCache
 from contentserver.middleware import parse_range_header
 from student.models import CourseEnrollment
 
@@ -72,6 +85,21 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
         resp = self.client.get(self.url_unlocked)
         self.assertEqual(resp.status_code, 200)
 
+    def test_missing_asset_cached(self):
+        """
+        Test that a missing asset is only looked for once, until it is saved.
+        """
+        missing_asset = self.course_key.make_asset_key('asset', 'missing.txt')
+        with patch.object(AssetManager, 'find', wraps=AssetManager.find) as mock_find:
+            self.assertEqual(self.client.get(unicode(missing_asset)).status_code, 404)
+            self.assertEqual(self.client.get(unicode(missing_asset)).status_code, 404)
+            self.assertEqual(mock_find.call_count, 1)
+
+        self.contentstore.save(StaticContent(missing_asset, 'missing.txt', 'text/plain', 'not missing'))
+        resp = self.client.get(unicode(missing_asset))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.content, 'not missing')
+
     def test_locked_asset_not_logged_in(self):
         """
         Test that locked assets behave appropriately in case the user is not
@@ -146,7 +174,7 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
 
     def test_range_request_multiple_ranges(self):
         """
-        Test that multiple ranges in request outputs the full content.
+        Test that multiple ranges in request outputs each range as a part of a multipart/byteranges message.
         """
         first_byte = self.length_unlocked / 4
         last_byte = self.length_unlocked / 2
@@ -154,9 +182,53 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
             first=first_byte, last=last_byte)
         )
 
-        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.status_code, 206)  # HTTP_206_PARTIAL_CONTENT
+        self.assertTrue(resp['Content-Type'].startswith('multipart/byteranges; boundary='))
         self.assertNotIn('Content-Range', resp)
-        self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
+        self.assertEqual(resp['Content-Length'], str(len(resp.content)))
+        self.assertIn(
+            'Content-Range: bytes {first}-{last}/{length}'.format(
+                first=first_byte, last=last_byte, length=self.length_unlocked
+            ),
+            resp.content
+        )
+        self.assertIn(
+            'Content-Range: bytes {first}-{last}/{length}'.format(
+                first=max(0, self.length_unlocked - 100), last=self.length_unlocked - 1, length=self.length_unlocked
+            ),
+            resp.content
+        )
+
+    def test_range_request_some_ranges_unsatisfiable(self):
+        """
+        Test that unsatisfiable ranges are ignored if any of the ranges can be satisfied.
+        """
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-0, {first}-'.format(
+            first=self.length_unlocked)
+        )
+
+        self.assertEqual(resp.status_code, 206)  # HTTP_206_PARTIAL_CONTENT
+        self.assertEqual(resp['Content-Range'], 'bytes 0-0/{length}'.format(length=self.length_unlocked))
+        self.assertEqual(resp['Content-Length'], '1')
+
+    def test_etag(self):
+        """
+        Test that assets are served with an ETag, and that a request with a matching
+        If-None-Match header gets a 304 Not Modified response.
+        """
+        resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp.status_code, 200)
+        etag = resp['ETag']
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp['ETag'], etag)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH='"other", W/{}'.format(etag))
+        self.assertEqual(resp.status_code, 304)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH='"other"')
+        self.assertEqual(resp.status_code, 200)
 
     @ddt.data(
         'bytes 0-',
@@ -191,6 +263,69 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
             first=(self.length_unlocked), last=(self.length_unlocked))
         )
         self.assertEqual(resp.status_code, 416)
+        self.assertEqual(resp['Content-Range'], 'bytes */{length}'.format(length=self.length_unlocked))
+
+
+class AssetDiskCacheTestCase(unittest.TestCase):
+    """
+    Tests for the AssetDiskCache.
+    """
+    def setUp(self):
+        super(AssetDiskCacheTestCase, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.cache = AssetDiskCache(self.directory, max_bytes=20, max_file_bytes=10)
+        self.course_key = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+
+    def _content(self, name, data):
+        """
+        Return a StaticContentStream for the asset `name` with the given `data`.
+        """
+        return StaticContentStream(
+            self.course_key.make_asset_key('asset', name), name, 'text/plain', StringIO(data),
+            last_modified_at=datetime(2015, 1, 1, tzinfo=UTC), length=len(data)
+        )
+
+    def test_tee_then_get(self):
+        content = self._content('a.txt', 'abcdefgh')
+        self.assertIsNone(self.cache.get(content))
+
+        self.assertEqual(''.join(self.cache.tee(content, content.stream_data())), 'abcdefgh')
+
+        cached = self.cache.get(self._content('a.txt', 'abcdefgh'))
+        self.assertEqual(''.join(cached.stream_data_in_range(2, 4)), 'cde')
+
+    def test_abandoned_tee_not_cached(self):
+        content = self._content('a.txt', 'abcdefgh')
+        chunks = self.cache.tee(content, content.stream_data(chunk_size=2))
+        next(chunks)
+        chunks.close()
+
+        self.assertIsNone(self.cache.get(content))
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_new_version_not_served_from_cache(self):
+        content = self._content('a.txt', 'abcdefgh')
+        list(self.cache.tee(content, content.stream_data()))
+
+        new_content = self._content('a.txt', 'abcdefgh')
+        new_content.last_modified_at = datetime(2015, 1, 2, tzinfo=UTC)
+        self.assertIsNone(self.cache.get(new_content))
+
+    def test_can_store(self):
+        self.assertTrue(self.cache.can_store(self._content('a.txt', 'a' * 10)))
+        self.assertFalse(self.cache.can_store(self._content('a.txt', 'a' * 11)))
+
+    def test_evicts_least_recently_used(self):
+        contents = [self._content('{}.txt'.format(index), str(index) * 8) for index in range(3)]
+        for index, content in enumerate(contents[:2]):
+            list(self.cache.tee(content, content.stream_data()))
+            os.utime(self.cache._path(content), (index, index))  # pylint: disable=protected-access
+        list(self.cache.tee(contents[2], contents[2].stream_data()))
+
+        self.assertIsNone(self.cache.get(contents[0]))
+        self.assertIsNotNone(self.cache.get(contents[1]))
+        self.assertIsNotNone(self.cache.get(contents[2]))
 
 
 @ddt.ddt
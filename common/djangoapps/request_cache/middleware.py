@@ -1,5 +1,10 @@
+import logging
 import threading
 
+from celery.signals import task_postrun
+
+log = logging.getLogger(__name__)
+
 _request_cache_threadlocal = threading.local()
 _request_cache_threadlocal.data = {}
 
@@ -9,13 +14,50 @@ class RequestCache(object):
     def get_request_cache(cls):
         return _request_cache_threadlocal
 
+    @classmethod
+    def run_after_request(cls, key, func):
+        """
+        Calls `func` once the current request (or celery task) has finished.
+        Since this middleware comes before TransactionMiddleware, that is after
+        the request's transaction has been committed, so `func` can e.g. drop
+        cache entries that concurrent requests may have filled with the rows
+        the request was changing. Only the last `func` given for each `key`
+        during a request is called.
+        """
+        after_request = getattr(_request_cache_threadlocal, 'after_request', None)
+        if after_request is None:
+            after_request = _request_cache_threadlocal.after_request = {}
+        after_request[key] = func
+
     def clear_request_cache(self):
         _request_cache_threadlocal.data = {}
 
+    def finish_request(self):
+        """
+        Calls the functions passed to `run_after_request`, then clears the cache.
+        """
+        after_request = getattr(_request_cache_threadlocal, 'after_request', None)
+        _request_cache_threadlocal.after_request = {}
+        for func in (after_request or {}).itervalues():
+            try:
+                func()
+            except Exception:  # pylint: disable=broad-except
+                log.exception('Error running %r after the request', func)
+        self.clear_request_cache()
+
     def process_request(self, request):
         self.clear_request_cache()
         return None
 
     def process_response(self, request, response):
-        self.clear_request_cache()
+        self.finish_request()
         return response
+
+
+@task_postrun.connect
+def clear_request_cache_after_task(**kwargs):  # pylint: disable=unused-argument
+    """
+    Celery tasks don't go through the middleware, so treat each task as a
+    request and don't let anything cached by one leak into the next.
+    """
+    RequestCache().finish_request()
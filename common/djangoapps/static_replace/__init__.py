@@ -1,5 +1,8 @@
+import hashlib
 import logging
 import re
+import threading
+from collections import OrderedDict
 
 from staticfiles.storage import staticfiles_storage
 from staticfiles import finders
@@ -30,6 +33,22 @@ def _url_replace_regex(prefix):
         """.format(prefix=prefix)
 
 
+# Compiled url matching regexes, by pattern. There is one pattern per prefix and
+# data directory, which can be more than `re` keeps compiled.
+_compiled_regexes = {}
+
+
+def _compiled_url_replace_regex(prefix):
+    """
+    Return the compiled `_url_replace_regex` for `prefix`.
+    """
+    pattern = _url_replace_regex(prefix)
+    regex = _compiled_regexes.get(pattern)
+    if regex is None:
+        regex = _compiled_regexes[pattern] = re.compile(pattern)
+    return regex
+
+
 def try_staticfiles_lookup(path):
     """
     Try to lookup a path in staticfiles_storage.  If it fails, return
@@ -71,7 +90,7 @@ def replace_jump_to_id_urls(text, course_id, jump_to_id_base_url):
         rest = match.group('rest')
         return "".join([quote, jump_to_id_base_url + rest, quote])
 
-    return re.sub(_url_replace_regex('/jump_to_id/'), replace_jump_to_id_url, text)
+    return _compiled_url_replace_regex('/jump_to_id/').sub(replace_jump_to_id_url, text)
 
 
 def replace_course_urls(text, course_key):
@@ -91,7 +110,7 @@ def replace_course_urls(text, course_key):
         rest = match.group('rest')
         return "".join([quote, '/courses/' + course_id + '/', rest, quote])
 
-    return re.sub(_url_replace_regex('/course/'), replace_course_url, text)
+    return _compiled_url_replace_regex('/course/').sub(replace_course_url, text)
 
 
 def process_static_urls(text, replacement_function, data_dir=None):
@@ -110,14 +129,11 @@ def process_static_urls(text, replacement_function, data_dir=None):
         rest = match.group('rest')
         return replacement_function(original, prefix, quote, rest)
 
-    return re.sub(
-        _url_replace_regex(u'(?:{static_url}|/static/)(?!{data_dir})'.format(
-            static_url=settings.STATIC_URL,
-            data_dir=data_dir
-        )),
-        wrap_part_extraction,
-        text
-    )
+    regex = _compiled_url_replace_regex(u'(?:{static_url}|/static/)(?!{data_dir})'.format(
+        static_url=settings.STATIC_URL,
+        data_dir=data_dir
+    ))
+    return regex.sub(wrap_part_extraction, text)
 
 
 def make_static_urls_absolute(request, html):
@@ -149,57 +165,191 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
     course_id: The course identifier used to distinguish static content for this course in studio
     static_asset_path: Path for static assets, which overrides data_directory and course_namespace, if nonempty
     """
+    rewriter = CourseUrlRewriter(course_id, data_directory=data_directory, static_asset_path=static_asset_path)
+    return rewriter.replace_static_urls(text)
 
-    def replace_static_url(original, prefix, quote, rest):
+
+class CourseUrlRewriter(object):
+    """
+    Rewrites the /static/, /course/ and /jump_to_id/ urls in the content of a course, as
+    `replace_static_urls`, `replace_course_urls` and `replace_jump_to_id_urls` do.
+
+    Shared rewriters (see `for_course`) cache what they look up: whether files exist in
+    staticfiles_storage and which modulestore the course is in. They also keep the output of
+    `rewrite` for recently rewritten content, as the same content is rendered over and over again.
+    Both caches hold at most `cache_size` entries, and the rewritten contents at most
+    MAX_CACHED_LENGTH characters in all.
+    """
+    # Rewriters shared between requests, by their arguments.
+    _shared = OrderedDict()
+    _shared_lock = threading.Lock()
+    # The most rewriters kept in `_shared`.
+    MAX_SHARED = 20
+    # The total length of the rewritten contents kept by each rewriter, and the length of the
+    # longest one kept.
+    MAX_CACHED_LENGTH = 1024 * 1024
+    MAX_CACHED_ITEM_LENGTH = 64 * 1024
+
+    def __init__(self, course_id=None, data_directory=None, static_asset_path='', jump_to_id_base_url=None,
+                 cache_size=0):
+        self.course_id = course_id
+        self.data_directory = data_directory
+        self.static_asset_path = static_asset_path
+        self.jump_to_id_base_url = jump_to_id_base_url
+        self.cache_size = cache_size
+        self._exists = OrderedDict()
+        self._modulestore_type = None
+        self._rewritten = OrderedDict()
+        self._rewritten_length = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_course(cls, course_id, data_directory=None, static_asset_path='', jump_to_id_base_url=None):
         """
-        Replace a single matched url.
+        Return a rewriter for the course which is shared between requests, and caches up to
+        STATIC_URL_REWRITE_CACHE_SIZE rewritten contents.  If that setting is 0, or in DEBUG
+        mode (when static files may change at any time), return a rewriter which caches nothing.
         """
-        # Don't mess with things that end in '?raw'
-        if rest.endswith('?raw'):
-            return original
-
-        # In debug mode, if we can find the url as is,
-        if settings.DEBUG and finders.find(rest, True):
-            return original
-        # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
-        elif (not static_asset_path) \
-                and course_id \
-                and modulestore().get_modulestore_type(course_id) != ModuleStoreEnum.Type.xml:
-            # first look in the static file pipeline and see if we are trying to reference
-            # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
-
-            exists_in_staticfiles_storage = False
-            try:
-                exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
-            except Exception as err:
-                log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
-                    rest, str(err)))
-
-            if exists_in_staticfiles_storage:
-                url = staticfiles_storage.url(rest)
-            else:
-                # if not, then assume it's courseware specific content and then look in the
-                # Mongo-backed database
-                url = StaticContent.convert_legacy_static_url_with_course_id(rest, course_id)
-
-                if AssetLocator.CANONICAL_NAMESPACE in url:
-                    url = url.replace('block@', 'block/', 1)
-
-        # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
-        else:
-            course_path = "/".join((static_asset_path or data_directory, rest))
+        cache_size = getattr(settings, 'STATIC_URL_REWRITE_CACHE_SIZE', 0)
+        if not cache_size or settings.DEBUG:
+            return cls(course_id, data_directory, static_asset_path, jump_to_id_base_url)
+
+        key = (course_id, data_directory, static_asset_path, jump_to_id_base_url)
+        with cls._shared_lock:
+            rewriter = cls._shared.pop(key, None)
+            if rewriter is None:
+                rewriter = cls(course_id, data_directory, static_asset_path, jump_to_id_base_url, cache_size)
+            cls._shared[key] = rewriter
+            while len(cls._shared) > cls.MAX_SHARED:
+                cls._shared.popitem(last=False)
+        return rewriter
+
+    def rewrite(self, text):
+        """
+        Return `text` with its /static/, /course/ and, if a jump_to_id_base_url was given,
+        /jump_to_id/ urls replaced, in that order.
+        """
+        if not self.cache_size:
+            return self._rewrite(text)
+
+        key = hashlib.sha1(text.encode('utf-8') if isinstance(text, unicode) else text).digest()
+        with self._lock:
+            rewritten = self._rewritten.pop(key, None)
+            if rewritten is not None:
+                self._rewritten[key] = rewritten
+                return rewritten
+
+        rewritten = self._rewrite(text)
+        if len(rewritten) > self.MAX_CACHED_ITEM_LENGTH:
+            return rewritten
+        with self._lock:
+            previous = self._rewritten.pop(key, None)
+            if previous is not None:
+                self._rewritten_length -= len(previous)
+            self._rewritten[key] = rewritten
+            self._rewritten_length += len(rewritten)
+            while len(self._rewritten) > self.cache_size or self._rewritten_length > self.MAX_CACHED_LENGTH:
+                __, evicted = self._rewritten.popitem(last=False)
+                self._rewritten_length -= len(evicted)
+        return rewritten
+
+    def _rewrite(self, text):
+        """
+        Rewrite the urls in `text`, without looking in the cache of rewritten contents.
+        """
+        text = self.replace_static_urls(text)
+        if self.course_id is not None:
+            text = replace_course_urls(text, self.course_id)
+            if self.jump_to_id_base_url is not None:
+                text = replace_jump_to_id_urls(text, self.course_id, self.jump_to_id_base_url)
+        return text
+
+    def _staticfiles_exists(self, path):
+        """
+        Return whether `path` exists in staticfiles_storage, looking it up only once if this
+        rewriter caches lookups.
+        """
+        if not self.cache_size:
+            return staticfiles_storage.exists(path)
+        with self._lock:
+            exists = self._exists.pop(path, None)
+            if exists is not None:
+                self._exists[path] = exists
+                return exists
+
+        exists = staticfiles_storage.exists(path)
+        with self._lock:
+            self._exists[path] = exists
+            while len(self._exists) > self.cache_size:
+                self._exists.popitem(last=False)
+        return exists
+
+    def _get_modulestore_type(self):
+        """
+        Return the type of the modulestore the course is in.
+        """
+        if self._modulestore_type is None or not self.cache_size:
+            self._modulestore_type = modulestore().get_modulestore_type(self.course_id)
+        return self._modulestore_type
 
-            try:
-                if staticfiles_storage.exists(rest):
+    def replace_static_urls(self, text):
+        """
+        Replace the /static/ urls in `text`, as described by `replace_static_urls`.
+        """
+        static_asset_path = self.static_asset_path
+        data_directory = self.data_directory
+        course_id = self.course_id
+
+        def replace_static_url(original, prefix, quote, rest):
+            """
+            Replace a single matched url.
+            """
+            # Don't mess with things that end in '?raw'
+            if rest.endswith('?raw'):
+                return original
+
+            # In debug mode, if we can find the url as is,
+            if settings.DEBUG and finders.find(rest, True):
+                return original
+            # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
+            elif (not static_asset_path) \
+                    and course_id \
+                    and self._get_modulestore_type() != ModuleStoreEnum.Type.xml:
+                # first look in the static file pipeline and see if we are trying to reference
+                # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
+
+                exists_in_staticfiles_storage = False
+                try:
+                    exists_in_staticfiles_storage = self._staticfiles_exists(rest)
+                except Exception as err:
+                    log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
+                        rest, str(err)))
+
+                if exists_in_staticfiles_storage:
                     url = staticfiles_storage.url(rest)
                 else:
-                    url = staticfiles_storage.url(course_path)
-            # And if that fails, assume that it's course content, and add manually data directory
-            except Exception as err:
-                log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
-                    rest, str(err)))
-                url = "".join([prefix, course_path])
+                    # if not, then assume it's courseware specific content and then look in the
+                    # Mongo-backed database
+                    url = StaticContent.convert_legacy_static_url_with_course_id(rest, course_id)
 
-        return "".join([quote, url, quote])
+                    if AssetLocator.CANONICAL_NAMESPACE in url:
+                        url = url.replace('block@', 'block/', 1)
 
-    return process_static_urls(text, replace_static_url, data_dir=static_asset_path or data_directory)
+            # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
+            else:
+                course_path = "/".join((static_asset_path or data_directory, rest))
+
+                try:
+                    if self._staticfiles_exists(rest):
+                        url = staticfiles_storage.url(rest)
+                    else:
+                        url = staticfiles_storage.url(course_path)
+                # And if that fails, assume that it's course content, and add manually data directory
+                except Exception as err:
+                    log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
+                        rest, str(err)))
+                    url = "".join([prefix, course_path])
+
+            return "".join([quote, url, quote])
+
+        return process_static_urls(text, replace_static_url, data_dir=static_asset_path or data_directory)
@@ -5,8 +5,10 @@ from static_replace import (
     replace_static_urls,
     replace_course_urls,
     _url_replace_regex,
+    replace_jump_to_id_urls,
     process_static_urls,
-    make_static_urls_absolute
+    make_static_urls_absolute,
+    CourseUrlRewriter,
 )
 from mock import patch, Mock
 
@@ -161,3 +163,98 @@ def test_regex():
     for s in no:
         print 'Should not match: {0!r}'.format(s)
         assert_false(re.match(regex, s))
+
+
+@patch('static_replace.staticfiles_storage')
+@patch('static_replace.modulestore')
+def test_rewriter_matches_replace_functions(mock_modulestore, mock_storage):
+    """
+    Make sure CourseUrlRewriter.rewrite does what the separate replace functions do
+    """
+    mock_storage.exists.return_value = False
+    mock_modulestore.return_value = Mock(MongoModuleStore)
+    jump_to_id_base_url = '/courses/org/course/run/jump_to_id/'
+
+    text = '<a href="/course/info"/><a href="/jump_to_id/intro"/><img src="/static/file.png"/>'
+    expected = replace_jump_to_id_urls(
+        replace_course_urls(replace_static_urls(text, DATA_DIRECTORY, COURSE_KEY), COURSE_KEY),
+        COURSE_KEY,
+        jump_to_id_base_url,
+    )
+    rewriter = CourseUrlRewriter(COURSE_KEY, DATA_DIRECTORY, jump_to_id_base_url=jump_to_id_base_url)
+    assert_equals(expected, rewriter.rewrite(text))
+
+
+@patch('static_replace.staticfiles_storage')
+@patch('static_replace.modulestore')
+def test_rewriter_caches_lookups(mock_modulestore, mock_storage):
+    mock_storage.exists.return_value = False
+    mock_modulestore.return_value = Mock(MongoModuleStore)
+
+    rewriter = CourseUrlRewriter(COURSE_KEY, DATA_DIRECTORY, cache_size=10)
+    rewriter.rewrite(STATIC_SOURCE)
+    rewriter.rewrite(STATIC_SOURCE + ' ')
+    mock_storage.exists.assert_called_once_with('file.png')
+    assert_equals(mock_modulestore.return_value.get_modulestore_type.call_count, 1)
+
+
+@patch('static_replace.staticfiles_storage')
+def test_rewriter_caches_output(mock_storage):
+    mock_storage.exists.return_value = True
+    mock_storage.url.return_value = '/static/file.abc123.png'
+
+    rewriter = CourseUrlRewriter(data_directory=DATA_DIRECTORY, cache_size=1)
+    assert_equals('"/static/file.abc123.png"', rewriter.rewrite(STATIC_SOURCE))
+    assert_equals('"/static/file.abc123.png"', rewriter.rewrite(STATIC_SOURCE))
+    assert_equals(mock_storage.url.call_count, 1)
+
+    # the cache only holds one rewritten content, so the first is rewritten again
+    rewriter.rewrite('"/static/other.png"')
+    rewriter.rewrite(STATIC_SOURCE)
+    assert_equals(mock_storage.url.call_count, 3)
+
+
+@patch('static_replace.staticfiles_storage')
+def test_rewriter_bounds_cached_length(mock_storage):
+    mock_storage.exists.return_value = True
+    mock_storage.url.return_value = '/static/file.abc123.png'
+
+    rewriter = CourseUrlRewriter(data_directory=DATA_DIRECTORY, cache_size=10)
+    with patch.object(CourseUrlRewriter, 'MAX_CACHED_ITEM_LENGTH', len(STATIC_SOURCE)):
+        # too long to be cached
+        long_source = STATIC_SOURCE + ' ' * 100
+        rewriter.rewrite(long_source)
+        rewriter.rewrite(long_source)
+        assert_equals(mock_storage.url.call_count, 2)
+
+    with patch.object(CourseUrlRewriter, 'MAX_CACHED_LENGTH', 2 * len('"/static/file.abc123.png"')):
+        rewriter.rewrite(STATIC_SOURCE)
+        rewriter.rewrite('"/static/other.png"')
+        rewriter.rewrite('"/static/third.png"')
+        # the first content was evicted to keep the total length down
+        rewriter.rewrite(STATIC_SOURCE)
+        assert_equals(mock_storage.url.call_count, 6)
+
+
+@patch('static_replace.staticfiles_storage')
+def test_rewriter_bounds_lookups(mock_storage):
+    mock_storage.exists.return_value = True
+    mock_storage.url.return_value = '/static/file.abc123.png'
+
+    rewriter = CourseUrlRewriter(data_directory=DATA_DIRECTORY, cache_size=1)
+    rewriter.replace_static_urls(STATIC_SOURCE)
+    rewriter.replace_static_urls('"/static/other.png"')
+    rewriter.replace_static_urls(STATIC_SOURCE)
+    assert_equals(mock_storage.exists.call_count, 3)
+
+
+@patch('static_replace.settings')
+def test_shared_rewriters(mock_settings):
+    mock_settings.DEBUG = False
+    mock_settings.STATIC_URL_REWRITE_CACHE_SIZE = 10
+    rewriter = CourseUrlRewriter.for_course(COURSE_KEY, DATA_DIRECTORY)
+    assert_true(rewriter is CourseUrlRewriter.for_course(COURSE_KEY, DATA_DIRECTORY))
+    assert_false(rewriter is CourseUrlRewriter.for_course(COURSE_KEY, 'other_dir'))
+
+    mock_settings.STATIC_URL_REWRITE_CACHE_SIZE = 0
+    assert_false(rewriter is CourseUrlRewriter.for_course(COURSE_KEY, DATA_DIRECTORY))
@@ -28,8 +28,9 @@ from django.contrib.auth.hashers import make_password
 from django.contrib.auth.signals import user_logged_in, user_logged_out
 from django.db import models, IntegrityError
 from django.db.models import Count
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver, Signal
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils.translation import ugettext_noop
 from django_countries.fields import CountryField
@@ -37,6 +38,7 @@ from config_models.models import ConfigurationModel
 from track import contexts
 from eventtracking import tracker
 from importlib import import_module
+from request_cache.middleware import RequestCache
 
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
@@ -47,7 +49,7 @@ from xmodule_django.models import CourseKeyField, NoneToEmptyManager
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.modulestore.django import modulestore
 from opaque_keys.edx.keys import CourseKey
-from functools import total_ordering
+from functools import partial, total_ordering
 
 from certificates.models import GeneratedCertificate
 from course_modes.models import CourseMode
@@ -78,6 +80,25 @@ class AnonymousUserId(models.Model):
     unique_together = (user, course_id)
 
 
+def _compute_anonymous_id(user, course_id):
+    """
+    Compute the anonymous id of (user, course_id) and remember it on `user`.
+    """
+    # include the secret key as a salt, and to make the ids unique across different LMS installs.
+    hasher = hashlib.md5()
+    hasher.update(settings.SECRET_KEY)
+    hasher.update(unicode(user.id))
+    if course_id:
+        hasher.update(course_id.to_deprecated_string().encode('utf-8'))
+    digest = hasher.hexdigest()
+
+    if not hasattr(user, '_anonymous_id'):
+        user._anonymous_id = {}  # pylint: disable=protected-access
+
+    user._anonymous_id[course_id] = digest  # pylint: disable=protected-access
+    return digest
+
+
 def anonymous_id_for_user(user, course_id, save=True):
     """
     Return a unique id for a (user, course) pair, suitable for inserting
@@ -96,18 +117,7 @@ def anonymous_id_for_user(user, course_id, save=True):
     if cached_id is not None:
         return cached_id
 
-    # include the secret key as a salt, and to make the ids unique across different LMS installs.
-    hasher = hashlib.md5()
-    hasher.update(settings.SECRET_KEY)
-    hasher.update(unicode(user.id))
-    if course_id:
-        hasher.update(course_id.to_deprecated_string().encode('utf-8'))
-    digest = hasher.hexdigest()
-
-    if not hasattr(user, '_anonymous_id'):
-        user._anonymous_id = {}  # pylint: disable=protected-access
-
-    user._anonymous_id[course_id] = digest  # pylint: disable=protected-access
+    digest = _compute_anonymous_id(user, course_id)
 
     if save is False:
         return digest
@@ -135,6 +145,73 @@ def anonymous_id_for_user(user, course_id, save=True):
     return digest
 
 
+def anonymous_ids_for_users(users, course_id, save=True):
+    """
+    Return a dict mapping the id of each of `users` to its unique id for
+    `course_id`, as `anonymous_id_for_user` would. Anonymous users are left out.
+
+    The AnonymousUserId rows of all of the users are looked up with one query
+    and the missing ones inserted with another, rather than a `get_or_create`
+    per user. The ids are also remembered on the users, so later calls to
+    `anonymous_id_for_user` with them don't touch the database.
+
+    Keyword arguments:
+    save -- Whether the ids should be saved in AnonymousUserId objects.
+    """
+    anonymous_ids = {}
+    computed_ids = {}
+    for user in users:
+        if user.is_anonymous():
+            continue
+        cached_id = getattr(user, '_anonymous_id', {}).get(course_id)
+        if cached_id is None:
+            cached_id = computed_ids[user.id] = _compute_anonymous_id(user, course_id)
+        anonymous_ids[user.id] = cached_id
+
+    if not save or not computed_ids:
+        return anonymous_ids
+
+    stored_ids = dict(
+        AnonymousUserId.objects.filter(
+            user__in=computed_ids.keys(),
+            course_id=course_id
+        ).values_list('user', 'anonymous_user_id')
+    )
+    for user_id, stored_id in stored_ids.iteritems():
+        if stored_id != computed_ids[user_id]:
+            log.error(
+                u"Stored anonymous user id %r for user %r "
+                u"in course %r doesn't match computed id %r",
+                stored_id,
+                user_id,
+                course_id,
+                computed_ids[user_id]
+            )
+
+    missing_ids = [
+        AnonymousUserId(user_id=user_id, course_id=course_id, anonymous_user_id=digest)
+        for user_id, digest in computed_ids.iteritems()
+        if user_id not in stored_ids
+    ]
+    if missing_ids:
+        try:
+            AnonymousUserId.objects.bulk_create(missing_ids)
+        except IntegrityError:
+            # Another thread has created some of these entries, so fall
+            # back to creating whichever are still missing one by one
+            for anonymous_user_id in missing_ids:
+                try:
+                    AnonymousUserId.objects.get_or_create(
+                        defaults={'anonymous_user_id': anonymous_user_id.anonymous_user_id},
+                        user_id=anonymous_user_id.user_id,
+                        course_id=course_id
+                    )
+                except IntegrityError:
+                    pass
+
+    return anonymous_ids
+
+
 def user_by_anonymous_id(uid):
     """
     Return user by anonymous_user_id using AnonymousUserId lookup table.
@@ -153,6 +230,22 @@ def user_by_anonymous_id(uid):
         return None
 
 
+def users_by_anonymous_ids(uids):
+    """
+    Return a dict mapping each of the anonymous user ids `uids` that is known
+    to its User, looking them all up with a single query.
+    """
+    uids = [uid for uid in uids if uid is not None]
+    if not uids:
+        return {}
+
+    return {
+        anonymous_user_id.anonymous_user_id: anonymous_user_id.user
+        for anonymous_user_id
+        in AnonymousUserId.objects.filter(anonymous_user_id__in=uids).select_related('user')
+    }
+
+
 class UserStanding(models.Model):
     """
     This table contains a student's account's status.
@@ -750,6 +843,12 @@ class CourseEnrollment(models.Model):
     """
     MODEL_TAGS = ['course_id', 'is_active', 'mode']
 
+    # Each user's enrollments are cached as a dict of course id to (mode, is_active),
+    # both for the rest of the request and, for ENROLLMENT_USER_CACHE_TIMEOUT seconds,
+    # in the django cache.
+    ENROLLMENTS_REQUEST_CACHE_NAME = 'student.course_enrollments'
+    ENROLLMENTS_CACHE_KEY = u"student.course_enrollments.{user_id}"
+
     user = models.ForeignKey(User)
     course_id = CourseKeyField(max_length=255, db_index=True)
     created = models.DateTimeField(auto_now_add=True, null=True, db_index=True)
@@ -1119,6 +1218,60 @@ class CourseEnrollment(models.Model):
                 course_id
             )
 
+    @classmethod
+    def _enrollments_for_user_id(cls, user_id):
+        """
+        Returns a dict mapping the unicode course id of each of the user's
+        enrollments (active or not) to its (mode, is_active) pair.
+
+        The dict is read from the request cache, then the django cache, and only
+        queried for when neither has it. Saving or deleting any of the user's
+        enrollments invalidates both (see `invalidate_enrollment_cache`).
+        """
+        request_cache = RequestCache.get_request_cache().data.setdefault(cls.ENROLLMENTS_REQUEST_CACHE_NAME, {})
+        enrollments = request_cache.get(user_id)
+        if enrollments is not None:
+            return enrollments
+
+        cache_key = cls.ENROLLMENTS_CACHE_KEY.format(user_id=user_id)
+        enrollments = cache.get(cache_key)
+        if enrollments is None:
+            enrollments = {
+                unicode(course_id): (mode, is_active)
+                for course_id, mode, is_active
+                in cls.objects.filter(user_id=user_id).values_list('course_id', 'mode', 'is_active')
+            }
+            timeout = getattr(settings, 'ENROLLMENT_USER_CACHE_TIMEOUT', 300)
+            if timeout:
+                cache.set(cache_key, enrollments, timeout)
+
+        request_cache[user_id] = enrollments
+        return enrollments
+
+    @classmethod
+    def _enrollments_for(cls, user):
+        """
+        Returns the cached enrollments of `user` (see `_enrollments_for_user_id`),
+        or an empty dict for anonymous and unsaved users.
+        """
+        if user is None or user.id is None:
+            return {}
+        return cls._enrollments_for_user_id(user.id)
+
+    @classmethod
+    def invalidate_enrollment_cache(cls, user_id):
+        """
+        Drops the cached enrollments of the user with id `user_id`.
+
+        The django cache entry is dropped again once the request has finished,
+        since until its transaction is committed, other requests still read
+        (and may cache) the enrollments as they were before the change.
+        """
+        RequestCache.get_request_cache().data.get(cls.ENROLLMENTS_REQUEST_CACHE_NAME, {}).pop(user_id, None)
+        cache_key = cls.ENROLLMENTS_CACHE_KEY.format(user_id=user_id)
+        cache.delete(cache_key)
+        RequestCache.run_after_request(cache_key, partial(cache.delete, cache_key))
+
     @classmethod
     def is_enrolled(cls, user, course_key):
         """
@@ -1131,11 +1284,8 @@ class CourseEnrollment(models.Model):
 
         `course_id` is our usual course_id string (e.g. "edX/Test101/2013_Fall)
         """
-        try:
-            record = CourseEnrollment.objects.get(user=user, course_id=course_key)
-            return record.is_active
-        except cls.DoesNotExist:
-            return False
+        _mode, is_active = cls._enrollments_for(user).get(unicode(course_key), (None, False))
+        return is_active
 
     @classmethod
     def is_enrolled_by_partial(cls, user, course_id_partial):
@@ -1156,14 +1306,10 @@ class CourseEnrollment(models.Model):
         assert not course_id_partial.run  # None or empty string
         course_key = SlashSeparatedCourseKey(course_id_partial.org, course_id_partial.course, '')
         querystring = unicode(course_key.to_deprecated_string())
-        try:
-            return CourseEnrollment.objects.filter(
-                user=user,
-                course_id__startswith=querystring,
-                is_active=1
-            ).exists()
-        except cls.DoesNotExist:
-            return False
+        return any(
+            is_active and course_id.startswith(querystring)
+            for course_id, (_mode, is_active) in cls._enrollments_for(user).iteritems()
+        )
 
     @classmethod
     def enrollment_mode_for_user(cls, user, course_id):
@@ -1177,14 +1323,16 @@ class CourseEnrollment(models.Model):
             and is_active is whether the enrollment is active.
         Returns (None, None) if the courseenrollment record does not exist.
         """
-        try:
-            record = CourseEnrollment.objects.get(user=user, course_id=course_id)
-            return (record.mode, record.is_active)
-        except cls.DoesNotExist:
-            return (None, None)
+        return cls._enrollments_for(user).get(unicode(course_id), (None, None))
 
     @classmethod
     def enrollments_for_user(cls, user):
+        """
+        Returns a queryset of the user's active enrollments. No query is made
+        for users the enrollment cache knows to have none.
+        """
+        if not any(is_active for _mode, is_active in cls._enrollments_for(user).itervalues()):
+            return CourseEnrollment.objects.none()
         return CourseEnrollment.objects.filter(user=user, is_active=1)
 
     @classmethod
@@ -1275,6 +1423,26 @@ class CourseEnrollment(models.Model):
         return CourseMode.is_verified_slug(self.mode)
 
 
+@receiver(post_save, sender=CourseEnrollment)
+@receiver(post_delete, sender=CourseEnrollment)
+def invalidate_enrollment_cache(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drop the cached enrollments of the user whenever one of their enrollments
+    changes, whether through `update_enrollment` or a direct save.
+    """
+    CourseEnrollment.invalidate_enrollment_cache(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def invalidate_new_user_enrollment_cache(sender, instance, created, **kwargs):  # pylint: disable=unused-argument
+    """
+    Make sure a newly created user can't pick up enrollments cached under a
+    reused id (e.g. after a rolled back transaction).
+    """
+    if created:
+        CourseEnrollment.invalidate_enrollment_cache(instance.id)
+
+
 class CourseEnrollmentAllowed(models.Model):
     """
     Table of users (specified by email address strings) who are allowed to enroll in a specified course.
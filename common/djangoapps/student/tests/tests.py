@@ -17,15 +17,18 @@ from django.contrib.sessions.middleware import SessionMiddleware
 from django.core.urlresolvers import reverse
 from django.test import TestCase
 from django.test.client import RequestFactory, Client
+from django.test.utils import override_settings
 from mock import Mock, patch
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
 from student.models import (
-    anonymous_id_for_user, user_by_anonymous_id, CourseEnrollment, unique_id_for_user, LinkedInAddToProfileConfiguration
+    anonymous_id_for_user, anonymous_ids_for_users, user_by_anonymous_id, users_by_anonymous_ids, AnonymousUserId,
+    CourseEnrollment, unique_id_for_user, LinkedInAddToProfileConfiguration
 )
 from student.views import (process_survey_link, _cert_info,
                            change_enrollment, complete_course_mode_info)
 from student.tests.factories import UserFactory, CourseModeFactory
+from request_cache.middleware import RequestCache
 from util.testing import EventTestMixin
 from util.model_utils import USER_SETTINGS_CHANGED_EVENT_NAME
 from xmodule.modulestore.tests.factories import CourseFactory
@@ -734,6 +737,42 @@ class EnrollInCourseTest(EnrollmentEventTestMixin, TestCase):
         CourseEnrollment.enroll(user, course_id, "honor")
         self.assert_enrollment_mode_change_event_was_emitted(user, course_id, "honor")
 
+    @override_settings(ENROLLMENT_USER_CACHE_TIMEOUT=300)
+    def test_enrollment_lookups_are_cached(self):
+        user = User.objects.create(username="jack", email="jack@fake.edx.org")
+        course_id = SlashSeparatedCourseKey("edX", "Test101", "2013")
+        course_id_partial = SlashSeparatedCourseKey("edX", "Test101", None)
+        CourseEnrollment.enroll(user, course_id, "audit")
+        self.addCleanup(cache.clear)
+
+        # The first lookup loads all of the user's enrollments...
+        with self.assertNumQueries(1):
+            self.assertTrue(CourseEnrollment.is_enrolled(user, course_id))
+        # ...which serve every other lookup for the rest of the request
+        with self.assertNumQueries(0):
+            self.assertTrue(CourseEnrollment.is_enrolled_by_partial(user, course_id_partial))
+            self.assertEquals(CourseEnrollment.enrollment_mode_for_user(user, course_id), ("audit", True))
+            self.assertFalse(CourseEnrollment.is_enrolled(user, SlashSeparatedCourseKey("MITx", "6.003z", "2012")))
+
+        # and are shared with later requests through the django cache
+        RequestCache().clear_request_cache()
+        with self.assertNumQueries(0):
+            self.assertTrue(CourseEnrollment.is_enrolled(user, course_id))
+
+        # Changing the enrollment invalidates both
+        CourseEnrollment.unenroll(user, course_id)
+        self.assertFalse(CourseEnrollment.is_enrolled(user, course_id))
+        self.assertEquals(CourseEnrollment.enrollment_mode_for_user(user, course_id), ("audit", False))
+        RequestCache().clear_request_cache()
+        self.assertFalse(CourseEnrollment.is_enrolled(user, course_id))
+
+        # Enrollments cached by another request before the change was committed
+        # are dropped once the request that made the change has finished
+        CourseEnrollment.enroll(user, course_id, "audit")
+        cache.set(CourseEnrollment.ENROLLMENTS_CACHE_KEY.format(user_id=user.id), {}, 300)
+        RequestCache().finish_request()
+        self.assertTrue(CourseEnrollment.is_enrolled(user, course_id))
+
 
 @unittest.skipUnless(settings.ROOT_URLCONF == 'lms.urls', 'Test only valid in lms')
 class ChangeEnrollmentViewTest(ModuleStoreTestCase):
@@ -884,3 +923,26 @@ class AnonymousLookupTable(ModuleStoreTestCase):
         real_user = user_by_anonymous_id(anonymous_id)
         self.assertEqual(self.user, real_user)
         self.assertEqual(anonymous_id, anonymous_id_for_user(self.user, course2.id, save=False))
+
+    def test_bulk_roundtrip(self):
+        other_user = UserFactory()
+        # One user already has a stored id
+        stored_id = anonymous_id_for_user(other_user, self.course.id)
+        users = [self.user, User.objects.get(id=other_user.id), AnonymousUser()]
+
+        # The existing ids are looked up together, and the missing one inserted
+        with self.assertNumQueries(2):
+            anonymous_ids = anonymous_ids_for_users(users, self.course.id)
+        self.assertEqual(len(anonymous_ids), 2)
+        self.assertEqual(anonymous_ids[other_user.id], stored_id)
+        self.assertEqual(
+            anonymous_ids[self.user.id],
+            AnonymousUserId.objects.get(user=self.user, course_id=self.course.id).anonymous_user_id
+        )
+        # and remembered on the users
+        with self.assertNumQueries(0):
+            self.assertEqual(anonymous_ids[self.user.id], anonymous_id_for_user(self.user, self.course.id))
+
+        with self.assertNumQueries(1):
+            real_users = users_by_anonymous_ids(anonymous_ids.values() + ['unknown', None])
+        self.assertEqual(real_users, {anonymous_ids[user.id]: user for user in users[:2]})
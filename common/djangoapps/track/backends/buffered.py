@@ -0,0 +1,180 @@
+"""
+Event tracker backend that queues events in memory and hands them to
+another backend in batches, from a background thread.
+
+It wraps any other backend, for example::
+
+  TRACKING_BACKENDS = {
+      'mongo': {
+          'ENGINE': 'track.backends.buffered.BufferedBackend',
+          'OPTIONS': {
+              'backend': {
+                  'ENGINE': 'track.backends.mongodb.MongoBackend',
+                  'OPTIONS': {...}
+              },
+              'batch_size': 100,
+          }
+      }
+  }
+
+"""
+
+from __future__ import absolute_import
+
+import atexit
+import logging
+import os
+import threading
+import time
+from Queue import Queue, Empty, Full
+
+from dogapi import dog_stats_api
+
+from track.backends import BaseBackend
+
+
+log = logging.getLogger(__name__)
+
+# What to do with an event that arrives when the queue is full
+OVERFLOW_DROP = 'drop'
+OVERFLOW_BLOCK = 'block'
+
+
+class BufferedBackend(BaseBackend):
+    """
+    Event tracker backend that sends events to another backend in batches.
+
+    `send` only appends the event to a bounded queue; a daemon thread takes
+    them off the queue and passes up to `batch_size` of them at a time to the
+    wrapped backend's `send_batch`, waiting at most `flush_interval` seconds
+    to fill a batch. Events still queued when the process exits are flushed,
+    waiting at most `flush_timeout` seconds.
+    """
+
+    def __init__(self, backend, max_queue_size=10000, batch_size=100, flush_interval=1.0,
+                 overflow=OVERFLOW_DROP, block_timeout=0.1, flush_timeout=5.0, **kwargs):
+        """
+        :Parameters:
+
+          - `backend`: configuration of the wrapped backend, as a dict with
+            an `ENGINE` and optional `OPTIONS` like in TRACKING_BACKENDS
+          - `max_queue_size`: number of events that can be waiting to be
+            sent before new ones overflow
+          - `batch_size`: maximum number of events sent to `backend` at once
+          - `flush_interval`: maximum number of seconds to wait for a batch
+            to fill up before sending it
+          - `overflow`: what to do when the queue is full, either 'drop'
+            the event or 'block' the sender for up to `block_timeout`
+            seconds before dropping it
+          - `flush_timeout`: maximum number of seconds to wait for the
+            queued events to be sent when the process exits
+
+        """
+        super(BufferedBackend, self).__init__(**kwargs)
+
+        # The tracker imports the backends, so import it lazily
+        from track.tracker import _instantiate_backend_from_name  # pylint: disable=protected-access
+        self.backend = _instantiate_backend_from_name(backend['ENGINE'], backend.get('OPTIONS', {}))
+
+        if overflow not in (OVERFLOW_DROP, OVERFLOW_BLOCK):
+            raise ValueError('Invalid overflow policy {}'.format(overflow))
+
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.flush_timeout = flush_timeout
+        self.metric_name = 'track.buffered.{}'.format(self.backend.__class__.__name__)
+
+        # Number of events dropped because the queue was full
+        self.dropped = 0
+
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+
+        atexit.register(self.flush)
+
+    def send(self, event):
+        """Queue the event to be sent to the wrapped backend."""
+        queue = self._get_queue()
+        try:
+            if self.overflow == OVERFLOW_BLOCK:
+                queue.put(event, timeout=self.block_timeout)
+            else:
+                queue.put_nowait(event)
+        except Full:
+            self.dropped += 1
+            dog_stats_api.increment('{}.dropped'.format(self.metric_name))
+
+    def flush(self, timeout=None):
+        """
+        Wait for all the events queued so far to be sent, for up to `timeout`
+        seconds (by default `flush_timeout`), so that a hung backend can't
+        keep the process from exiting. Returns whether they were all sent.
+        """
+        queue = self._queue
+        if queue is None or self._pid != os.getpid():
+            return True
+
+        deadline = time.time() + (self.flush_timeout if timeout is None else timeout)
+        # Like queue.join(), but with a deadline
+        with queue.all_tasks_done:
+            while queue.unfinished_tasks:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    log.warning(
+                        'Gave up waiting for %d events to be sent to %s', queue.unfinished_tasks, self.metric_name
+                    )
+                    return False
+                queue.all_tasks_done.wait(remaining)
+        return True
+
+    def _get_queue(self):
+        """
+        Return the queue of events, starting the thread that empties it if
+        needed. This happens lazily, and again in forked processes, since
+        threads don't survive a fork.
+        """
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._queue = Queue(self.max_queue_size)
+                    self._thread = threading.Thread(
+                        target=self._run, args=(self._queue,), name=self.metric_name
+                    )
+                    self._thread.daemon = True
+                    self._thread.start()
+                    self._pid = os.getpid()
+        return self._queue
+
+    def _run(self, queue):
+        """Send the events of `queue` to the wrapped backend, forever."""
+        while True:
+            batch = [queue.get()]
+            deadline = time.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(queue.get(timeout=timeout))
+                except Empty:
+                    break
+
+            dog_stats_api.gauge('{}.queue_size'.format(self.metric_name), queue.qsize())
+            self._send_batch(batch)
+            for __ in batch:
+                queue.task_done()
+
+    def _send_batch(self, batch):
+        """Send a batch of events to the wrapped backend, logging any error."""
+        try:
+            with dog_stats_api.timer('{}.flush'.format(self.metric_name)):
+                self.backend.send_batch(batch)
+            dog_stats_api.increment('{}.sent'.format(self.metric_name), len(batch))
+        except Exception:  # pylint: disable=broad-except
+            # As with the synchronous backends, the events are lost
+            log.exception('Error sending %d events to %s', len(batch), self.metric_name)
@@ -11,7 +11,7 @@ from __future__ import absolute_import
 
 import logging
 
-from django.db import models
+from django.db import connections, models, transaction
 
 from track.backends import BaseBackend
 
@@ -75,9 +75,38 @@ class DjangoBackend(BaseBackend):
         self.name = name
 
     def send(self, event):
-        field_values = {x: event.get(x, '') for x in LOGFIELDS}
-        tldat = TrackingLog(**field_values)
+        self._save(self._tracking_log(event))
+
+    def send_batch(self, events):
+        """
+        Save the events with a single multi-row insert, or one at a time if
+        that fails, so that one bad event doesn't lose the whole batch.
+
+        Batches come from the BufferedBackend thread, whose connection would
+        otherwise stay open between batches until the database times it out,
+        so the connection is closed afterwards unless a transaction is being
+        managed on it.
+        """
+        tldats = [self._tracking_log(event) for event in events]
+        try:
+            TrackingLog.objects.using(self.name).bulk_create(tldats)
+        except Exception:  # pylint: disable=broad-except
+            log.exception('Error saving %d events at once, saving them one at a time', len(tldats))
+            transaction.rollback_unless_managed(using=self.name)
+            for tldat in tldats:
+                self._save(tldat)
+        finally:
+            if not transaction.is_managed(using=self.name):
+                connections[self.name].close()
+
+    def _save(self, tldat):
+        """Save a TrackingLog, logging any error"""
         try:
             tldat.save(using=self.name)
         except Exception as e:  # pylint: disable=broad-except
             log.exception(e)
+
+    def _tracking_log(self, event):
+        """Return an unsaved TrackingLog of the event"""
+        field_values = {x: event.get(x, '') for x in LOGFIELDS}
+        return TrackingLog(**field_values)
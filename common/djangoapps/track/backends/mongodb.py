@@ -87,6 +87,26 @@ class MongoBackend(BaseBackend):
         self.collection.ensure_index('event_type')
 
     def send(self, event):
+        """Insert the event in to the Mongo collection"""
+        self._insert(event)
+
+    def send_batch(self, events):
+        """
+        Insert the events in to the Mongo collection with a single bulk insert.
+
+        The insert carries on past events rejected by the server, but an event
+        that can't be encoded stops it, so then the events are inserted one by
+        one, and only that event is lost.
+        """
+        try:
+            self.collection.insert(events, manipulate=False, continue_on_error=True)
+        except BSONError:
+            for event in events:
+                self._insert(event)
+        except PyMongoError:
+            log.exception('Error inserting to MongoDB event tracker backend')
+
+    def _insert(self, event):
         """Insert the event in to the Mongo collection"""
         try:
             self.collection.insert(event, manipulate=False)
@@ -0,0 +1,78 @@
+from __future__ import absolute_import
+
+import threading
+import time
+
+from django.test import TestCase
+
+from track.backends import BaseBackend
+from track.backends.buffered import BufferedBackend
+
+
+class RecordingBackend(BaseBackend):
+    """Backend that records the batches it is sent, optionally waiting for `release` first."""
+    def __init__(self, **kwargs):
+        super(RecordingBackend, self).__init__(**kwargs)
+        self.batches = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def send(self, event):
+        self.send_batch([event])
+
+    def send_batch(self, events):
+        self.release.wait()
+        self.batches.append(events)
+
+
+class TestBufferedBackend(TestCase):
+    def get_backend(self, **options):
+        """Return a BufferedBackend wrapping a RecordingBackend."""
+        return BufferedBackend(
+            backend={'ENGINE': 'track.backends.tests.test_buffered.RecordingBackend'},
+            **options
+        )
+
+    def test_events_are_sent_in_batches(self):
+        backend = self.get_backend(batch_size=2, flush_interval=0.1)
+        # Hold the first batch until all the events are queued
+        backend.backend.release.clear()
+        events = [{'test': index} for index in range(5)]
+        for event in events:
+            backend.send(event)
+        backend.backend.release.set()
+        backend.flush()
+
+        batches = backend.backend.batches
+        self.assertTrue(all(len(batch) <= 2 for batch in batches))
+        self.assertLess(len(batches), len(events))
+        self.assertEqual(sum(batches, []), events)
+
+    def test_events_are_dropped_when_full(self):
+        backend = self.get_backend(max_queue_size=1, batch_size=1)
+        backend.backend.release.clear()
+        backend.send({'test': 0})
+        # Wait for the thread to take the first event, which makes room for one more
+        while not backend._queue.empty():  # pylint: disable=protected-access
+            time.sleep(0.01)
+        backend.send({'test': 1})
+        backend.send({'test': 2})
+        backend.backend.release.set()
+        backend.flush()
+
+        self.assertEqual(backend.dropped, 1)
+        self.assertEqual(backend.backend.batches, [[{'test': 0}], [{'test': 1}]])
+
+    def test_flush_gives_up_on_hung_backend(self):
+        backend = self.get_backend(flush_timeout=0.1)
+        backend.backend.release.clear()
+        backend.send({'test': 0})
+
+        self.assertFalse(backend.flush())
+        backend.backend.release.set()
+        self.assertTrue(backend.flush(timeout=5))
+        self.assertEqual(backend.backend.batches, [[{'test': 0}]])
+
+    def test_invalid_overflow_policy(self):
+        with self.assertRaises(ValueError):
+            self.get_backend(overflow='wait')
@@ -1,6 +1,7 @@
 from __future__ import absolute_import
 
 from django.test import TestCase
+from mock import patch
 
 from track.backends.django import DjangoBackend, TrackingLog
 
@@ -24,3 +25,37 @@ class TestDjangoBackend(TestCase):
 
         # Check if time is stored in UTC
         self.assertEqual(str(results[0].time), '2013-01-01 17:01:00+00:00')
+
+    def test_django_backend_batch(self):
+        events = [
+            {'username': 'first', 'time': '2013-01-01T12:01:00-05:00'},
+            {'username': 'second', 'time': '2013-01-01T12:02:00-05:00'},
+        ]
+        with self.assertNumQueries(1):
+            self.backend.send_batch(events)
+
+        results = TrackingLog.objects.order_by('time')
+
+        self.assertEqual([result.username for result in results], ['first', 'second'])
+
+    def test_django_backend_batch_with_bad_event(self):
+        events = [
+            {'username': 'first', 'time': '2013-01-01T12:01:00-05:00'},
+            {'username': 'bad', 'time': 'not a time'},
+            {'username': 'second', 'time': '2013-01-01T12:02:00-05:00'},
+        ]
+        self.backend.send_batch(events)
+
+        results = TrackingLog.objects.order_by('time')
+
+        self.assertEqual([result.username for result in results], ['first', 'second'])
+
+    @patch('track.backends.django.connections')
+    @patch('track.backends.django.transaction')
+    def test_django_backend_batch_closes_connection(self, mock_transaction, mock_connections):
+        mock_transaction.is_managed.return_value = False
+        self.backend.send_batch([{'username': 'first', 'time': '2013-01-01T12:01:00-05:00'}])
+
+        mock_connections.__getitem__.assert_called_with('default')
+        mock_connections['default'].close.assert_called_once_with()
+        self.assertEqual(TrackingLog.objects.count(), 1)
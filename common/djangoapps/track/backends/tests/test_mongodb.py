@@ -1,5 +1,6 @@
 from __future__ import absolute_import
 
+from bson.errors import InvalidDocument
 from mock import patch
 
 from django.test import TestCase
@@ -37,3 +38,27 @@ class TestMongoBackend(TestCase):
 
         self.assertEqual(events[0], first_argument(calls[0]))
         self.assertEqual(events[1], first_argument(calls[1]))
+
+    def test_mongo_backend_batch(self):
+        events = [{'test': 1}, {'test': 2}]
+
+        self.backend.send_batch(events)
+
+        # Check that the events were inserted together
+        self.backend.collection.insert.assert_called_once_with(events, manipulate=False, continue_on_error=True)
+
+    def test_mongo_backend_batch_invalid_document(self):
+        events = [{'test': 1}, {'test': object()}, {'test': 3}]
+        insert = self.backend.collection.insert
+
+        def fail_on_invalid(doc_or_docs, **kwargs):  # pylint: disable=unused-argument
+            docs = doc_or_docs if isinstance(doc_or_docs, list) else [doc_or_docs]
+            if events[1] in docs:
+                raise InvalidDocument('Cannot encode object')
+        insert.side_effect = fail_on_invalid
+
+        self.backend.send_batch(events)
+
+        # The events are then inserted one by one, so only the invalid one is lost
+        inserted = [call[1][0] for call in insert.mock_calls[1:]]
+        self.assertEqual(inserted, events)
@@ -7,6 +7,9 @@ Uses pyparsing to parse. Main function as of now is evaluator().
 import math
 import operator
 import numbers
+import threading
+from collections import OrderedDict
+
 import numpy
 import scipy.constants
 import functions
@@ -216,6 +219,81 @@ def add_defaults(variables, functions, case_sensitive):
     return (all_variables, all_functions)
 
 
+# The following evaluation actions are the counterparts of the ones above for
+# evaluating an expression over many samples at once, when variables may be
+# numpy arrays holding a value for each sample. Terminals are recognized as
+# strings, since arrays aren't `numbers.Number`s.
+
+def _operands(parse_result):
+    """
+    Return the values in `parse_result`, leaving out the operators.
+    """
+    return [k for k in parse_result if not isinstance(k, basestring)]
+
+
+def eval_array_atom(parse_result):
+    """
+    Return the value wrapped by the atom, like `eval_atom`.
+    """
+    return _operands(parse_result)[0]
+
+
+def eval_array_power(parse_result):
+    """
+    Exponentiate the inputs right to left, like `eval_power`.
+    """
+    return reduce(lambda a, b: b ** a, reversed(_operands(parse_result)))
+
+
+def eval_array_parallel(parse_result):
+    """
+    Compute the parallel resistors operator, like `eval_parallel`.
+
+    A zero among the inputs is left to raise a FloatingPointError, so that
+    those samples are evaluated one at a time instead.
+    """
+    operands = _operands(parse_result)
+    if len(operands) == 1:
+        return operands[0]
+    return 1. / sum(1. / e for e in operands)
+
+
+def eval_array_sum(parse_result):
+    """
+    Add the inputs, keeping in mind their sign, like `eval_sum`.
+    """
+    total = 0.0
+    current_op = operator.add
+    for token in parse_result:
+        if isinstance(token, basestring):
+            current_op = operator.sub if token == '-' else operator.add
+        else:
+            total = current_op(total, token)
+    return total
+
+
+def eval_array_product(parse_result):
+    """
+    Multiply the inputs, like `eval_product`.
+    """
+    prod = 1.0
+    current_op = operator.mul
+    for token in parse_result:
+        if isinstance(token, basestring):
+            current_op = operator.truediv if token == '/' else operator.mul
+        else:
+            prod = current_op(prod, token)
+    return prod
+
+
+# The default functions which give the same results when applied to an array
+# of values as when applied to each value in turn.
+VECTORIZED_FUNCTIONS = frozenset(
+    func for name, func in DEFAULT_FUNCTIONS.iteritems()
+    if name not in ('fact', 'factorial', 'arccot')
+)
+
+
 def evaluator(variables, functions, math_expr, case_sensitive=False):
     """
     Evaluate an expression; that is, take a string of math and return a float.
@@ -229,8 +307,7 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
         return float('nan')
 
     # Parse the tree.
-    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
-    math_interpreter.parse_algebra()
+    math_interpreter = parse_expression(math_expr, case_sensitive)
 
     # Get our variables together.
     all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
@@ -258,6 +335,162 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
     return math_interpreter.reduce_tree(evaluate_actions)
 
 
+def evaluate_samples(variables_list, functions, math_expr, case_sensitive=False):
+    """
+    Evaluate an expression for each of a list of samples of its variables, as
+    `evaluator` would, and return the list of results.
+
+    When every sample defines the same variables and the expression only uses
+    default functions that work elementwise, the expression is evaluated once,
+    over numpy arrays holding the values of the variables in all the samples.
+    If that raises any error (e.g. a division by zero, an overflow or a
+    negative number raised to a fractional power), the samples are evaluated
+    one at a time instead, so that the results and errors are exactly those of
+    `evaluator`.
+    """
+    if not variables_list:
+        return []
+    if math_expr.strip() == "":
+        return [float('nan')] * len(variables_list)
+
+    math_interpreter = parse_expression(math_expr, case_sensitive)
+    all_variables, all_functions = add_defaults(variables_list[0], functions, case_sensitive)
+    math_interpreter.check_variables(all_variables, all_functions)
+
+    if case_sensitive:
+        casify = lambda x: x
+    else:
+        casify = lambda x: x.lower()  # Lowercase for case insens.
+
+    names = set(variables_list[0])
+    vectorizable = (
+        all(set(variables) == names for variables in variables_list) and
+        all(all_functions[casify(func)] in VECTORIZED_FUNCTIONS for func in math_interpreter.functions_used)
+    )
+    if vectorizable:
+        array_variables = {
+            name: numpy.array([variables[name] for variables in variables_list])
+            for name in names
+        }
+        all_variables, all_functions = add_defaults(array_variables, functions, case_sensitive)
+        evaluate_actions = {
+            'number': eval_number,
+            'variable': lambda x: all_variables[casify(x[0])],
+            'function': lambda x: all_functions[casify(x[0])](x[1]),
+            'atom': eval_array_atom,
+            'power': eval_array_power,
+            'parallel': eval_array_parallel,
+            'product': eval_array_product,
+            'sum': eval_array_sum
+        }
+        try:
+            with numpy.errstate(all='raise'):
+                result = numpy.asarray(math_interpreter.reduce_tree(evaluate_actions))
+        except Exception:  # pylint: disable=broad-except
+            pass
+        else:
+            if result.shape == ():
+                return [result.item()] * len(variables_list)
+            if result.shape == (len(variables_list),):
+                return result.tolist()
+
+    return [evaluator(variables, functions, math_expr, case_sensitive) for variables in variables_list]
+
+
+def _build_grammar():
+    """
+    Return the pyparsing grammar of algebraic expressions.
+
+    The parse tree has proper groupings to reflect parenthesis and order of
+    operations. It leaves all operators in the tree and does not parse any
+    strings of numbers into their float versions.
+    """
+    # 0.33 or 7 or .34 or 16.
+    number_part = Word(nums)
+    inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
+    # pyparsing allows spaces between tokens--`Combine` prevents that.
+    inner_number = Combine(inner_number)
+
+    # SI suffixes and percent.
+    number_suffix = MatchFirst(Literal(k) for k in SUFFIXES.keys())
+
+    # 0.33k or 17
+    plus_minus = Literal('+') | Literal('-')
+    number = Group(
+        Optional(plus_minus) +
+        inner_number +
+        Optional(CaselessLiteral("E") + Optional(plus_minus) + number_part) +
+        Optional(number_suffix)
+    )
+    number = number("number")
+
+    # Predefine recursive variables.
+    expr = Forward()
+
+    # Handle variables passed in. They must start with letters/underscores
+    # and may contain numbers afterward.
+    inner_varname = Word(alphas + "_", alphanums + "_")
+    varname = Group(inner_varname)("variable")
+
+    # Same thing for functions.
+    function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
+
+    atom = number | function | varname | "(" + expr + ")"
+    atom = Group(atom)("atom")
+
+    # Do the following in the correct order to preserve order of operation.
+    pow_term = atom + ZeroOrMore("^" + atom)
+    pow_term = Group(pow_term)("power")
+
+    par_term = pow_term + ZeroOrMore('||' + pow_term)  # 5k || 4k
+    par_term = Group(par_term)("parallel")
+
+    prod_term = par_term + ZeroOrMore((Literal('*') | Literal('/')) + par_term)  # 7 * 5 / 4
+    prod_term = Group(prod_term)("product")
+
+    sum_term = Optional(plus_minus) + prod_term + ZeroOrMore(plus_minus + prod_term)  # -5 + 4 - 3
+    sum_term = Group(sum_term)("sum")
+
+    # Finish the recursion.
+    expr << sum_term  # pylint: disable=pointless-statement
+    return expr + stringEnd
+
+
+# Building the grammar is about as expensive as parsing with it, so it is only
+# done once.
+ALGEBRA_GRAMMAR = _build_grammar()
+
+# The number of parsed expressions kept by `parse_expression`.
+PARSE_CACHE_SIZE = 1024
+
+_parse_cache = OrderedDict()
+_parse_cache_lock = threading.Lock()
+
+
+def parse_expression(math_expr, case_sensitive=False):
+    """
+    Return a ParseAugmenter holding the parse of `math_expr`.
+
+    The most recently used parses are cached, since the same expressions (the
+    instructor's answer, and often the students') are evaluated over and over
+    again. The returned ParseAugmenter is shared, and must not be modified.
+    """
+    key = (math_expr, case_sensitive)
+    with _parse_cache_lock:
+        math_interpreter = _parse_cache.pop(key, None)
+        if math_interpreter is not None:
+            _parse_cache[key] = math_interpreter
+            return math_interpreter
+
+    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
+    math_interpreter.parse_algebra()
+    with _parse_cache_lock:
+        _parse_cache[key] = math_interpreter
+        while len(_parse_cache) > PARSE_CACHE_SIZE:
+            _parse_cache.popitem(last=False)
+    return math_interpreter
+
+
 class ParseAugmenter(object):
     """
     Holds the data for a particular parse.
@@ -278,23 +511,6 @@ class ParseAugmenter(object):
         self.variables_used = set()
         self.functions_used = set()
 
-        def vpa(tokens):
-            """
-            When a variable is recognized, store it in `variables_used`.
-            """
-            varname = tokens[0][0]
-            self.variables_used.add(varname)
-
-        def fpa(tokens):
-            """
-            When a function is recognized, store it in `functions_used`.
-            """
-            varname = tokens[0][0]
-            self.functions_used.add(varname)
-
-        self.variable_parse_action = vpa
-        self.function_parse_action = fpa
-
     def parse_algebra(self):
         """
         Parse an algebraic expression into a tree.
@@ -302,62 +518,23 @@ class ParseAugmenter(object):
         Store a `pyparsing.ParseResult` in `self.tree` with proper groupings to
         reflect parenthesis and order of operations. Leave all operators in the
         tree and do not parse any strings of numbers into their float versions.
+        Record the names of the variables and functions used in the expression.
 
         Adding the groups and result names makes the `repr()` of the result
         really gross. For debugging, use something like
           print OBJ.tree.asXML()
         """
-        # 0.33 or 7 or .34 or 16.
-        number_part = Word(nums)
-        inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
-        # pyparsing allows spaces between tokens--`Combine` prevents that.
-        inner_number = Combine(inner_number)
-
-        # SI suffixes and percent.
-        number_suffix = MatchFirst(Literal(k) for k in SUFFIXES.keys())
-
-        # 0.33k or 17
-        plus_minus = Literal('+') | Literal('-')
-        number = Group(
-            Optional(plus_minus) +
-            inner_number +
-            Optional(CaselessLiteral("E") + Optional(plus_minus) + number_part) +
-            Optional(number_suffix)
-        )
-        number = number("number")
-
-        # Predefine recursive variables.
-        expr = Forward()
-
-        # Handle variables passed in. They must start with letters/underscores
-        # and may contain numbers afterward.
-        inner_varname = Word(alphas + "_", alphanums + "_")
-        varname = Group(inner_varname)("variable")
-        varname.setParseAction(self.variable_parse_action)
-
-        # Same thing for functions.
-        function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
-        function.setParseAction(self.function_parse_action)
-
-        atom = number | function | varname | "(" + expr + ")"
-        atom = Group(atom)("atom")
-
-        # Do the following in the correct order to preserve order of operation.
-        pow_term = atom + ZeroOrMore("^" + atom)
-        pow_term = Group(pow_term)("power")
-
-        par_term = pow_term + ZeroOrMore('||' + pow_term)  # 5k || 4k
-        par_term = Group(par_term)("parallel")
-
-        prod_term = par_term + ZeroOrMore((Literal('*') | Literal('/')) + par_term)  # 7 * 5 / 4
-        prod_term = Group(prod_term)("product")
-
-        sum_term = Optional(plus_minus) + prod_term + ZeroOrMore(plus_minus + prod_term)  # -5 + 4 - 3
-        sum_term = Group(sum_term)("sum")
-
-        # Finish the recursion.
-        expr << sum_term  # pylint: disable=pointless-statement
-        self.tree = (expr + stringEnd).parseString(self.math_expr)[0]
+        self.tree = ALGEBRA_GRAMMAR.parseString(self.math_expr)[0]
+
+        nodes = [self.tree]
+        while nodes:
+            node = nodes.pop()
+            node_name = node.getName()
+            if node_name == 'variable':
+                self.variables_used.add(node[0])
+            elif node_name == 'function':
+                self.functions_used.add(node[0])
+            nodes.extend(child for child in node if isinstance(child, ParseResults))
 
     def reduce_tree(self, handle_actions, terminal_converter=None):
         """
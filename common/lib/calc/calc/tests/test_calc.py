@@ -559,3 +559,71 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+
+class EvaluateSamplesTest(unittest.TestCase):
+    """
+    Check that `calc.evaluate_samples` gives the same results as evaluating
+    each sample with `calc.evaluator`.
+    """
+    samples = [{'x': 0.5, 'y': 2.0}, {'x': 1.5, 'y': -3.0}, {'x': 2.0, 'y': 0.25}]
+
+    def assert_matches_evaluator(self, math_expr, samples=None, case_sensitive=False):
+        """
+        Assert that `evaluate_samples` gives `evaluator`'s results for `math_expr`.
+        """
+        samples = self.samples if samples is None else samples
+        expected = [calc.evaluator(sample, {}, math_expr, case_sensitive) for sample in samples]
+        actual = calc.evaluate_samples(samples, {}, math_expr, case_sensitive)
+        self.assertEqual(len(actual), len(expected))
+        for actual_value, expected_value in zip(actual, expected):
+            if numpy.isnan(expected_value):
+                self.assertTrue(numpy.isnan(actual_value))
+            else:
+                self.assertAlmostEqual(actual_value, expected_value)
+
+    def test_expressions(self):
+        for math_expr in ['x', '3', '-x+2*y', 'x^2^y', 'x*y/4', 'x||y', 'sin(x)+cos(y)', 'sec(x)', 'x*i', '5k*X']:
+            self.assert_matches_evaluator(math_expr)
+
+    def test_case_sensitive(self):
+        self.assert_matches_evaluator('x*y', case_sensitive=True)
+        with self.assertRaises(calc.UndefinedVariable):
+            calc.evaluate_samples(self.samples, {}, 'X', case_sensitive=True)
+
+    def test_falls_back_to_each_sample(self):
+        # factorials, zeros in parallel and negative numbers raised to fractional
+        # powers can't be evaluated over arrays of samples
+        self.assert_matches_evaluator('fact(y)', [{'y': 2.0}, {'y': 3.0}])
+        self.assert_matches_evaluator('x||y', [{'x': 0.0, 'y': 1.0}, {'x': 2.0, 'y': 1.0}])
+        self.assert_matches_evaluator('y^0.5', [{'y': 4.0}, {'y': 1.0}])
+        with self.assertRaises(ZeroDivisionError):
+            calc.evaluate_samples([{'x': 1.0}, {'x': 0.0}], {}, '1/x')
+        with self.assertRaises(ValueError):
+            calc.evaluate_samples([{'y': 2.0}, {'y': -1.0}], {}, 'y^0.5')
+
+    def test_empty_expression(self):
+        self.assertTrue(all(numpy.isnan(value) for value in calc.evaluate_samples(self.samples, {}, '')))
+        self.assertEqual(calc.evaluate_samples([], {}, 'x'), [])
+
+
+class ParseExpressionTest(unittest.TestCase):
+    """
+    Check the cache of parsed expressions.
+    """
+    def test_parse_cached(self):
+        first = calc.parse_expression('x+y', False)
+        self.assertIs(calc.parse_expression('x+y', False), first)
+        self.assertIsNot(calc.parse_expression('x+y', True), first)
+        self.assertEqual(first.variables_used, set(['x', 'y']))
+
+    def test_functions_used(self):
+        math_interpreter = calc.parse_expression('sin(x)^cos(2*y)')
+        self.assertEqual(math_interpreter.functions_used, set(['sin', 'cos']))
+        self.assertEqual(math_interpreter.variables_used, set(['x', 'y']))
+
+    def test_parse_error_not_cached(self):
+        with self.assertRaises(ParseException):
+            calc.parse_expression('x+', False)
+        with self.assertRaises(ParseException):
+            calc.parse_expression('x+', False)
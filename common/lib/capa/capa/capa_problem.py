@@ -29,7 +29,8 @@ import capa.customrender as customrender
 import capa.responsetypes as responsetypes
 from capa.util import contextualize_text, convert_files_to_filenames
 import capa.xqueue_interface as xqueue_interface
-from capa.safe_exec import safe_exec
+from capa.problem_cache import PROBLEM_CACHE, content_hash
+from capa.safe_exec import safe_exec, SafeExecCache
 
 
 # extra things displayed after "show answers" is pressed
@@ -159,11 +160,22 @@ class LoncapaProblem(object):
         problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
         self.problem_text = problem_text
 
-        # parse problem XML file into an element tree
-        self.tree = etree.XML(problem_text)
+        # The parsed problem is the same for every learner, so it is parsed once and
+        # copied for each of them.
+        template_key = ('tree', content_hash(problem_text))
+        template = PROBLEM_CACHE.get(template_key)
+        if template is not None:
+            self.tree = deepcopy(template)
+        else:
+            # parse problem XML file into an element tree
+            self.tree = etree.XML(problem_text)
 
-        # handle any <include file="foo"> tags
-        self._process_includes()
+            if self.tree.find('.//include') is not None:
+                # handle any <include file="foo"> tags
+                # Included files come from the course's filestore, so these problems aren't cached.
+                self._process_includes()
+            else:
+                PROBLEM_CACHE.set(template_key, deepcopy(self.tree))
 
         # construct script processor context (eg for customresponse problems)
         self.context = self._extract_context(self.tree)
@@ -620,10 +632,12 @@ class LoncapaProblem(object):
         variables for problem answer checking.
 
         Problem XML goes to Python execution context. Runs everything in script tags.
+
+        The resulting context is cached by the code, the seed and the Python path. Unless the
+        code uses the learner's anonymous_student_id, it is shared by every learner.
         """
         context = {}
         context['seed'] = self.seed
-        context['anonymous_student_id'] = self.capa_system.anonymous_student_id
         all_code = ''
 
         python_path = []
@@ -654,21 +668,46 @@ class LoncapaProblem(object):
                 extra_files.append(("python_lib.zip", zip_lib))
                 python_path.append("python_lib.zip")
 
-            try:
-                safe_exec(
-                    all_code,
-                    context,
-                    random_seed=self.seed,
-                    python_path=python_path,
-                    extra_files=extra_files,
-                    cache=self.capa_system.cache,
-                    slug=self.problem_id,
-                    unsafely=self.capa_system.can_execute_unsafe_code(),
-                )
-            except Exception as err:
-                log.exception("Error while execing script code: " + all_code)
-                msg = "Error while executing script code: %s" % str(err).replace('<', '&lt;')
-                raise responsetypes.LoncapaProblemError(msg)
+            uses_student_id = 'anonymous_student_id' in all_code
+            if uses_student_id:
+                context['anonymous_student_id'] = self.capa_system.anonymous_student_id
+
+            # Only share contexts where the results of the code are cached too,
+            # which the runtime doesn't do when the code may change at any time
+            # (e.g. Studio previews)
+            use_cache = isinstance(self.capa_system.cache, SafeExecCache)
+            context_key = (
+                'context',
+                content_hash(all_code),
+                self.seed,
+                tuple(python_path),
+                content_hash(zip_lib) if zip_lib is not None else None,
+                self.capa_system.anonymous_student_id if uses_student_id else None,
+                self.capa_system.can_execute_unsafe_code(),
+            )
+            cached_context = PROBLEM_CACHE.get(context_key) if use_cache else None
+            if cached_context is not None:
+                context = deepcopy(cached_context)
+            else:
+                try:
+                    safe_exec(
+                        all_code,
+                        context,
+                        random_seed=self.seed,
+                        python_path=python_path,
+                        extra_files=extra_files,
+                        cache=self.capa_system.cache,
+                        slug=self.problem_id,
+                        unsafely=self.capa_system.can_execute_unsafe_code(),
+                    )
+                except Exception as err:
+                    log.exception("Error while execing script code: " + all_code)
+                    msg = "Error while executing script code: %s" % str(err).replace('<', '&lt;')
+                    raise responsetypes.LoncapaProblemError(msg)
+                if use_cache:
+                    PROBLEM_CACHE.set(context_key, deepcopy(context))
+
+        context['anonymous_student_id'] = self.capa_system.anonymous_student_id
 
         # Store code source in context, along with the Python path needed to run it correctly.
         context['script_code'] = all_code
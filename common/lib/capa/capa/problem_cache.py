@@ -0,0 +1,60 @@
+"""
+A process-wide cache of the parts of constructing a LoncapaProblem which don't depend on the
+learner: the parsed XML of the problem, and the context its scripts compute for a given seed.
+
+Many learners load the same problem, often with the same seed (e.g. when it is never
+rerandomized), so this saves parsing the problem and executing its scripts again for each of them.
+Values are shared between problems, so callers must copy them before modifying them.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """
+    A thread-safe LRU cache holding at most `max_entries` values.
+    """
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Return the value cached under `key`, or None if there isn't one.
+        """
+        with self._lock:
+            value = self._entries.pop(key, None)
+            if value is not None:
+                self._entries[key] = value
+            return value
+
+    def set(self, key, value):
+        """
+        Cache `value` under `key`, evicting the least recently used values if the cache is full.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove all of the cached values.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+def content_hash(content):
+    """
+    Return a hash of `content`, a string, to key cached values by.
+    """
+    if isinstance(content, unicode):
+        content = content.encode('utf-8')
+    return hashlib.sha1(content).hexdigest()
+
+
+PROBLEM_CACHE = LRUCache()
@@ -5,8 +5,14 @@ from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
 from codejail.safe_exec import json_safe, SafeExecException
 from . import lazymod
 from dogapi import dog_stats_api
+import dogstats_wrapper
 
+from copy import deepcopy
 import hashlib
+import json
+import time
+
+from capa.problem_cache import LRUCache
 
 # Establish the Python environment for Capa.
 # Capa assumes float-friendly division always.
@@ -70,6 +76,75 @@ def update_hash(hasher, obj):
         hasher.update(repr(obj))
 
 
+def cache_key(code, safe_globals, random_seed, python_path=None, extra_files=None):
+    """
+    Return the key the result of running `code` with the JSON-safe globals
+    `safe_globals` and `random_seed` is cached under. The `python_path` and
+    the contents of the `extra_files` (e.g. a course's python_lib.zip) are
+    part of the key, since the code can import from them.
+
+    The globals are canonicalized by serializing them with sorted keys, which
+    is much faster than hashing them piece by piece with `update_hash`.
+    """
+    md5er = hashlib.md5()
+    md5er.update(repr(code))
+    md5er.update(json.dumps(safe_globals, sort_keys=True))
+    md5er.update(repr(python_path or []))
+    for filename, contents in extra_files or ():
+        md5er.update(repr(filename))
+        md5er.update(hashlib.md5(contents).hexdigest())
+    return "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
+
+
+class SafeExecCache(object):
+    """
+    A cache of safe_exec results, for the `cache` argument of `safe_exec`.
+
+    Results are kept in a bounded in-process LRU cache, in front of a cache
+    shared between processes (e.g. the Django cache). Lookups are counted in
+    the `capa.safe_exec.cache` metric, tagged with where the result was found
+    and with `stats_tags` (e.g. the course the code belongs to).
+    """
+    # The in-process cache shared by all SafeExecCaches.
+    local_cache = LRUCache(max_entries=2000)
+
+    def __init__(self, shared_cache, stats_tags=()):
+        self.shared_cache = shared_cache
+        self.stats_tags = list(stats_tags)
+
+    def _count(self, result):
+        """
+        Count a lookup in the cache, with its `result`.
+        """
+        dogstats_wrapper.increment('capa.safe_exec.cache', tags=self.stats_tags + [u'result:{}'.format(result)])
+
+    def get(self, key):
+        """
+        Return a copy of the result cached under `key`, or None.
+        """
+        value = self.local_cache.get(key)
+        if value is not None:
+            self._count('local_hit')
+            # Don't let callers modify the cached globals.
+            return deepcopy(value)
+
+        value = self.shared_cache.get(key) if self.shared_cache else None
+        if value is not None:
+            self._count('hit')
+            self.local_cache.set(key, deepcopy(value))
+        else:
+            self._count('miss')
+        return value
+
+    def set(self, key, value):
+        """
+        Cache `value` under `key`, in both tiers.
+        """
+        self.local_cache.set(key, deepcopy(value))
+        if self.shared_cache:
+            self.shared_cache.set(key, value)
+
+
 @dog_stats_api.timed('capa.safe_exec.time')
 def safe_exec(
     code,
@@ -99,7 +174,8 @@ def safe_exec(
 
     `cache` is an object with .get(key) and .set(key, value) methods.  It will be used
     to cache the execution, taking into account the code, the values of the globals,
-    and the random seed.
+    and the random seed.  If it has `stats_tags` (like `SafeExecCache`), they tag
+    the `capa.safe_exec.exec_time` metric of the executions that weren't cached.
 
     `slug` is an arbitrary string, a description that's meaningful to the
     caller, that will be used in log messages.
@@ -109,11 +185,7 @@ def safe_exec(
     """
     # Check the cache for a previous result.
     if cache:
-        safe_globals = json_safe(globals_dict)
-        md5er = hashlib.md5()
-        md5er.update(repr(code))
-        update_hash(md5er, safe_globals)
-        key = "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
+        key = cache_key(code, json_safe(globals_dict), random_seed, python_path, extra_files)
         cached = cache.get(key)
         if cached is not None:
             # We have a cached result.  The result is a pair: the exception
@@ -134,6 +206,7 @@ def safe_exec(
         exec_fn = codejail_safe_exec
 
     # Run the code!  Results are side effects in globals_dict.
+    start_time = time.time()
     try:
         exec_fn(
             code_prolog + LAZY_IMPORTS + code, globals_dict,
@@ -143,6 +216,9 @@ def safe_exec(
         emsg = e.message
     else:
         emsg = None
+    dogstats_wrapper.histogram(
+        'capa.safe_exec.exec_time', time.time() - start_time, tags=getattr(cache, 'stats_tags', [])
+    )
 
     # Put the result back in the cache.  This is complicated by the fact that
     # the globals dict might not be entirely serializable.
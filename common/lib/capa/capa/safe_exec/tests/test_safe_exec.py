@@ -7,9 +7,10 @@ import random
 import textwrap
 import unittest
 
+from mock import patch
 from nose.plugins.skip import SkipTest
 
-from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec import safe_exec, cache_key, update_hash, SafeExecCache
 from codejail.safe_exec import SafeExecException
 from codejail.jail_code import is_configured
 
@@ -166,6 +167,15 @@ class TestSafeExecCaching(unittest.TestCase):
         safe_exec(code, g, cache=DictCache(cache))
         self.assertEqual(g['a'], 17)
 
+    def test_cache_key_includes_python_lib(self):
+        # Results of code that can import from a course's python_lib.zip
+        # mustn't outlive a new upload of the zip.
+        key = cache_key("a = 1", {}, 17, ["python_lib.zip"], [("python_lib.zip", "first")])
+        self.assertEqual(key, cache_key("a = 1", {}, 17, ["python_lib.zip"], [("python_lib.zip", "first")]))
+        self.assertNotEqual(key, cache_key("a = 1", {}, 17, ["python_lib.zip"], [("python_lib.zip", "second")]))
+        self.assertNotEqual(key, cache_key("a = 1", {}, 17))
+        self.assertNotEqual(cache_key("a = 1", {}, 17), cache_key("a = 1", {}, 17, ["/some/path"]))
+
     def test_unicode_submission(self):
         # Check that using non-ASCII unicode does not raise an encoding error.
         # Try several non-ASCII unicode characters.
@@ -177,6 +187,46 @@ class TestSafeExecCaching(unittest.TestCase):
                 self.fail("Tried executing code with non-ASCII unicode: {0}".format(code))
 
 
+class TestSafeExecCache(unittest.TestCase):
+    """Test the two tier SafeExecCache."""
+
+    def setUp(self):
+        super(TestSafeExecCache, self).setUp()
+        SafeExecCache.local_cache.clear()
+        self.addCleanup(SafeExecCache.local_cache.clear)
+
+    def test_local_tier_filled_from_shared(self):
+        shared = {}
+        safe_exec("a = [17]", {}, cache=SafeExecCache(DictCache(shared)))
+        self.assertEqual(len(shared), 1)
+
+        # Results are found in the local tier even when the shared one loses them.
+        shared.clear()
+        g = {}
+        safe_exec("a = [17]", g, cache=SafeExecCache(DictCache(shared)))
+        self.assertEqual(g['a'], [17])
+        self.assertEqual(shared, {})
+
+    def test_cached_results_not_shared(self):
+        cache = SafeExecCache(DictCache({}))
+        g = {}
+        safe_exec("a = [17]", g, cache=cache)
+        g['a'].append(18)
+        g = {}
+        safe_exec("a = [17]", g, cache=cache)
+        self.assertEqual(g['a'], [17])
+
+    def test_counts_lookups(self):
+        cache = SafeExecCache(DictCache({}), stats_tags=['course_id:a/b/c'])
+        with patch('capa.safe_exec.safe_exec.dogstats_wrapper.increment') as mock_increment:
+            safe_exec("a = 17", {}, cache=cache)
+            safe_exec("a = 17", {}, cache=cache)
+        self.assertEqual(
+            [call[1]['tags'] for call in mock_increment.call_args_list],
+            [['course_id:a/b/c', 'result:miss'], ['course_id:a/b/c', 'result:local_hit']]
+        )
+
+
 class TestUpdateHash(unittest.TestCase):
     """Test the safe_exec.update_hash function to be sure it canonicalizes properly."""
 
@@ -0,0 +1,103 @@
+"""
+Tests of the cache of parsed problems and script contexts shared by LoncapaProblems.
+"""
+import textwrap
+import unittest
+
+from mock import patch
+
+from capa.problem_cache import PROBLEM_CACHE, LRUCache
+from capa.safe_exec import safe_exec, SafeExecCache
+from capa.tests import new_loncapa_problem, test_capa_system
+
+
+class LRUCacheTest(unittest.TestCase):
+    """
+    Tests of the LRU cache itself.
+    """
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        # touch 'a' so that 'b' is the least recently used entry
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+
+
+class LoncapaProblemCacheTest(unittest.TestCase):
+    """
+    Tests of how LoncapaProblems use the cache.
+    """
+    xml = textwrap.dedent("""
+        <problem>
+        <script type="loncapa/python">
+        answer = random.randint(0, 1000)
+        </script>
+        <stringresponse answer="$answer">
+            <textline size="10"/>
+        </stringresponse>
+        </problem>
+    """)
+
+    def setUp(self):
+        super(LoncapaProblemCacheTest, self).setUp()
+        PROBLEM_CACHE.clear()
+        self.addCleanup(PROBLEM_CACHE.clear)
+
+    def capa_system(self, anonymous_student_id='student'):
+        """
+        Return a test LoncapaSystem which caches the results of code, as in the LMS.
+        """
+        capa_system = test_capa_system()
+        capa_system.anonymous_student_id = anonymous_student_id
+        capa_system.cache = SafeExecCache(None)
+        return capa_system
+
+    def test_problems_have_separate_trees(self):
+        first = new_loncapa_problem(self.xml)
+        second = new_loncapa_problem(self.xml)
+        self.assertIsNot(first.tree, second.tree)
+        self.assertEqual(first.get_html(), second.get_html())
+
+    def test_context_cached_by_seed(self):
+        with patch('capa.capa_problem.safe_exec', wraps=safe_exec) as mock_exec:
+            first = new_loncapa_problem(self.xml, capa_system=self.capa_system(), seed=1)
+            second = new_loncapa_problem(self.xml, capa_system=self.capa_system(), seed=1)
+            self.assertEqual(mock_exec.call_count, 1)
+            self.assertEqual(first.context['answer'], second.context['answer'])
+            new_loncapa_problem(self.xml, capa_system=self.capa_system(), seed=2)
+            self.assertEqual(mock_exec.call_count, 2)
+
+    def test_context_not_cached_without_cache(self):
+        with patch('capa.capa_problem.safe_exec', wraps=safe_exec) as mock_exec:
+            new_loncapa_problem(self.xml, seed=1)
+            new_loncapa_problem(self.xml, seed=1)
+            self.assertEqual(mock_exec.call_count, 2)
+
+    def test_context_cached_by_unsafe_execution(self):
+        unsafe_system = self.capa_system()
+        unsafe_system.can_execute_unsafe_code = lambda: True
+        with patch('capa.capa_problem.safe_exec', wraps=safe_exec) as mock_exec:
+            new_loncapa_problem(self.xml, capa_system=self.capa_system(), seed=1)
+            new_loncapa_problem(self.xml, capa_system=unsafe_system, seed=1)
+            self.assertEqual(mock_exec.call_count, 2)
+
+    def test_context_shared_between_students(self):
+        with patch('capa.capa_problem.safe_exec', wraps=safe_exec) as mock_exec:
+            new_loncapa_problem(self.xml, capa_system=self.capa_system(), seed=1)
+            problem = new_loncapa_problem(self.xml, capa_system=self.capa_system('other student'), seed=1)
+            self.assertEqual(mock_exec.call_count, 1)
+        self.assertEqual(problem.context['anonymous_student_id'], 'other student')
+
+    def test_context_per_student_when_used(self):
+        xml = self.xml.replace('random.randint(0, 1000)', 'anonymous_student_id')
+        with patch('capa.capa_problem.safe_exec', wraps=safe_exec) as mock_exec:
+            self.assertEqual(
+                new_loncapa_problem(xml, capa_system=self.capa_system(), seed=1).context['answer'], 'student'
+            )
+            problem = new_loncapa_problem(xml, capa_system=self.capa_system('other student'), seed=1)
+            self.assertEqual(mock_exec.call_count, 2)
+        self.assertEqual(problem.context['answer'], 'other student')
@@ -18,11 +18,13 @@ except ImportError:
     dog_stats_api = None
 
 from capa.capa_problem import LoncapaProblem, LoncapaSystem
+from capa.safe_exec import SafeExecCache
 from capa.responsetypes import StudentInputError, \
     ResponseError, LoncapaProblemError
 from capa.util import convert_files_to_filenames
 from .progress import Progress
 from xmodule.exceptions import NotFoundError
+from xmodule.x_module import DoNothingCache
 from xblock.fields import Scope, String, Boolean, Dict, Integer, Float
 from .fields import Timedelta, Date
 from django.utils.timezone import UTC
@@ -289,6 +291,16 @@ class CapaMixin(CapaFields):
             # number of possibilities, cap the number of different random seeds.
             self.seed %= MAX_RANDOMIZATION_BINS
 
+    def _safe_exec_cache(self):
+        """
+        Return the cache for the results of this problem's code: a SafeExecCache
+        in front of the runtime's cache, if it has a real one (Studio previews
+        and test systems don't cache results).
+        """
+        if isinstance(self.runtime.cache, DoNothingCache):
+            return self.runtime.cache
+        return SafeExecCache(self.runtime.cache, stats_tags=[u'course_id:{}'.format(self.location.course_key)])
+
     def new_lcp(self, state, text=None):
         """
         Generate a new Loncapa Problem
@@ -299,7 +311,7 @@ class CapaMixin(CapaFields):
         capa_system = LoncapaSystem(
             ajax_url=self.runtime.ajax_url,
             anonymous_student_id=self.runtime.anonymous_student_id,
-            cache=self.runtime.cache,
+            cache=self._safe_exec_cache(),
             can_execute_unsafe_code=self.runtime.can_execute_unsafe_code,
             get_python_lib_zip=self.runtime.get_python_lib_zip,
             DEBUG=self.runtime.DEBUG,
@@ -3,6 +3,14 @@ from importlib import import_module
 
 from django.conf import settings
 
+# We may not always have the cache_toolbox djangoapp available
+# (e.g. when running xmodule's unit tests), in which case cached
+# content is not invalidated by the contentstore.
+try:
+    from cache_toolbox.core import del_cached_content
+except ImportError:
+    del_cached_content = None
+
 _CONTENTSTORE = {}
 
 
@@ -25,6 +33,8 @@ def contentstore(name='default'):
         if 'ADDITIONAL_OPTIONS' in settings.CONTENTSTORE:
             if name in settings.CONTENTSTORE['ADDITIONAL_OPTIONS']:
                 options.update(settings.CONTENTSTORE['ADDITIONAL_OPTIONS'][name])
+        if del_cached_content is not None:
+            options['content_changed'] = del_cached_content
         _CONTENTSTORE[name] = class_(**options)
 
     return _CONTENTSTORE[name]
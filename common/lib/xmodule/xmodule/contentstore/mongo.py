@@ -12,19 +12,25 @@ from fs.osfs import OSFS
 import os
 import json
 from bson.son import SON
+from opaque_keys import InvalidKeyError
 from opaque_keys.edx.keys import AssetKey
+from opaque_keys.edx.locations import AssetLocation
 from xmodule.modulestore.django import ASSET_IGNORE_REGEX
 
 
 class MongoContentStore(ContentStore):
 
     # pylint: disable=unused-argument
-    def __init__(self, host, db, port=27017, user=None, password=None, bucket='fs', collection=None, **kwargs):
+    def __init__(self, host, db, port=27017, user=None, password=None, bucket='fs', collection=None,
+                 content_changed=None, **kwargs):
         """
         Establish the connection with the mongo backend and connect to the collections
 
         :param collection: ignores but provided for consistency w/ other doc_store_config patterns
+        :param content_changed: optional function which is called with the location of each asset
+            that is saved, deleted or has its attributes changed, so that caches of it can be invalidated
         """
+        self.content_changed = content_changed
         logging.debug('Using MongoDB for static content serving at host={0} port={1} db={2}'.format(host, port, db))
         _db = pymongo.database.Database(
             pymongo.MongoClient(
@@ -78,13 +84,41 @@ class MongoContentStore(ContentStore):
             else:
                 fp.write(content.data)
 
+        self._content_changed(content.location)
         return content
 
     def delete(self, location_or_id):
+        location = location_or_id
         if isinstance(location_or_id, AssetKey):
             location_or_id, _ = self.asset_db_key(location_or_id)
+        else:
+            location = self._location_from_id(location_or_id)
         # Deletes of non-existent files are considered successful
         self.fs.delete(location_or_id)
+        if location is not None:
+            self._content_changed(location)
+
+    def _content_changed(self, location):
+        """
+        Notify the `content_changed` callback, if any, that the asset at `location` has changed.
+        """
+        if self.content_changed is not None:
+            self.content_changed(location)
+
+    @staticmethod
+    def _location_from_id(content_id):
+        """
+        Return the asset key for the database _id `content_id`, or None if it can't be determined.
+        """
+        try:
+            if isinstance(content_id, basestring):
+                return AssetKey.from_string(content_id)
+            return AssetLocation(
+                content_id['org'], content_id['course'], content_id.get('run'),
+                content_id['category'], content_id['name'], content_id.get('revision')
+            )
+        except (InvalidKeyError, KeyError, TypeError):
+            return None
 
     def find(self, location, throw_on_not_found=True, as_stream=False):
         content_id, __ = self.asset_db_key(location)
@@ -278,6 +312,7 @@ class MongoContentStore(ContentStore):
         result = self.fs_files.update({'_id': asset_db_key}, {"$set": attr_dict}, upsert=False)
         if not result.get('updatedExisting', True):
             raise NotFoundError(asset_db_key)
+        self._content_changed(location)
 
     def get_attrs(self, location):
         """
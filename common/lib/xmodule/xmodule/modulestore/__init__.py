@@ -305,7 +305,15 @@ class BulkOperationsMixin(object):
 class EditInfo(object):
     """
     Encapsulates the editing info of a block.
+
+    Every block of every cached split structure has one of these, so they use __slots__
+    to keep them small.
     """
+    __slots__ = (
+        'previous_version', 'update_version', 'source_version', 'edited_on', 'edited_by',
+        'original_usage', 'original_usage_version', '_subtree_edited_on', '_subtree_edited_by',
+    )
+
     def __init__(self, **kwargs):
         self.from_storable(kwargs)
 
@@ -368,13 +376,26 @@ class EditInfo(object):
             source_version="UNSET" if self.source_version is None else self.source_version,
         )  # pylint: disable=bad-continuation
 
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        # Also restores EditInfos pickled before they had __slots__, whose state was their __dict__.
+        for name, value in state.iteritems():
+            setattr(self, name, value)
+
 
 class BlockData(object):
     """
     Wrap the block data in an object instead of using a straight Python dictionary.
     Allows the storing of meta-information about a structure that doesn't persist along with
     the structure itself.
+
+    Every block of every cached split structure has one of these, so they use __slots__
+    to keep them small.
     """
+    __slots__ = ('fields', 'block_type', 'definition', 'defaults', 'edit_info', 'definition_loaded')
+
     def __init__(self, **kwargs):
         # Has the definition been loaded?
         self.definition_loaded = False
@@ -425,6 +446,14 @@ class BlockData(object):
             classname=self.__class__.__name__,
         )  # pylint: disable=bad-continuation
 
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        # Also restores BlockDatas pickled before they had __slots__, whose state was their __dict__.
+        for name, value in state.iteritems():
+            setattr(self, name, value)
+
 
 new_contract('BlockData', BlockData)
 
@@ -790,8 +819,8 @@ class ModuleStoreRead(ModuleStoreAssetBase):
             # If an XBlock is passed-in, just match its fields.
             xblock, fields = (block, block.fields)
         elif isinstance(block, BlockData):
-            # BlockData is an object - compare its attributes in dict form.
-            xblock, fields = (None, block.__dict__)
+            # BlockData is an object - compare the attributes being qualified on in dict form.
+            xblock, fields = (None, {name: getattr(block, name) for name in qualifiers if name in block.__slots__})
         else:
             xblock, fields = (None, block)
 
@@ -15,8 +15,8 @@ structure:
 import pymongo
 import sys
 import logging
-import copy
 import re
+import time
 from uuid import uuid4
 
 from bson.son import SON
@@ -51,6 +51,12 @@ from xmodule.modulestore.inheritance import InheritanceMixin, inherit_metadata,
 from xmodule.modulestore.xml import CourseLocationManager
 from xmodule.services import SettingsService
 
+try:
+    from django.conf import settings
+    DJANGO_AVAILABLE = True
+except ImportError:
+    DJANGO_AVAILABLE = False
+
 log = logging.getLogger(__name__)
 
 new_contract('CourseKey', CourseKey)
@@ -77,6 +83,11 @@ _OSFS_INSTANCE = {}
 
 _DETACHED_CATEGORIES = [name for name, __ in XBlock.load_tagged_classes("detached")]
 
+# A cached metadata inheritance tree is recomputed from the course, rather than updated in place,
+# once it was last computed this many seconds ago. This bounds how long an update lost to a
+# concurrent edit can go unnoticed.
+INHERITANCE_TREE_MAX_AGE = 10 * 60
+
 
 class MongoRevisionKey(object):
     """
@@ -95,6 +106,61 @@ class InvalidWriteError(Exception):
     pass
 
 
+def _intern_value(value, interned):
+    """
+    Returns a value equal to `value` from `interned` if there is one, or adds `value` to it, so that
+    repeated values in the metadata inheritance tree are shared (and only pickled once).
+    """
+    try:
+        return interned.setdefault((type(value), value), value)
+    except TypeError:
+        # unhashable values (lists, dicts) aren't shared
+        return value
+
+
+def _inheritance_parent_url(entry):
+    """
+    Returns the url of the parent recorded in a metadata inheritance tree entry, if any.
+    """
+    parents = entry.get('parent')
+    if parents:
+        return next(parents.itervalues())
+    return None
+
+
+def inherited_metadata(metadata_tree, location_url):
+    """
+    Returns the inheritable field values that the block at `location_url` inherits from its ancestors,
+    as recorded in a tree computed by `MongoModuleStore._compute_metadata_inheritance_tree`.
+
+    The tree only records the inheritable fields which are explicitly set on each container, so the
+    inherited values are merged together from the block's parent up to the root of the course.
+    """
+    ancestors = []
+    visited = set([location_url])
+    parent_url = _inheritance_parent_url(metadata_tree.get(location_url, {}))
+    while parent_url and parent_url not in visited:
+        visited.add(parent_url)
+        entry = metadata_tree.get(parent_url)
+        if entry is None:
+            break
+        ancestors.append(entry)
+        parent_url = _inheritance_parent_url(entry)
+
+    metadata = {}
+    for entry in reversed(ancestors):
+        metadata.update(entry)
+    metadata.pop('parent', None)
+    return metadata
+
+
+def _inheritance_stamp_key(course_id):
+    """
+    Return the key of the stamp written along with the cached metadata inheritance tree of `course_id`.
+    """
+    return u'{}.inheritance_stamp'.format(course_id)
+
+
 class MongoKeyValueStore(InheritanceKeyValueStore):
     """
     A KeyValueStore that maps keyed data access to one of the 3 data areas
@@ -283,7 +349,7 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
 
                     # Convert the serialized fields values in self.cached_metadata
                     # to python values
-                    metadata_to_inherit = self.cached_metadata.get(unicode(non_draft_loc), {})
+                    metadata_to_inherit = inherited_metadata(self.cached_metadata, unicode(non_draft_loc))
                     inherit_metadata(module, metadata_to_inherit)
 
                 module._edit_info = json_data.get('edit_info')
@@ -587,6 +653,12 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         self._course_run_cache = {}
         self.signal_handler = signal_handler
 
+        # Whether edits update the cached metadata inheritance tree in place, rather than recomputing it
+        self.incremental_inheritance_updates = (
+            DJANGO_AVAILABLE and settings.configured and
+            getattr(settings, 'INCREMENTAL_METADATA_INHERITANCE_UPDATES', False)
+        )
+
     def close_connections(self):
         """
         Closes any open connections to the underlying database
@@ -709,39 +781,85 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             if location.category == 'course':
                 root = location_url
 
-        # now traverse the tree and compute down the inherited metadata
+        # now traverse the tree, recording the inheritable metadata explicitly set on each container, and
+        # the parent of each block. The values each block inherits are merged together from its ancestors
+        # when it is loaded (see `inherited_metadata`), which keeps the cached tree small.
         metadata_to_inherit = {}
+        interned = {}
+        branch = self.get_branch_setting()
+
+        def _own_metadata(url):
+            """
+            Helper method returning the inheritable metadata set on a container
+            """
+            return {
+                field_name: _intern_value(value, interned)
+                for field_name, value in results_by_url[url].get('metadata', {}).iteritems()
+            }
 
         def _compute_inherited_metadata(url):
             """
             Helper method for computing inherited metadata for a specific location url
             """
-            my_metadata = results_by_url[url].get('metadata', {})
-
             # go through all the children and recurse, but only if we have
             # in the result set. Remember results will not contain leaf nodes
             for child in results_by_url[url].get('definition', {}).get('children', []):
                 if child in results_by_url:
-                    new_child_metadata = copy.deepcopy(my_metadata)
-                    new_child_metadata.update(results_by_url[child].get('metadata', {}))
-                    results_by_url[child]['metadata'] = new_child_metadata
-                    metadata_to_inherit[child] = new_child_metadata
+                    metadata_to_inherit[child] = _own_metadata(child)
                     _compute_inherited_metadata(child)
                 else:
-                    # this is likely a leaf node, so let's record what metadata we need to inherit
-                    metadata_to_inherit[child] = my_metadata.copy()
+                    # this is likely a leaf node, which has nothing to pass on to descendants
+                    metadata_to_inherit.setdefault(child, {})
                 # WARNING: 'parent' is not part of inherited metadata, but
                 # we're piggybacking on this recursive traversal to grab
                 # and cache the child's parent, as a performance optimization.
                 # The 'parent' key will be popped out of the dictionary during
                 # CachingDescriptorSystem.load_item
-                metadata_to_inherit[child].setdefault('parent', {})[self.get_branch_setting()] = url
+                metadata_to_inherit[child].setdefault('parent', {})[branch] = url
 
         if root is not None:
+            metadata_to_inherit[root] = _own_metadata(root)
             _compute_inherited_metadata(root)
 
         return metadata_to_inherit
 
+    def _update_metadata_inheritance_tree(self, tree, xblock):
+        """
+        Updates the metadata inheritance `tree` in place for a change to `xblock`, without querying the
+        rest of the course. Returns False if the change can't be applied this way, and the tree has to
+        be recomputed: when children were removed from `xblock`, or a container which isn't in the tree
+        yet (and so may bring along descendants of its own) was added to it.
+        """
+        if not xblock.has_children:
+            # the tree only records the metadata of containers, and leaves don't change its shape
+            return True
+
+        branch = self.get_branch_setting()
+        location_url = unicode(as_published(xblock.location))
+        children = {unicode(child): child for child in xblock.children}
+
+        previous_children = set(
+            url for url, entry in tree.iteritems() if entry.get('parent', {}).get(branch) == location_url
+        )
+        if previous_children - set(children):
+            return False
+        for url, child in children.iteritems():
+            if url not in tree and child.category in BLOCK_TYPES_WITH_CHILDREN:
+                return False
+
+        entry = {
+            field_name: value
+            for field_name, value in self._serialize_scope(xblock, Scope.settings).iteritems()
+            if field_name in InheritanceMixin.fields
+        }
+        if 'parent' in tree.get(location_url, {}):
+            entry['parent'] = tree[location_url]['parent']
+        tree[location_url] = entry
+
+        for url in children:
+            tree.setdefault(url, {}).setdefault('parent', {})[branch] = location_url
+        return True
+
     def _get_cached_metadata_inheritance_tree(self, course_id, force_refresh=False):
         '''
         Compute the metadata inheritance for the course.
@@ -770,10 +888,21 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             # now write out computed tree to caching subsystem (e.g. memcached), if available
             if self.metadata_inheritance_cache_subsystem is not None:
                 self.metadata_inheritance_cache_subsystem.set(unicode(course_id), tree)
+                self.metadata_inheritance_cache_subsystem.set(
+                    _inheritance_stamp_key(course_id), {'id': uuid4().hex, 'computed_at': time.time()}
+                )
 
         # now populate a request_cache, if available. NOTE, we are outside of the
         # scope of the above if: statement so that after a memcache hit, it'll get
         # put into the request_cache
+        self._request_cache_metadata_inheritance_tree(course_id, tree)
+        return tree
+
+    def _request_cache_metadata_inheritance_tree(self, course_id, tree):
+        """
+        Keep the metadata inheritance `tree` of `course_id` for the rest of the request, if there is
+        a request cache.
+        """
         if self.request_cache is not None:
             # we can't assume the 'metadatat_inheritance' part of the request cache dict has been
             # defined
@@ -781,20 +910,59 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                 self.request_cache.data['metadata_inheritance'] = {}
             self.request_cache.data['metadata_inheritance'][unicode(course_id)] = tree
 
+    def _update_cached_metadata_inheritance_tree(self, course_id, xblock):
+        """
+        Updates the cached metadata inheritance tree of `course_id` in place for a change to `xblock`,
+        and returns it. Returns None if the tree has to be recomputed instead: if the change can't be
+        applied in place (see `_update_metadata_inheritance_tree`), if the cached tree is older than
+        INHERITANCE_TREE_MAX_AGE, or if another process wrote the tree while it was being updated.
+
+        Each write of the tree to the caching subsystem comes with a new stamp, which is checked
+        before the updated tree is written back, so that concurrent updates aren't silently lost.
+        """
+        course_id = self.fill_in_run(course_id)
+        cache = self.metadata_inheritance_cache_subsystem
+        if not xblock.has_children or cache is None:
+            tree = self._get_cached_metadata_inheritance_tree(course_id)
+            return tree if self._update_metadata_inheritance_tree(tree, xblock) else None
+
+        stamp_key = _inheritance_stamp_key(course_id)
+        stamp = cache.get(stamp_key)
+        if stamp is None or time.time() - stamp['computed_at'] > INHERITANCE_TREE_MAX_AGE:
+            return None
+        tree = cache.get(unicode(course_id))
+        if not tree or not self._update_metadata_inheritance_tree(tree, xblock):
+            return None
+        if cache.get(stamp_key) != stamp:
+            return None
+
+        cache.set(unicode(course_id), tree)
+        cache.set(stamp_key, dict(stamp, id=uuid4().hex))
+        self._request_cache_metadata_inheritance_tree(course_id, tree)
         return tree
 
-    def refresh_cached_metadata_inheritance_tree(self, course_id, runtime=None):
+    def refresh_cached_metadata_inheritance_tree(self, course_id, runtime=None, updated_xblock=None):
         """
         Refresh the cached metadata inheritance tree for the org/course combination
         for location
 
         If given a runtime, it replaces the cached_metadata in that runtime. NOTE: failure to provide
         a runtime may mean that some objects report old values for inherited data.
+
+        If given the `updated_xblock` whose change is being refreshed, and incremental updates are
+        enabled by the INCREMENTAL_METADATA_INHERITANCE_UPDATES setting, the cached tree is updated
+        in place for that change rather than recomputed from the whole course, where possible (see
+        `_update_cached_metadata_inheritance_tree`).
         """
         course_id = course_id.for_branch(None)
         if not self._is_in_bulk_operation(course_id):
-            # below is done for side effects when runtime is None
-            cached_metadata = self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
+            cached_metadata = None
+            if updated_xblock is not None and self.incremental_inheritance_updates:
+                cached_metadata = self._update_cached_metadata_inheritance_tree(course_id, updated_xblock)
+
+            if cached_metadata is None:
+                # below is done for side effects when runtime is None
+                cached_metadata = self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
             if runtime:
                 runtime.cached_metadata = cached_metadata
 
@@ -1442,7 +1610,9 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             xblock._edit_info = payload['edit_info']
 
             # recompute (and update) the metadata inheritance tree which is cached
-            self.refresh_cached_metadata_inheritance_tree(xblock.scope_ids.usage_id.course_key, xblock.runtime)
+            self.refresh_cached_metadata_inheritance_tree(
+                xblock.scope_ids.usage_id.course_key, xblock.runtime, updated_xblock=xblock
+            )
             # fire signal that we've written to DB
         except ItemNotFoundError:
             if not allow_not_found:
@@ -76,6 +76,8 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         self.module_data = module_data
         self.default_class = default_class
         self.local_modules = {}
+        # definitions fetched by prefetch_definitions, by id, until their blocks are loaded
+        self._prefetched_definitions = {}
         self._services['library_tools'] = LibraryToolsService(modulestore)
 
     @lazy
@@ -128,6 +130,42 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         self.modulestore.cache_block(course_key, version_guid, block_key, block)
         return block
 
+    def prefetch_definitions(self, usage_keys, leaves_only=False):
+        """
+        Fetch the definitions of the blocks at `usage_keys` with a single query, so that
+        using the content fields of those blocks once they're loaded doesn't need a query
+        for each of them. Blocks which are already loaded, or whose definitions are, are
+        skipped.
+
+        If `leaves_only`, only the definitions of blocks without children are fetched: those
+        are the blocks whose content is usually used, e.g. when the children of a vertical
+        are rendered.
+        """
+        blocks = self.course_entry.structure['blocks']
+        version_guid = self.course_entry.course_key.version_guid
+        course_key = None
+        definition_ids = set()
+        for usage_key in usage_keys:
+            if not isinstance(usage_key, BlockUsageLocator) or isinstance(usage_key.block_id, LocalId):
+                continue
+            block_key = BlockKey.from_usage_key(usage_key)
+            block_data = blocks.get(block_key)
+            if block_data is None or block_data.definition is None or block_data.definition_loaded:
+                continue
+            if leaves_only and block_data.fields.get('children'):
+                continue
+            if block_data.definition in self._prefetched_definitions:
+                continue
+            if self.modulestore.get_cached_block(usage_key.course_key, version_guid, block_key):
+                continue
+            course_key = usage_key.course_key
+            definition_ids.add(block_data.definition)
+
+        # A single definition is no cheaper to fetch now than when it's used.
+        if len(definition_ids) > 1:
+            for definition in self.modulestore.get_definitions(course_key, definition_ids):
+                self._prefetched_definitions[definition['_id']] = definition
+
     @contract(block_key=BlockKey, course_key="CourseLocator | LibraryLocator")
     def get_module_data(self, block_key, course_key):
         """
@@ -185,6 +223,7 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
                 block_key.type,
                 definition_id,
                 convert_fields,
+                definition=self._prefetched_definitions.pop(definition_id, None),
             )
         else:
             definition_loader = None
@@ -2,6 +2,10 @@
 Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
 """
 import re
+import threading
+import zlib
+import cPickle as pickle
+from collections import OrderedDict
 from mongodb_proxy import autoretry_read, MongoProxy
 import pymongo
 
@@ -15,9 +19,167 @@ from xmodule.modulestore.split_mongo import BlockKey
 import datetime
 import pytz
 
+try:
+    from django.conf import settings
+    from django.core.cache import get_cache, InvalidCacheBackendError
+    DJANGO_AVAILABLE = True
+except ImportError:
+    DJANGO_AVAILABLE = False
+
 
 new_contract('BlockData', BlockData)
 
+# Name of the django cache (if configured) used as the shared tier of the structure cache
+STRUCTURE_CACHE_NAME = 'course_structure_cache'
+
+
+class LocalStructureCache(object):
+    """
+    A thread-safe, in-process LRU cache of serialized structures, bounded by the
+    total number of bytes it holds. A ``max_bytes`` of 0 disables it.
+    """
+    def __init__(self, max_bytes=0):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Return the cached value for ``key`` (marking it most recently used), or None.
+        """
+        with self._lock:
+            value = self._entries.pop(key, None)
+            if value is not None:
+                self._entries[key] = value
+            return value
+
+    def set(self, key, value):
+        """
+        Cache ``value`` under ``key``, evicting least recently used entries to stay under ``max_bytes``.
+        """
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old_value = self._entries.pop(key, None)
+            if old_value is not None:
+                self.size -= len(old_value)
+            while self._entries and self.size + len(value) > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+            self._entries[key] = value
+            self.size += len(value)
+
+    def clear(self):
+        """
+        Empty the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+class CourseStructureCache(object):
+    """
+    Two tier cache of converted structures keyed by structure id: an in-process
+    LRU in front of an (optional) django cache such as memcached.
+
+    Structures are immutable once written, so entries never need invalidation. They
+    are stored as compressed pickles so that every caller gets its own copy which it
+    may mutate freely, just as if it had been read from mongo.
+    """
+    def __init__(self, local_cache=None, shared_cache=None):
+        self.local_cache = local_cache
+        self.shared_cache = shared_cache
+
+    @classmethod
+    def from_settings(cls):
+        """
+        Build the cache from the django settings: ``COURSE_STRUCTURE_LOCAL_CACHE_MAX_BYTES``
+        sizes the in-process tier and the ``course_structure_cache`` entry in CACHES (if any)
+        is the shared tier. Without configured django settings, no caching is done.
+        """
+        local_cache = shared_cache = None
+        if DJANGO_AVAILABLE and settings.configured:
+            max_bytes = getattr(settings, 'COURSE_STRUCTURE_LOCAL_CACHE_MAX_BYTES', 0)
+            if max_bytes:
+                local_cache = LocalStructureCache(max_bytes)
+            try:
+                shared_cache = get_cache(STRUCTURE_CACHE_NAME)
+            except InvalidCacheBackendError:
+                shared_cache = None
+        return cls(local_cache, shared_cache)
+
+    @staticmethod
+    def _cache_key(structure_id):
+        """
+        Key the cache by the string form of the structure's ObjectId.
+        """
+        return 'split_structure.{}'.format(structure_id)
+
+    def get(self, structure_id):
+        """
+        Return a private copy of the cached structure, or None on a miss.
+        """
+        key = self._cache_key(structure_id)
+        data = None
+        if self.local_cache is not None:
+            data = self.local_cache.get(key)
+        if data is None and self.shared_cache is not None:
+            data = self.shared_cache.get(key)
+            if data is not None and self.local_cache is not None:
+                self.local_cache.set(key, data)
+        if data is None:
+            return None
+        return pickle.loads(zlib.decompress(data))
+
+    def set(self, structure_id, structure):
+        """
+        Serialize ``structure`` into every configured tier.
+        """
+        if self.local_cache is None and self.shared_cache is None:
+            return
+        key = self._cache_key(structure_id)
+        # level 1 is the fastest compression and still shrinks structures several fold
+        data = zlib.compress(pickle.dumps(structure, pickle.HIGHEST_PROTOCOL), 1)
+        if self.local_cache is not None:
+            self.local_cache.set(key, data)
+        if self.shared_cache is not None:
+            self.shared_cache.set(key, data)
+
+
+_STRUCTURE_CACHE = None
+
+
+def structure_cache():
+    """
+    Return the process wide CourseStructureCache, creating it on first use.
+    """
+    global _STRUCTURE_CACHE  # pylint: disable=global-statement
+    if _STRUCTURE_CACHE is None:
+        _STRUCTURE_CACHE = CourseStructureCache.from_settings()
+    return _STRUCTURE_CACHE
+
+
+# The block types and field names seen in structures, so that every structure can share one copy
+# of each of them rather than each of its blocks holding its own (see structure_from_mongo).
+_INTERNED_NAMES = {}
+
+
+def _intern_name(name):
+    """
+    Return the shared copy of the block type or field name `name`. (The `intern` builtin
+    doesn't accept the unicode strings that pymongo returns.)
+    """
+    return _INTERNED_NAMES.setdefault(name, name)
+
+
+def _block_key_from_mongo(block_type, block_id):
+    """
+    Return the BlockKey for a [block_type, block_id] pair read from mongo.
+    """
+    return BlockKey(_intern_name(block_type), block_id)
+
 
 def structure_from_mongo(structure):
     """
@@ -26,6 +188,9 @@ def structure_from_mongo(structure):
     Converts 'root' from [block_type, block_id] to BlockKey.
     Converts 'blocks.*.fields.children' from [[block_type, block_id]] to [BlockKey].
     N.B. Does not convert any other ReferenceFields (because we don't know which fields they are at this level).
+
+    Block types and field names are interned, since large courses repeat the same few of them
+    across thousands of blocks.
     """
     check('seq[2]', structure['root'])
     check('list(dict)', structure['blocks'])
@@ -33,12 +198,15 @@ def structure_from_mongo(structure):
         if 'children' in block['fields']:
             check('list(list[2])', block['fields']['children'])
 
-    structure['root'] = BlockKey(*structure['root'])
+    structure['root'] = _block_key_from_mongo(*structure['root'])
     new_blocks = {}
     for block in structure['blocks']:
-        if 'children' in block['fields']:
-            block['fields']['children'] = [BlockKey(*child) for child in block['fields']['children']]
-        new_blocks[BlockKey(block['block_type'], block.pop('block_id'))] = BlockData(**block)
+        fields = {_intern_name(name): value for name, value in block['fields'].iteritems()}
+        if 'children' in fields:
+            fields['children'] = [_block_key_from_mongo(*child) for child in fields['children']]
+        block['fields'] = fields
+        block['block_type'] = _intern_name(block['block_type'])
+        new_blocks[_block_key_from_mongo(block['block_type'], block.pop('block_id'))] = BlockData(**block)
     structure['blocks'] = new_blocks
 
     return structure
@@ -76,11 +244,15 @@ class MongoConnection(object):
     """
     def __init__(
         self, db, collection, host, port=27017, tz_aware=True, user=None, password=None,
-        asset_collection=None, retry_wait_time=0.1, **kwargs
+        asset_collection=None, retry_wait_time=0.1, structure_cache=None, **kwargs
     ):
         """
         Create & open the connection, authenticate, and provide pointers to the collections
+
+        :param structure_cache: an object with CourseStructureCache's get/set interface. Defaults to
+            the process wide cache.
         """
+        self._structure_cache = structure_cache
         self.database = MongoProxy(
             pymongo.database.Database(
                 pymongo.MongoClient(
@@ -118,11 +290,24 @@ class MongoConnection(object):
         else:
             raise HeartbeatFailure("Can't connect to {}".format(self.database.name))
 
+    @property
+    def structure_cache(self):
+        """
+        The cache consulted before reading structures from mongo.
+        """
+        if self._structure_cache is None:
+            self._structure_cache = structure_cache()
+        return self._structure_cache
+
     def get_structure(self, key):
         """
         Get the structure from the persistence mechanism whose id is the given key
         """
-        return structure_from_mongo(self.structures.find_one({'_id': key}))
+        structure = self.structure_cache.get(key)
+        if structure is None:
+            structure = structure_from_mongo(self.structures.find_one({'_id': key}))
+            self.structure_cache.set(key, structure)
+        return structure
 
     @autoretry_read()
     def find_structures_by_id(self, ids):
@@ -132,7 +317,21 @@ class MongoConnection(object):
         Arguments:
             ids (list): A list of structure ids
         """
-        return [structure_from_mongo(structure) for structure in self.structures.find({'_id': {'$in': ids}})]
+        structures = []
+        missing_ids = []
+        for structure_id in ids:
+            structure = self.structure_cache.get(structure_id)
+            if structure is None:
+                missing_ids.append(structure_id)
+            else:
+                structures.append(structure)
+
+        if missing_ids:
+            for structure in self.structures.find({'_id': {'$in': missing_ids}}):
+                structure = structure_from_mongo(structure)
+                self.structure_cache.set(structure['_id'], structure)
+                structures.append(structure)
+        return structures
 
     @autoretry_read()
     def find_structures_derived_from(self, ids):
@@ -81,6 +81,7 @@ from ..exceptions import ItemNotFoundError
 from .caching_descriptor_system import CachingDescriptorSystem
 from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, DuplicateKeyError
 from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
+from xmodule.modulestore.split_mongo.structure_index import StructureIndexCache
 from xmodule.error_module import ErrorDescriptor
 from collections import defaultdict
 from types import NoneType
@@ -416,17 +417,21 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
         bulk_write_record = self._get_bulk_ops_record(course_key)
         if bulk_write_record.active:
             # Only query for the definitions that aren't already cached.
-            for definition in bulk_write_record.definitions.values():
-                definition_id = definition.get('_id')
-                if definition_id in ids:
+            for definition_id in list(ids):
+                definition = bulk_write_record.definitions.get(definition_id)
+                if definition is not None:
                     ids.remove(definition_id)
                     definitions.append(definition)
 
         if len(ids):
             # Query the db for the definitions.
             defs_from_db = self.db_connection.get_definitions(list(ids))
-            # Add the retrieved definitions to the cache.
-            bulk_write_record.definitions.update({d.get('_id'): d for d in defs_from_db})
+            if bulk_write_record.active:
+                # Add the retrieved definitions to the cache, noting that they needn't be
+                # written back at the end of the bulk operation.
+                for definition in defs_from_db:
+                    bulk_write_record.definitions[definition['_id']] = definition
+                    bulk_write_record.definitions_in_db.add(definition['_id'])
             definitions.extend(defs_from_db)
         return definitions
 
@@ -666,6 +671,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             self.services["user"] = user_service
 
         self.signal_handler = signal_handler
+        self.structure_indexes = StructureIndexCache()
 
     def close_connections(self):
         """
@@ -1068,35 +1074,46 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             return []
 
         course = self._lookup_course(course_locator)
-        items = []
+        blocks = course.structure['blocks']
+        index = self._get_structure_index(course)
         qualifiers = qualifiers.copy() if qualifiers else {}  # copy the qualifiers (destructively manipulated here)
 
-        def _block_matches_all(block_data):
+        def _blocks_matching_all(block_keys):
             """
-            Check that the block matches all the criteria
+            Return the keys of the blocks which match all the criteria
             """
             # do the checks which don't require loading any additional data
-            if (  # pylint: disable=bad-continuation
-                self._block_matches(block_data, qualifiers) and
-                self._block_matches(block_data.fields, settings)
-            ):
-                if content:
-                    definition_block = self.get_definition(course_locator, block_data.definition)
-                    return self._block_matches(definition_block['fields'], content)
-                else:
-                    return True
+            matches = [
+                block_key for block_key in block_keys
+                if self._block_matches(blocks[block_key], qualifiers) and
+                self._block_matches(blocks[block_key].fields, settings)
+            ]
+            if content and matches:
+                # then fetch the definitions of the remaining candidates all at once
+                definitions = {
+                    definition['_id']: definition
+                    for definition in self.get_definitions(
+                        course_locator, [blocks[block_key].definition for block_key in matches]
+                    )
+                }
+                matches = [
+                    block_key for block_key in matches
+                    if blocks[block_key].definition in definitions and
+                    self._block_matches(definitions[blocks[block_key].definition]['fields'], content)
+                ]
+            return matches
 
         if settings is None:
             settings = {}
         if 'name' in qualifiers:
             # odd case where we don't search just confirm
             block_name = qualifiers.pop('name')
-            block_ids = []
-            for block_id, block in course.structure['blocks'].iteritems():
-                if block_name == block_id.id and _block_matches_all(block):
-                    block_ids.append(block_id)
+            if index is not None:
+                candidates = index.blocks_with_id(block_name)
+            else:
+                candidates = [block_id for block_id in blocks if block_id.id == block_name]
 
-            return self._load_items(course, block_ids, **kwargs)
+            return self._load_items(course, _blocks_matching_all(candidates), **kwargs)
 
         if 'category' in qualifiers:
             qualifiers['block_type'] = qualifiers.pop('category')
@@ -1104,15 +1121,41 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         # don't expect caller to know that children are in fields
         if 'children' in qualifiers:
             settings['children'] = qualifiers.pop('children')
-        for block_id, value in course.structure['blocks'].iteritems():
-            if _block_matches_all(value):
-                items.append(block_id)
+
+        block_types = self._block_types_in_criteria(qualifiers.get('block_type'))
+        if index is not None and block_types is not None:
+            candidates = [block_key for block_type in block_types for block_key in index.blocks_of_type(block_type)]
+        else:
+            candidates = blocks.iterkeys()
+        items = _blocks_matching_all(candidates)
 
         if len(items) > 0:
             return self._load_items(course, items, depth=0, **kwargs)
         else:
             return []
 
+    @staticmethod
+    def _block_types_in_criteria(criteria):
+        """
+        Return the list of block types that a `block_type` criteria for get_items can match, or None if
+        it isn't limited to a known list of them (e.g. it's a regex or a function, or there is none).
+        """
+        if isinstance(criteria, basestring):
+            return [criteria]
+        if isinstance(criteria, dict) and criteria.keys() == ['$in']:
+            if all(isinstance(block_type, basestring) for block_type in criteria['$in']):
+                return list(criteria['$in'])
+        return None
+
+    def _get_structure_index(self, course_entry):
+        """
+        Return the StructureIndex of the course entry's structure, or None if the structure may still
+        be changed in place, because it's part of an active bulk operation.
+        """
+        if self._get_bulk_ops_record(course_entry.course_key).active:
+            return None
+        return self.structure_indexes.get(course_entry.structure)
+
     def get_parent_location(self, locator, **kwargs):
         """
         Return the location (Locators w/ block_ids) for the parent of this location in this
@@ -1126,7 +1169,11 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             raise ItemNotFoundError(locator)
 
         course = self._lookup_course(locator.course_key)
-        parent_ids = self._get_parents_from_structure(BlockKey.from_usage_key(locator), course.structure)
+        index = self._get_structure_index(course)
+        if index is not None:
+            parent_ids = list(index.parents_of(BlockKey.from_usage_key(locator)))
+        else:
+            parent_ids = self._get_parents_from_structure(BlockKey.from_usage_key(locator), course.structure)
         if len(parent_ids) == 0:
             return None
         # find alphabetically least
@@ -0,0 +1,72 @@
+"""
+Secondary indexes over the blocks of a split modulestore structure, so that finding blocks
+by type, by block id, or by parent doesn't have to scan every block in the structure.
+"""
+import threading
+from collections import OrderedDict, defaultdict
+
+from xmodule.modulestore.split_mongo import BlockKey
+
+
+class StructureIndex(object):
+    """
+    Indexes of the blocks in one structure, by block_type, by block_id, and by the blocks
+    listing them as children. Blocks are listed in the structure's iteration order.
+    """
+    def __init__(self, structure):
+        self.structure_id = structure['_id']
+        self._by_type = defaultdict(list)
+        self._by_id = defaultdict(list)
+        self._parents = defaultdict(list)
+        for block_key, block_data in structure['blocks'].iteritems():
+            self._by_type[block_key.type].append(block_key)
+            self._by_id[block_key.id].append(block_key)
+            for child in block_data.fields.get('children', []):
+                self._parents[BlockKey(*child)].append(block_key)
+
+    def blocks_of_type(self, block_type):
+        """
+        Return the keys of the blocks of the given block_type.
+        """
+        return self._by_type.get(block_type, [])
+
+    def blocks_with_id(self, block_id):
+        """
+        Return the keys of the blocks with the given block_id (of any block_type).
+        """
+        return self._by_id.get(block_id, [])
+
+    def parents_of(self, block_key):
+        """
+        Return the keys of the blocks which have the given block as a child.
+        """
+        return self._parents.get(block_key, [])
+
+
+class StructureIndexCache(object):
+    """
+    A thread-safe LRU cache of StructureIndexes keyed by structure id. Structures saved to the
+    db are immutable, so their indexes never need to be invalidated.
+    """
+    def __init__(self, max_entries=100):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, structure):
+        """
+        Return the index of ``structure``, building it if it isn't cached yet.
+        """
+        structure_id = structure['_id']
+        with self._lock:
+            index = self._entries.pop(structure_id, None)
+            if index is not None:
+                self._entries[structure_id] = index
+                return index
+
+        index = StructureIndex(structure)
+        with self._lock:
+            self._entries[structure_id] = index
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return index
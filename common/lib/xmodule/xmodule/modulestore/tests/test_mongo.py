@@ -39,7 +39,7 @@ from nose.tools import assert_in
 from xmodule.exceptions import NotFoundError
 from git.test.lib.asserts import assert_not_none
 from xmodule.x_module import XModuleMixin
-from xmodule.modulestore.mongo.base import as_draft
+from xmodule.modulestore.mongo.base import as_draft, inherited_metadata
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
 from xmodule.modulestore.tests.utils import LocationMixin
 from xmodule.modulestore.edit_info import EditInfoMixin
@@ -810,6 +810,94 @@ class TestMongoModuleStoreWithNoAssetCollection(TestMongoModuleStore):
         # Confirm that invalid course key raises ItemNotFoundError
         self.assertRaises(ItemNotFoundError, lambda: self.draft_store.get_all_asset_metadata(course_key, 'asset')[:1])
 
+    def test_incremental_inheritance_update(self):
+        course_key = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+        tree = self.draft_store._compute_metadata_inheritance_tree(course_key)
+        course = self.draft_store.get_course(course_key)
+        chapter_url = unicode(course.children[0])
+        expected = inherited_metadata(tree, chapter_url)
+
+        # updating a container without changing its metadata or children doesn't change the tree
+        self.assertTrue(self.draft_store._update_metadata_inheritance_tree(tree, course))
+        self.assertEqual(inherited_metadata(tree, chapter_url), expected)
+
+        # but a change to its inheritable metadata is passed on to its children
+        course.days_early_for_beta = 2.0
+        self.assertTrue(self.draft_store._update_metadata_inheritance_tree(tree, course))
+        expected['days_early_for_beta'] = 2.0
+        self.assertEqual(inherited_metadata(tree, chapter_url), expected)
+
+        # removing children requires the tree to be recomputed
+        course.children = course.children[1:]
+        self.assertFalse(self.draft_store._update_metadata_inheritance_tree(tree, course))
+
+    def test_incremental_inheritance_update_stamped(self):
+        course_key = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+        cache = DictCache()
+        self.draft_store.metadata_inheritance_cache_subsystem = cache
+        self.addCleanup(setattr, self.draft_store, 'metadata_inheritance_cache_subsystem', None)
+        self.draft_store._get_cached_metadata_inheritance_tree(course_key, force_refresh=True)
+        stamp_key = u'{}.inheritance_stamp'.format(course_key)
+        stamp = cache[stamp_key]
+
+        # an update writes the tree back with a new stamp
+        course = self.draft_store.get_course(course_key)
+        course.days_early_for_beta = 2.0
+        tree = self.draft_store._update_cached_metadata_inheritance_tree(course_key, course)
+        self.assertEqual(inherited_metadata(tree, unicode(course.children[0]))['days_early_for_beta'], 2.0)
+        self.assertEqual(cache[unicode(course_key)], tree)
+        self.assertNotEqual(cache[stamp_key]['id'], stamp['id'])
+
+        # a tree written by another process while it was being updated isn't overwritten
+        cache.on_get = lambda key: key == stamp_key and cache.set(stamp_key, dict(stamp, id='concurrent'))
+        self.assertIsNone(self.draft_store._update_cached_metadata_inheritance_tree(course_key, course))
+        self.assertEqual(cache[stamp_key]['id'], 'concurrent')
+        cache.on_get = None
+
+        # and old trees are recomputed rather than updated
+        cache.set(stamp_key, dict(stamp, computed_at=0))
+        self.assertIsNone(self.draft_store._update_cached_metadata_inheritance_tree(course_key, course))
+
+
+class DictCache(dict):
+    """
+    A cache over a dict, for testing. `on_get` is called with the key of each read, after it.
+    """
+    on_get = None
+
+    def get(self, key, default=None):
+        value = super(DictCache, self).get(key, default)
+        if self.on_get is not None:
+            self.on_get(key)
+        return value
+
+    def set(self, key, value):
+        self[key] = value
+
+
+class TestInheritedMetadata(unittest.TestCase):
+    """
+    Tests for resolving inherited metadata from the metadata inheritance tree.
+    """
+    def setUp(self):
+        super(TestInheritedMetadata, self).setUp()
+        draft = ModuleStoreEnum.Branch.draft_preferred
+        self.tree = {
+            'course': {'due': 'course due', 'graded': False},
+            'chapter': {'graded': True, 'parent': {draft: 'course'}},
+            'problem': {'parent': {draft: 'chapter'}},
+        }
+
+    def test_merges_ancestors(self):
+        self.assertEqual(inherited_metadata(self.tree, 'problem'), {'due': 'course due', 'graded': True})
+
+    def test_excludes_own_metadata(self):
+        self.assertEqual(inherited_metadata(self.tree, 'chapter'), {'due': 'course due', 'graded': False})
+        self.assertEqual(inherited_metadata(self.tree, 'course'), {})
+
+    def test_not_in_tree(self):
+        self.assertEqual(inherited_metadata(self.tree, 'orphan'), {})
+
 
 class TestMongoKeyValueStore(unittest.TestCase):
     """
@@ -10,6 +10,7 @@ import unittest
 import uuid
 
 from contracts import contract
+from mock import patch
 from nose.plugins.attrib import attr
 
 from openedx.core.lib import tempdir
@@ -1102,6 +1103,28 @@ class TestItemCrud(SplitModuleTest):
         self.assertIn(new_module.location.version_agnostic(), version_agnostic(parent.children))
         self.assertEqual(new_module.definition_locator.definition_id, original.definition_locator.definition_id)
 
+    def test_get_children_prefetches_definitions(self):
+        """
+        Test that get_children fetches the definitions of leaf children together, rather than
+        one at a time as their content is used
+        """
+        locator = BlockUsageLocator(
+            CourseLocator(org='testx', course='wonderful', run="run", branch=BRANCH_NAME_DRAFT), 'course', 'head23456'
+        )
+        vertical = modulestore().create_child(self.user_id, locator, 'vertical')
+        for index in range(3):
+            modulestore().create_child(
+                self.user_id, vertical.location.version_agnostic(), 'html', fields={'data': u'<p>{}</p>'.format(index)}
+            )
+
+        vertical = modulestore().get_item(vertical.location.version_agnostic())
+        db_connection = modulestore().db_connection
+        with patch.object(db_connection, 'get_definition', wraps=db_connection.get_definition) as mock_get_definition:
+            self.assertEqual(
+                [child.data for child in vertical.get_children()], [u'<p>0</p>', u'<p>1</p>', u'<p>2</p>']
+            )
+        self.assertEqual(mock_get_definition.call_count, 0)
+
     def test_unique_naming(self):
         """
         Check that 2 modules of same type get unique block_ids. Also check that if creation provides
@@ -423,6 +423,16 @@ class TestBulkWriteMixinFindMethods(TestBulkWriteMixin):
             else:
                 self.assertNotIn(db_definition(_id), results)
 
+    def test_get_definitions_not_written_back(self):
+        # Definitions read during a bulk operation are cached, but not inserted again at its end
+        self.bulk._begin_bulk_operation(self.course_key)
+        self.conn.get_definitions.return_value = [{'_id': 1}, {'_id': 2}]
+        self.bulk.get_definitions(self.course_key, [1, 2])
+        self.assertEquals(self.bulk.get_definition(self.course_key, 1), {'_id': 1})
+        self.bulk._end_bulk_operation(self.course_key)
+        self.assertFalse(self.conn.get_definition.called)
+        self.assertFalse(self.conn.insert_definition.called)
+
     def test_no_bulk_find_structures_derived_from(self):
         ids = [Mock(name='id')]
         self.conn.find_structures_derived_from.return_value = [MagicMock(name='result')]
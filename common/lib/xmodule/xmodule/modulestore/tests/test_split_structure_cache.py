@@ -0,0 +1,134 @@
+"""
+Tests of the split modulestore's immutable structure cache.
+"""
+import unittest
+from bson.objectid import ObjectId
+from mock import MagicMock
+
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.mongo_connection import (
+    CourseStructureCache, LocalStructureCache, MongoConnection, structure_from_mongo
+)
+
+
+class TestLocalStructureCache(unittest.TestCase):
+    """
+    Tests of the in-process LRU tier.
+    """
+    def test_miss(self):
+        self.assertIsNone(LocalStructureCache(100).get('missing'))
+
+    def test_evicts_least_recently_used(self):
+        cache = LocalStructureCache(10)
+        cache.set('a', 'aaaa')
+        cache.set('b', 'bbbb')
+        # touch 'a' so that 'b' is the least recently used entry
+        self.assertEqual(cache.get('a'), 'aaaa')
+        cache.set('c', 'cccc')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 'aaaa')
+        self.assertEqual(cache.get('c'), 'cccc')
+        self.assertEqual(cache.size, 8)
+
+    def test_oversized_values_not_cached(self):
+        cache = LocalStructureCache(3)
+        cache.set('a', 'aaaa')
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.size, 0)
+
+    def test_replace(self):
+        cache = LocalStructureCache(10)
+        cache.set('a', 'aaaa')
+        cache.set('a', 'aa')
+        self.assertEqual(cache.get('a'), 'aa')
+        self.assertEqual(cache.size, 2)
+
+
+class TestCourseStructureCache(unittest.TestCase):
+    """
+    Tests of the two tier structure cache.
+    """
+    def setUp(self):
+        super(TestCourseStructureCache, self).setUp()
+        self.shared = {}
+        self.shared_cache = MagicMock(get=self.shared.get, set=self.shared.__setitem__)
+        self.cache = CourseStructureCache(LocalStructureCache(1024 * 1024), self.shared_cache)
+        self.structure_id = ObjectId()
+        self.structure = {'_id': self.structure_id, 'blocks': {'a': {'fields': {}}}}
+
+    def test_roundtrip_returns_copies(self):
+        self.cache.set(self.structure_id, self.structure)
+        cached = self.cache.get(self.structure_id)
+        self.assertEqual(cached, self.structure)
+        cached['blocks']['a']['fields']['mutated'] = True
+        self.assertEqual(self.cache.get(self.structure_id), self.structure)
+
+    def test_local_tier_filled_from_shared(self):
+        CourseStructureCache(None, self.shared_cache).set(self.structure_id, self.structure)
+        self.assertIsNone(self.cache.local_cache.get(self.cache._cache_key(self.structure_id)))
+        self.assertEqual(self.cache.get(self.structure_id), self.structure)
+        self.assertIsNotNone(self.cache.local_cache.get(self.cache._cache_key(self.structure_id)))
+
+    def test_disabled(self):
+        cache = CourseStructureCache()
+        cache.set(self.structure_id, self.structure)
+        self.assertIsNone(cache.get(self.structure_id))
+
+    def test_connection_reads_through_cache(self):
+        connection = MagicMock(spec=MongoConnection)
+        connection.structure_cache = self.cache
+        connection.structures = MagicMock()
+        self.cache.set(self.structure_id, self.structure)
+        self.assertEqual(MongoConnection.get_structure(connection, self.structure_id), self.structure)
+        self.assertFalse(connection.structures.find_one.called)
+
+
+class TestStructureFromMongo(unittest.TestCase):
+    """
+    Tests of the in-memory form of structures read from mongo.
+    """
+    def _structure(self):
+        """
+        Return a structure as it is read from mongo, with fresh copies of its strings.
+        """
+        return {
+            '_id': ObjectId(),
+            'root': [u'course', u'course'],
+            'blocks': [
+                {
+                    'block_type': u''.join([u'cour', u'se']),
+                    'block_id': u'course',
+                    'fields': {u''.join([u'chil', u'dren']): [[u''.join([u'chap', u'ter']), u'intro']]},
+                    'edit_info': {'edited_by': 1},
+                },
+                {
+                    'block_type': u''.join([u'chap', u'ter']),
+                    'block_id': u'intro',
+                    'fields': {u''.join([u'display_', u'name']): u'Intro'},
+                    'edit_info': {'edited_by': 1},
+                },
+            ],
+        }
+
+    def test_names_shared_between_structures(self):
+        first = structure_from_mongo(self._structure())
+        second = structure_from_mongo(self._structure())
+        first_course = first['blocks'][BlockKey(u'course', u'course')]
+        second_course = second['blocks'][BlockKey(u'course', u'course')]
+        self.assertIs(first_course.block_type, second_course.block_type)
+        self.assertIs(first_course.fields['children'][0].type, second_course.fields['children'][0].type)
+        self.assertIs(
+            first['blocks'][BlockKey(u'chapter', u'intro')].fields.keys()[0],
+            second['blocks'][BlockKey(u'chapter', u'intro')].fields.keys()[0],
+        )
+
+    def test_cached_block_data(self):
+        cache = CourseStructureCache(LocalStructureCache(1024 * 1024))
+        structure = structure_from_mongo(self._structure())
+        cache.set(structure['_id'], structure)
+        block = cache.get(structure['_id'])['blocks'][BlockKey(u'chapter', u'intro')]
+        self.assertIsInstance(block, BlockData)
+        self.assertEqual(block.fields, {u'display_name': u'Intro'})
+        self.assertEqual(block.edit_info.edited_by, 1)
+        self.assertFalse(block.definition_loaded)
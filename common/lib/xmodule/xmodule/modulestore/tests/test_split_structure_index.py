@@ -0,0 +1,77 @@
+"""
+Tests of the split modulestore's per-structure block indexes.
+"""
+import unittest
+from bson.objectid import ObjectId
+
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.structure_index import StructureIndex, StructureIndexCache
+
+
+def make_structure(blocks):
+    """
+    Return a structure containing BlockData for the given {BlockKey: children} mapping.
+    """
+    return {
+        '_id': ObjectId(),
+        'blocks': {
+            block_key: BlockData(block_type=block_key.type, fields={'children': children})
+            for block_key, children in blocks.iteritems()
+        },
+    }
+
+
+class TestStructureIndex(unittest.TestCase):
+    """
+    Tests of the indexes built over a structure.
+    """
+    def setUp(self):
+        super(TestStructureIndex, self).setUp()
+        self.course = BlockKey('course', 'course')
+        self.chapter = BlockKey('chapter', 'chapter')
+        self.problem = BlockKey('problem', 'problem')
+        self.html = BlockKey('html', 'problem')
+        self.index = StructureIndex(make_structure({
+            self.course: [list(self.chapter)],
+            self.chapter: [list(self.problem), list(self.html)],
+            self.problem: [],
+            self.html: [],
+        }))
+
+    def test_blocks_of_type(self):
+        self.assertEqual(self.index.blocks_of_type('problem'), [self.problem])
+        self.assertEqual(self.index.blocks_of_type('video'), [])
+
+    def test_blocks_with_id(self):
+        self.assertItemsEqual(self.index.blocks_with_id('problem'), [self.problem, self.html])
+        self.assertEqual(self.index.blocks_with_id('missing'), [])
+
+    def test_parents_of(self):
+        self.assertEqual(self.index.parents_of(self.problem), [self.chapter])
+        self.assertEqual(self.index.parents_of(self.chapter), [self.course])
+        self.assertEqual(self.index.parents_of(self.course), [])
+
+
+class TestStructureIndexCache(unittest.TestCase):
+    """
+    Tests of the LRU cache of structure indexes.
+    """
+    def test_reuses_index(self):
+        cache = StructureIndexCache()
+        structure = make_structure({BlockKey('course', 'course'): []})
+        self.assertIs(cache.get(structure), cache.get(structure))
+
+    def test_evicts_least_recently_used(self):
+        cache = StructureIndexCache(max_entries=2)
+        structures = [make_structure({BlockKey('course', 'course'): []}) for __ in range(3)]
+        first_index = cache.get(structures[0])
+        cache.get(structures[1])
+        # touch the first structure so that the second is the least recently used
+        cache.get(structures[0])
+        cache.get(structures[2])
+        self.assertIs(cache.get(structures[0]), first_index)
+        self.assertItemsEqual(
+            cache._entries.keys(),  # pylint: disable=protected-access
+            [structures[0]['_id'], structures[2]['_id']]
+        )
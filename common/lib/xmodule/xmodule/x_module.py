@@ -435,10 +435,17 @@ class XModuleMixin(XModuleFields, XBlockMixin):
 
         if self._child_instances is None:
             self._child_instances = []  # pylint: disable=attribute-defined-outside-init
-            for child_loc in self.children:
+            child_locs = [
+                child_loc for child_loc in self.children
                 # Skip if it doesn't satisfy the filter function
-                if usage_key_filter and not usage_key_filter(child_loc):
-                    continue
+                if not usage_key_filter or usage_key_filter(child_loc)
+            ]
+            # Let runtimes which can (i.e. split's) fetch the content of all of the leaf children
+            # at once, rather than one child at a time as it is used.
+            prefetch_definitions = getattr(self.runtime, 'prefetch_definitions', None)
+            if prefetch_definitions is not None:
+                prefetch_definitions(child_locs, leaves_only=True)
+            for child_loc in child_locs:
                 try:
                     child = self.runtime.get_block(child_loc)
                     if child is None:
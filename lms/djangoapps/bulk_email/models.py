@@ -178,7 +178,7 @@ class CourseEmailTemplate(models.Model):
             raise
 
     @staticmethod
-    def _render(format_string, message_body, context):
+    def _render(format_string, message_body, context, wrapped_lines=None):
         """
         Create a text message using a template, message body and context.
 
@@ -193,6 +193,10 @@ class CourseEmailTemplate(models.Model):
         Output is returned as a unicode string.  It is not encoded as utf-8.
         Such encoding is left to the email code, which will use the value
         of settings.DEFAULT_CHARSET to encode the message.
+
+        `wrapped_lines` is an optional dict in which to cache the wrapping
+        of long lines, when rendering the same message for many recipients
+        (see `wrap_message`).
         """
 
         # Substitute all %%-encoded keywords in the message body
@@ -208,25 +212,25 @@ class CourseEmailTemplate(models.Model):
         result = result.replace(message_body_tag, message_body, 1)
 
         # finally, return the result, after wrapping long lines and without converting to an encoded byte array.
-        return wrap_message(result)
+        return wrap_message(result, wrapped_lines=wrapped_lines)
 
-    def render_plaintext(self, plaintext, context):
+    def render_plaintext(self, plaintext, context, wrapped_lines=None):
         """
         Create plain text message.
 
         Convert plain text body (`plaintext`) into plaintext email message using the
         stored plain template and the provided `context` dict.
         """
-        return CourseEmailTemplate._render(self.plain_template, plaintext, context)
+        return CourseEmailTemplate._render(self.plain_template, plaintext, context, wrapped_lines)
 
-    def render_htmltext(self, htmltext, context):
+    def render_htmltext(self, htmltext, context, wrapped_lines=None):
         """
         Create HTML text message.
 
         Convert HTML text body (`htmltext`) into HTML email message using the
         stored HTML template and the provided `context` dict.
         """
-        return CourseEmailTemplate._render(self.html_template, htmltext, context)
+        return CourseEmailTemplate._render(self.html_template, htmltext, context, wrapped_lines)
 
 
 class CourseAuthorization(models.Model):
@@ -6,9 +6,10 @@ to a course.
 import re
 import random
 import json
-from time import sleep
+from time import sleep, time
 from collections import Counter
 import logging
+from multiprocessing.pool import ThreadPool
 
 import dogstats_wrapper as dog_stats_api
 from smtplib import SMTPServerDisconnected, SMTPDataError, SMTPConnectError, SMTPException
@@ -373,16 +374,17 @@ def _filter_optouts_from_recipients(to_list, course_id):
     Returns the filtered recipient list, as well as the number of optouts
     removed from the list.
     """
+    # Match opt-outs by user id, so that the query doesn't need to join the user table.
     optouts = Optout.objects.filter(
         course_id=course_id,
         user__in=[i['pk'] for i in to_list]
-    ).values_list('user__email', flat=True)
+    ).values_list('user_id', flat=True)
     optouts = set(optouts)
     # Only count the num_optout for the first time the optouts are calculated.
     # We assume that the number will not change on retries, and so we don't need
     # to calculate it each time.
     num_optout = len(optouts)
-    to_list = [recipient for recipient in to_list if recipient['email'] not in optouts]
+    to_list = [recipient for recipient in to_list if recipient['pk'] not in optouts]
     return to_list, num_optout
 
 
@@ -483,138 +485,176 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
 
     # use the CourseEmailTemplate that was associated with the CourseEmail
     course_email_template = course_email.get_template()
+    # Most lines of the message are the same for every recipient, so only wrap them once
+    wrapped_plaintext_lines = {}
+    wrapped_html_lines = {}
+    statsd_tags = [_statsd_tag(course_title)]
+    start_time = time()
+    connection_pool = None
     try:
-        connection = get_connection()
-        connection.open()
+        connection_pool = _ConnectionPool(max(1, min(settings.BULK_EMAIL_SEND_CONCURRENCY, len(to_list))))
+        connection_pool.open()
 
         # Define context values to use in all course emails:
         email_context = {'name': '', 'email': ''}
         email_context.update(global_email_context)
 
         while to_list:
-            # Update context with user-specific values from the user at the end of the list.
-            # At the end of processing this user, they will be popped off of the to_list.
+            # Send to as many users from the end of the list as there are connections, at once.
+            # At the end of processing each user, they will be popped off of the to_list.
             # That way, the to_list will always contain the recipients remaining to be emailed.
             # This is convenient for retries, which will need to send to those who haven't
             # yet been emailed, but not send to those who have already been sent to.
-            recipient_num += 1
-            current_recipient = to_list[-1]
-            email = current_recipient['email']
-            email_context['email'] = email
-            email_context['name'] = current_recipient['profile__name']
-            email_context['user_id'] = current_recipient['pk']
-            email_context['course_id'] = course_email.course_id
-
-            # Construct message content using templates and context:
-            plaintext_msg = course_email_template.render_plaintext(course_email.text_message, email_context)
-            html_msg = course_email_template.render_htmltext(course_email.html_message, email_context)
-
-            # Create email:
-            email_msg = EmailMultiAlternatives(
-                subject,
-                plaintext_msg,
-                from_addr,
-                [email],
-                connection=connection
-            )
-            email_msg.attach_alternative(html_msg, 'text/html')
+            current_recipients = list(reversed(to_list[-len(connection_pool.connections):]))
+            email_msgs = []
+            for index, (current_recipient, connection) in enumerate(
+                    zip(current_recipients, connection_pool.connections)
+            ):
+                email = current_recipient['email']
+                # Update context with user-specific values from the user:
+                email_context['email'] = email
+                email_context['name'] = current_recipient['profile__name']
+                email_context['user_id'] = current_recipient['pk']
+                email_context['course_id'] = course_email.course_id
+
+                # Construct message content using templates and context:
+                plaintext_msg = course_email_template.render_plaintext(
+                    course_email.text_message, email_context, wrapped_plaintext_lines
+                )
+                html_msg = course_email_template.render_htmltext(
+                    course_email.html_message, email_context, wrapped_html_lines
+                )
 
-            # Throttle if we have gotten the rate limiter.  This is not very high-tech,
-            # but if a task has been retried for rate-limiting reasons, then we sleep
-            # for a period of time between all emails within this task.  Choice of
-            # the value depends on the number of workers that might be sending email in
-            # parallel, and what the SES throttle rate is.
-            if subtask_status.retried_nomax > 0:
-                sleep(settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
+                # Create email:
+                email_msg = EmailMultiAlternatives(
+                    subject,
+                    plaintext_msg,
+                    from_addr,
+                    [email],
+                    connection=connection
+                )
+                email_msg.attach_alternative(html_msg, 'text/html')
+                email_msgs.append(email_msg)
 
-            try:
                 log.info(
                     "BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Recipient num: %s/%s, \
                     Recipient name: %s, Email address: %s",
                     parent_task_id,
                     task_id,
                     email_id,
-                    recipient_num,
+                    recipient_num + index + 1,
                     total_recipients,
                     current_recipient['profile__name'],
                     email
                 )
-                with dog_stats_api.timer('course_email.single_send.time.overall', tags=[_statsd_tag(course_title)]):
-                    connection.send_messages([email_msg])
 
-            except SMTPDataError as exc:
-                # According to SMTP spec, we'll retry error codes in the 4xx range.  5xx range indicates hard failure.
-                total_recipients_failed += 1
-                log.error(
-                    "BulkEmail ==> Status: Failed(SMTPDataError), Task: %s, SubTask: %s, EmailId: %s, \
-                    Recipient num: %s/%s, Email address: %s",
-                    parent_task_id,
-                    task_id,
-                    email_id,
-                    recipient_num,
-                    total_recipients,
-                    email
-                )
-                if exc.smtp_code >= 400 and exc.smtp_code < 500:
-                    # This will cause the outer handler to catch the exception and retry the entire task.
-                    raise exc
-                else:
+            # Throttle if we have gotten the rate limiter.  This is not very high-tech,
+            # but if a task has been retried for rate-limiting reasons, then we sleep
+            # for a period of time between all emails within this task.  Choice of
+            # the value depends on the number of workers that might be sending email in
+            # parallel, and what the SES throttle rate is.
+            if subtask_status.retried_nomax > 0:
+                sleep(settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS * len(email_msgs))
+
+            send_errors = connection_pool.send(email_msgs, statsd_tags)
+            for index, (current_recipient, send_error) in enumerate(zip(current_recipients, send_errors)):
+                recipient_num += 1
+                email = current_recipient['email']
+                try:
+                    if send_error is not None:
+                        raise send_error  # pylint: disable=raising-bad-type
+
+                except SMTPDataError as exc:
+                    # According to SMTP spec, we'll retry error codes in the 4xx range.  5xx range indicates hard failure.
+                    total_recipients_failed += 1
+                    log.error(
+                        "BulkEmail ==> Status: Failed(SMTPDataError), Task: %s, SubTask: %s, EmailId: %s, \
+                        Recipient num: %s/%s, Email address: %s",
+                        parent_task_id,
+                        task_id,
+                        email_id,
+                        recipient_num,
+                        total_recipients,
+                        email
+                    )
+                    if exc.smtp_code >= 400 and exc.smtp_code < 500:
+                        # This will cause the outer handler to catch the exception and retry the entire task.
+                        total_recipients_successful += _drop_sent_recipients(
+                            to_list, current_recipients[index + 1:], send_errors[index + 1:], subtask_status,
+                            email_id, statsd_tags
+                        )
+                        raise exc
+                    else:
+                        # This will fall through and not retry the message.
+                        log.warning(
+                            'BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Recipient num: %s/%s, \
+                            Email not delivered to %s due to error %s',
+                            parent_task_id,
+                            task_id,
+                            email_id,
+                            recipient_num,
+                            total_recipients,
+                            email,
+                            exc.smtp_error
+                        )
+                        dog_stats_api.increment('course_email.error', tags=statsd_tags)
+                        subtask_status.increment(failed=1)
+
+                except SINGLE_EMAIL_FAILURE_ERRORS as exc:
                     # This will fall through and not retry the message.
-                    log.warning(
-                        'BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Recipient num: %s/%s, \
-                        Email not delivered to %s due to error %s',
+                    total_recipients_failed += 1
+                    log.error(
+                        "BulkEmail ==> Status: Failed(SINGLE_EMAIL_FAILURE_ERRORS), Task: %s, SubTask: %s, \
+                        EmailId: %s, Recipient num: %s/%s, Email address: %s, Exception: %s",
                         parent_task_id,
                         task_id,
                         email_id,
                         recipient_num,
                         total_recipients,
                         email,
-                        exc.smtp_error
+                        exc
                     )
-                    dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
+                    dog_stats_api.increment('course_email.error', tags=statsd_tags)
                     subtask_status.increment(failed=1)
 
-            except SINGLE_EMAIL_FAILURE_ERRORS as exc:
-                # This will fall through and not retry the message.
-                total_recipients_failed += 1
-                log.error(
-                    "BulkEmail ==> Status: Failed(SINGLE_EMAIL_FAILURE_ERRORS), Task: %s, SubTask: %s, \
-                    EmailId: %s, Recipient num: %s/%s, Email address: %s, Exception: %s",
-                    parent_task_id,
-                    task_id,
-                    email_id,
-                    recipient_num,
-                    total_recipients,
-                    email,
-                    exc
-                )
-                dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
-                subtask_status.increment(failed=1)
+                except Exception:
+                    # This will cause the outer handler to catch the exception and retry or fail the entire task.
+                    total_recipients_successful += _drop_sent_recipients(
+                        to_list, current_recipients[index + 1:], send_errors[index + 1:], subtask_status,
+                        email_id, statsd_tags
+                    )
+                    raise
 
-            else:
-                total_recipients_successful += 1
-                log.info(
-                    "BulkEmail ==> Status: Success, Task: %s, SubTask: %s, EmailId: %s, \
-                    Recipient num: %s/%s, Email address: %s,",
-                    parent_task_id,
-                    task_id,
-                    email_id,
-                    recipient_num,
-                    total_recipients,
-                    email
-                )
-                dog_stats_api.increment('course_email.sent', tags=[_statsd_tag(course_title)])
-                if settings.BULK_EMAIL_LOG_SENT_EMAILS:
-                    log.info('Email with id %s sent to %s', email_id, email)
                 else:
-                    log.debug('Email with id %s sent to %s', email_id, email)
-                subtask_status.increment(succeeded=1)
-
-            # Pop the user that was emailed off the end of the list only once they have
-            # successfully been processed.  (That way, if there were a failure that
-            # needed to be retried, the user is still on the list.)
-            recipients_info[email] += 1
-            to_list.pop()
+                    total_recipients_successful += 1
+                    log.info(
+                        "BulkEmail ==> Status: Success, Task: %s, SubTask: %s, EmailId: %s, \
+                        Recipient num: %s/%s, Email address: %s,",
+                        parent_task_id,
+                        task_id,
+                        email_id,
+                        recipient_num,
+                        total_recipients,
+                        email
+                    )
+                    dog_stats_api.increment('course_email.sent', tags=statsd_tags)
+                    if settings.BULK_EMAIL_LOG_SENT_EMAILS:
+                        log.info('Email with id %s sent to %s', email_id, email)
+                    else:
+                        log.debug('Email with id %s sent to %s', email_id, email)
+                    subtask_status.increment(succeeded=1)
+
+                # Pop the user that was emailed off the end of the list only once they have
+                # successfully been processed.  (That way, if there were a failure that
+                # needed to be retried, the user is still on the list.)
+                recipients_info[email] += 1
+                to_list.pop()
+
+        elapsed_time = time() - start_time
+        if elapsed_time > 0:
+            dog_stats_api.histogram(
+                'course_email.single_task.send_rate', total_recipients_successful / elapsed_time, tags=statsd_tags
+            )
 
         log.info(
             "BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Total Successful Recipients: %s/%s, \
@@ -693,7 +733,75 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         return subtask_status, None
     finally:
         # Clean up at the end.
-        connection.close()
+        if connection_pool is not None:
+            connection_pool.close()
+
+
+class _ConnectionPool(object):
+    """
+    A set of `size` email connections, over which messages are sent
+    concurrently, one message per connection at a time.
+    """
+    def __init__(self, size):
+        self.connections = [get_connection() for __ in range(size)]
+        self.thread_pool = ThreadPool(size) if size > 1 else None
+
+    def open(self):
+        """Open all of the connections."""
+        for connection in self.connections:
+            connection.open()
+
+    def close(self):
+        """Close all of the connections."""
+        if self.thread_pool is not None:
+            self.thread_pool.terminate()
+        for connection in self.connections:
+            connection.close()
+
+    def send(self, email_msgs, statsd_tags):
+        """
+        Send each of `email_msgs` (of which there can't be more than there
+        are connections) over its own connection.
+
+        Returns a list of the exception raised sending each message, or of
+        None for each message which was sent.
+        """
+        def send_message(connection_and_msg):
+            """Send a message over a connection, returning the exception raised if any."""
+            connection, email_msg = connection_and_msg
+            try:
+                with dog_stats_api.timer('course_email.single_send.time.overall', tags=statsd_tags):
+                    connection.send_messages([email_msg])
+            except Exception as exc:  # pylint: disable=broad-except
+                return exc
+            return None
+
+        connections_and_msgs = zip(self.connections, email_msgs)
+        if self.thread_pool is None:
+            return [send_message(connection_and_msg) for connection_and_msg in connections_and_msgs]
+        return self.thread_pool.map(send_message, connections_and_msgs)
+
+
+def _drop_sent_recipients(to_list, recipients, send_errors, subtask_status, email_id, statsd_tags):
+    """
+    Remove the `recipients` (from the end of `to_list`, last first) which were
+    sent to without error, so that they are not sent to again when the task is
+    retried, and count them as succeeded in `subtask_status`.  Returns the
+    number of recipients removed.
+
+    This is needed when a message sent concurrently with theirs causes the task
+    to be retried before they have been processed.
+    """
+    num_unprocessed = len(recipients) + 1
+    unprocessed = to_list[-num_unprocessed:]
+    sent = [recipient for recipient, send_error in zip(recipients, send_errors) if send_error is None]
+    for recipient in sent:
+        unprocessed.remove(recipient)
+        dog_stats_api.increment('course_email.sent', tags=statsd_tags)
+        log.info('Email with id %s sent to %s', email_id, recipient['email'])
+    to_list[-num_unprocessed:] = unprocessed
+    subtask_status.increment(succeeded=len(sent))
+    return len(sent)
 
 
 def _get_current_task():
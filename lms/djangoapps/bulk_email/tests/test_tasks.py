@@ -29,10 +29,12 @@ from celery.states import SUCCESS, FAILURE
 
 from django.conf import settings
 from django.core.management import call_command
+from django.test.utils import override_settings
 
 from xmodule.modulestore.tests.factories import CourseFactory
 
 from bulk_email.models import CourseEmail, Optout, SEND_TO_ALL
+from bulk_email.tasks import _drop_sent_recipients
 
 from instructor_task.tasks import send_bulk_course_email
 from instructor_task.subtasks import update_subtask_status, SubtaskStatus
@@ -195,6 +197,34 @@ class TestBulkEmailInstructorTask(InstructorTaskCourseTestCase):
             get_conn.return_value.send_messages.side_effect = cycle([None])
             self._test_run_with_task(send_bulk_course_email, 'emailed', num_emails, num_emails)
 
+    @override_settings(BULK_EMAIL_SEND_CONCURRENCY=4)
+    def test_successful_concurrently(self):
+        # Select number of emails to fit into a single subtask.
+        num_emails = settings.BULK_EMAIL_EMAILS_PER_TASK
+        # We also send email to the instructor:
+        self._create_students(num_emails - 1)
+        with patch('bulk_email.tasks.get_connection', autospec=True) as get_conn:
+            get_conn.return_value.send_messages.side_effect = cycle([None])
+            self._test_run_with_task(send_bulk_course_email, 'emailed', num_emails, num_emails)
+        self.assertEquals(get_conn.call_count, 4)
+
+    @override_settings(BULK_EMAIL_SEND_CONCURRENCY=4)
+    def test_ses_blacklisted_user_concurrently(self):
+        # Test that failures of some of the emails sent at once don't affect the others.
+        self._test_email_address_failures(SESAddressBlacklistedError(554, "Email address is blacklisted"))
+
+    def test_drop_sent_recipients(self):
+        # The last recipient on the list caused a retry, while the next was sent to concurrently
+        # and the one after that failed.
+        to_list = [{'email': 'a'}, {'email': 'b'}, {'email': 'c'}, {'email': 'd'}]
+        subtask_status = SubtaskStatus.create('subtask')
+        num_dropped = _drop_sent_recipients(
+            to_list, [{'email': 'c'}, {'email': 'b'}], [None, Exception()], subtask_status, 1, []
+        )
+        self.assertEquals(num_dropped, 1)
+        self.assertEquals(to_list, [{'email': 'a'}, {'email': 'b'}, {'email': 'd'}])
+        self.assertEquals(subtask_status.succeeded, 1)
+
     def test_successful_twice(self):
         # Select number of emails to fit into a single subtask.
         num_emails = settings.BULK_EMAIL_EMAILS_PER_TASK
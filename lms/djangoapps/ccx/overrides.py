@@ -9,7 +9,12 @@ from contextlib import contextmanager
 
 from django.db import transaction, IntegrityError
 
-from courseware.field_overrides import FieldOverrideProvider  # pylint: disable=import-error
+from courseware.field_overrides import (  # pylint: disable=import-error
+    FieldOverrideProvider,
+    get_cached_overrides,
+    invalidate_cached_overrides,
+    overrides_location_key,
+)
 from ccx import ACTIVE_CCX_KEY  # pylint: disable=import-error
 
 from .models import CcxMembership, CcxFieldOverride
@@ -93,18 +98,50 @@ def _get_overrides_for_ccx(ccx, block):
     Returns a dictionary mapping field name to overriden value for any
     overrides set on this block for this CCX.
     """
+    block_overrides = _get_all_overrides_for_ccx(ccx).get(overrides_location_key(block.location), {})
     overrides = {}
-    query = CcxFieldOverride.objects.filter(
-        ccx=ccx,
-        location=block.location
-    )
-    for override in query:
-        field = block.fields[override.field]
-        value = field.from_json(json.loads(override.value))
-        overrides[override.field] = value
+    for field_name, value in block_overrides.iteritems():
+        field = block.fields[field_name]
+        overrides[field_name] = field.from_json(json.loads(value))
     return overrides
 
 
+def _get_all_overrides_for_ccx(ccx):
+    """
+    Returns all of the overrides set for this CCX, loaded with a single query,
+    as a dictionary mapping block locations to dictionaries of JSON encoded
+    field values keyed by field name.
+    """
+    def load_overrides():
+        """
+        Loads the overrides from the database.
+        """
+        query = CcxFieldOverride.objects.filter(ccx=ccx).values_list('location', 'field', 'value')
+        overrides = {}
+        for location, field, value in query:
+            overrides.setdefault(unicode(location), {})[field] = value
+        return overrides
+
+    return get_cached_overrides(_overrides_cache_key(ccx), load_overrides)
+
+
+def _overrides_cache_key(ccx):
+    """
+    Returns the key the overrides for this CCX are cached under.
+    """
+    return u'ccx_field_overrides.{}'.format(ccx.id)
+
+
+def _overrides_changed(ccx, block):
+    """
+    Drops the cached overrides for this CCX, after one of the overrides on
+    `block` has been set or cleared.
+    """
+    invalidate_cached_overrides(_overrides_cache_key(ccx))
+    if hasattr(block, '_ccx_overrides'):
+        block._ccx_overrides.pop(ccx.id, None)  # pylint: disable=protected-access
+
+
 @transaction.commit_on_success
 def override_field_for_ccx(ccx, block, name, value):
     """
@@ -128,8 +165,7 @@ def override_field_for_ccx(ccx, block, name, value):
             field=name)
         override.value = value
     override.save()
-    if hasattr(block, '_ccx_overrides'):
-        del block._ccx_overrides[ccx.id]  # pylint: disable=protected-access
+    _overrides_changed(ccx, block)
 
 
 def clear_override_for_ccx(ccx, block, name):
@@ -144,10 +180,7 @@ def clear_override_for_ccx(ccx, block, name):
             ccx=ccx,
             location=block.location,
             field=name).delete()
-
-        if hasattr(block, '_ccx_overrides'):
-            del block._ccx_overrides[ccx.id]  # pylint: disable=protected-access
-
+        _overrides_changed(ccx, block)
     except CcxFieldOverride.DoesNotExist:
         pass
 
@@ -7,7 +7,9 @@ import pytz
 from nose.plugins.attrib import attr
 
 from courseware.field_overrides import OverrideFieldData  # pylint: disable=import-error
+from django.core.cache import cache
 from django.test.utils import override_settings
+from request_cache.middleware import RequestCache
 from student.tests.factories import AdminFactory  # pylint: disable=import-error
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
@@ -107,6 +109,61 @@ class TestFieldOverrides(ModuleStoreTestCase):
             dummy2 = chapter.start
             dummy3 = chapter.start
 
+    def test_overrides_loaded_with_one_query(self):
+        """
+        Test that the overrides of all blocks in a ccx are loaded at once.
+        """
+        ccx_start = datetime.datetime(2014, 12, 25, 00, 00, tzinfo=pytz.UTC)
+        chapters = self.course.get_children()
+        for chapter in chapters:
+            override_field_for_ccx(self.ccx, chapter, 'start', ccx_start)
+        with self.assertNumQueries(1):
+            for chapter in chapters:
+                self.assertEquals(chapter.start, ccx_start)
+
+    @override_settings(FIELD_OVERRIDES_CACHE_TIMEOUT=60)
+    def test_overrides_cached_between_requests(self):
+        """
+        Test that overrides are kept in the django cache, and that setting an
+        override invalidates them.
+        """
+        cache.clear()
+        ccx_start = datetime.datetime(2014, 12, 25, 00, 00, tzinfo=pytz.UTC)
+        chapter = self.course.get_children()[0]
+        override_field_for_ccx(self.ccx, chapter, 'start', ccx_start)
+        self.assertEquals(chapter.start, ccx_start)
+
+        RequestCache().clear_request_cache()
+        del chapter._ccx_overrides  # pylint: disable=protected-access
+        with self.assertNumQueries(0):
+            self.assertEquals(chapter.start, ccx_start)
+
+        new_start = datetime.datetime(2015, 1, 1, 00, 00, tzinfo=pytz.UTC)
+        override_field_for_ccx(self.ccx, chapter, 'start', new_start)
+        RequestCache().clear_request_cache()
+        self.assertEquals(chapter.start, new_start)
+
+    @override_settings(FIELD_OVERRIDES_CACHE_TIMEOUT=60)
+    def test_overrides_cached_before_commit_dropped(self):
+        """
+        Test that overrides cached by another request before a change was
+        committed are dropped once the request that made it has finished.
+        """
+        cache.clear()
+        ccx_start = datetime.datetime(2014, 12, 25, 00, 00, tzinfo=pytz.UTC)
+        chapter = self.course.get_children()[0]
+        override_field_for_ccx(self.ccx, chapter, 'start', ccx_start)
+        self.assertEquals(chapter.start, ccx_start)
+
+        # Another request loaded the overrides as they were before the change
+        cache_key = u'ccx_field_overrides.{}'.format(self.ccx.id)
+        version = cache.get(u'{}.version'.format(cache_key))
+        cache.set(u'{}.{}'.format(cache_key, version), {}, 60)
+
+        RequestCache().finish_request()
+        del chapter._ccx_overrides  # pylint: disable=protected-access
+        self.assertEquals(chapter.start, ccx_start)
+
     def test_override_is_inherited(self):
         """
         Test that sequentials inherit overridden start date from chapter.
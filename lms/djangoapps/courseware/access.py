@@ -352,7 +352,24 @@ def _has_group_access(descriptor, user, course_key):
 
     # use merged_group_access which takes group access on the block's
     # parents / ancestors into account
-    merged_access = descriptor.merged_group_access
+    return _has_merged_group_access(user, descriptor.user_partitions, descriptor.merged_group_access, course_key)
+
+
+def _has_merged_group_access(user, user_partitions, merged_access, course_key):
+    """
+    This function returns a boolean indicating whether or not `user` has
+    sufficient group memberships to "load" a block whose `merged_group_access`
+    is `merged_access`, in a course with the given `user_partitions`
+    """
+    def get_user_partition(user_partition_id):
+        """
+        Return the user partition with the given id, as the block's `_get_user_partition` would.
+        """
+        for user_partition in user_partitions:
+            if user_partition.id == user_partition_id:
+                return user_partition
+        raise NoSuchUserPartitionError("could not find a UserPartition with ID [{}]".format(user_partition_id))
+
     # check for False in merged_access, which indicates that at least one
     # partition's group list excludes all students.
     if False in merged_access.values():
@@ -364,7 +381,7 @@ def _has_group_access(descriptor, user, course_key):
     # if a referenced partition could not be found, access will be denied.
     try:
         partitions = [
-            descriptor._get_user_partition(partition_id)  # pylint:disable=protected-access
+            get_user_partition(partition_id)
             for partition_id, group_ids in merged_access.items()
             if group_ids is not None
         ]
@@ -465,6 +482,52 @@ def _has_access_descriptor(user, action, descriptor, course_key=None):
     return _dispatch(checkers, action, user, descriptor)
 
 
+def has_access_to_course_block(user, block, course_key, staff_access, is_beta_tester, user_partitions=None):
+    """
+    Check if user can load the block summarized by `block`, a dict such as the chapters and
+    sections from `course_blocks.get_course_blocks`. This is the 'load' check of
+    `_has_access_descriptor`, without loading the descriptor.
+
+    The user's staff access and beta tester role are passed in, as they are the same for every
+    block in the course and would otherwise be looked up again for each of them.
+
+    If the summary has the block's `merged_group_access`, access is also checked against the
+    course's partition groups, using its `user_partitions`. Such blocks are denied to non-staff
+    if `user_partitions` isn't passed in. Summaries without `merged_group_access` are only
+    checked for their start date and staff-only visibility.
+    """
+    if staff_access:
+        return True
+
+    if block['visible_to_staff_only']:
+        return False
+
+    merged_group_access = block.get('merged_group_access')
+    if merged_group_access:
+        if user_partitions is None:
+            debug("Deny: group access without the course's user partitions")
+            return False
+        # as in _has_group_access, partitions used by split_test modules don't restrict access
+        only_split_partitions = len(user_partitions) == len(get_split_user_partitions(user_partitions))
+        if not only_split_partitions and not _has_merged_group_access(
+                user, user_partitions, merged_group_access, course_key
+        ):
+            return False
+
+    if settings.FEATURES['DISABLE_START_DATES'] and not is_masquerading_as_student(user, course_key):
+        debug("Allow: DISABLE_START_DATES")
+        return True
+
+    if block['start'] is None:
+        debug("Allow: no start date")
+        return True
+
+    effective_start = block['start']
+    if is_beta_tester and block['days_early_for_beta'] is not None:
+        effective_start -= timedelta(block['days_early_for_beta'])
+    return in_preview_mode() or datetime.now(UTC()) > effective_start
+
+
 def _has_access_xmodule(user, action, xmodule, course_key):
     """
     Check if user has access to this xmodule.
@@ -15,10 +15,13 @@ package and is used to wrap the `authored_data` when constructing an
 by `authored_data`, e.g. course content and settings stored in Mongo.
 """
 import threading
+from uuid import uuid4
 
 from abc import ABCMeta, abstractmethod
 from contextlib import contextmanager
 from django.conf import settings
+from django.core.cache import cache
+from request_cache.middleware import RequestCache
 from xblock.field_data import FieldData
 from xmodule.modulestore.inheritance import InheritanceMixin
 
@@ -193,6 +196,88 @@ class FieldOverrideProvider(object):
         raise NotImplementedError
 
 
+def _overrides_request_cache():
+    """
+    Returns the dictionary in which override sets are kept for the length of
+    the current request.
+    """
+    return RequestCache.get_request_cache().data.setdefault('field_overrides', {})
+
+
+def _overrides_version_key(cache_key):
+    """
+    Returns the django cache key holding the current version of the override
+    set cached under `cache_key`.
+    """
+    return u'{}.version'.format(cache_key)
+
+
+def overrides_location_key(location):
+    """
+    Returns the key under which the overrides for the block at `location` are
+    kept in a set of overrides returned by `get_cached_overrides`.  Like the
+    locations stored in the database, this ignores any branch or version
+    information in `location`, which may also be a course key.
+    """
+    if hasattr(location, 'version_agnostic') and hasattr(location, 'for_branch'):
+        location = location.for_branch(None).version_agnostic()
+    return unicode(location)
+
+
+def get_cached_overrides(cache_key, load_overrides):
+    """
+    Returns a set of field overrides, e.g. all of the overrides for a student
+    in a course, so that a provider can load them with a single query rather
+    than one query per block.  `load_overrides` is called to load the set if
+    it isn't cached yet, and should return a dictionary mapping block
+    locations (as given by `overrides_location_key`) to dictionaries of JSON encoded field values keyed
+    by field name.
+
+    The set is kept for the rest of the request, and also in the django cache
+    if `FIELD_OVERRIDES_CACHE_TIMEOUT` is set.  It is cached under a version
+    which is changed by `invalidate_cached_overrides`, so that a set loaded
+    before an override changed can't be stored over the newer one.
+    """
+    request_cache = _overrides_request_cache()
+    overrides = request_cache.get(cache_key)
+    if overrides is not None:
+        return overrides
+
+    timeout = settings.FIELD_OVERRIDES_CACHE_TIMEOUT
+    if timeout:
+        version_key = _overrides_version_key(cache_key)
+        cache.add(version_key, uuid4().hex, timeout)
+        versioned_key = u'{}.{}'.format(cache_key, cache.get(version_key))
+        overrides = cache.get(versioned_key)
+        if overrides is None:
+            overrides = load_overrides()
+            cache.set(versioned_key, overrides, timeout)
+    else:
+        overrides = load_overrides()
+
+    request_cache[cache_key] = overrides
+    return overrides
+
+
+def invalidate_cached_overrides(cache_key):
+    """
+    Drops the set of field overrides cached under `cache_key`, after one of
+    the overrides in it has been set or cleared.
+
+    The version is changed again once the request has finished, since until
+    its transaction is committed, other requests still load (and may cache
+    under the new version) the overrides as they were before the change.
+    """
+    _overrides_request_cache().pop(cache_key, None)
+    timeout = settings.FIELD_OVERRIDES_CACHE_TIMEOUT
+    if timeout:
+        version_key = _overrides_version_key(cache_key)
+        cache.set(version_key, uuid4().hex, timeout)
+        RequestCache.run_after_request(
+            version_key, lambda: cache.set(version_key, uuid4().hex, timeout)
+        )
+
+
 def _lineage(block):
     """
     Returns an iterator over all ancestors of the given block, starting with
@@ -6,29 +6,39 @@ import random
 import logging
 
 from contextlib import contextmanager
+from itertools import islice
 from django.conf import settings
 from django.db import transaction
 from django.test.client import RequestFactory
+from django.utils.timezone import now
 
 import dogstats_wrapper as dog_stats_api
 
 from courseware import courses
+from courseware.access import has_access
 from courseware.model_data import FieldDataCache
-from student.models import anonymous_id_for_user
+from openedx.core.djangoapps.content.course_structures.course_blocks import course_blocks_version
+from student.models import anonymous_id_for_user, anonymous_ids_for_users
 from util.module_utils import yield_dynamic_descriptor_descendents
 from xmodule import graders
 from xmodule.graders import Score
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
-from .models import StudentModule
+from .models import StudentModule, PersistentSubsectionGrade
 from .module_render import get_module_for_descriptor
 from submissions import api as sub_api  # installed from the edx-submissions repository
 from opaque_keys import InvalidKeyError
-from opaque_keys.edx.keys import CourseKey
+from opaque_keys.edx.keys import CourseKey, UsageKey
 
 
 log = logging.getLogger("edx.courseware")
 
+# Number of students whose score state iterate_grades_for loads at once
+GRADING_BATCH_SIZE = 100
+
+# Number of StudentModules answer_distributions loads at once
+ANSWER_DISTRIBUTION_CHUNK_SIZE = 1000
+
 
 def answer_distributions(course_key):
     """
@@ -59,44 +69,29 @@ def answer_distributions(course_key):
 
     This method will try to use a read-replica database if one is available.
     """
-    # dict: { module.module_state_key : (url_name, display_name) }
-    state_keys_to_problem_info = {}  # For caching, used by url_and_display_name
-
-    def url_and_display_name(usage_key):
-        """
-        For a given usage_key, return the problem's url and display_name.
-        Handle modulestore access and caching. This method ignores permissions.
-
-        Raises:
-            InvalidKeyError: if the usage_key does not parse
-            ItemNotFoundError: if there is no content that corresponds
-                to this usage_key.
-        """
-        problem_store = modulestore()
-        if usage_key not in state_keys_to_problem_info:
-            problem = problem_store.get_item(usage_key)
-            problem_info = (problem.url_name, problem.display_name_with_default)
-            state_keys_to_problem_info[usage_key] = problem_info
+    problem_info = _ProblemInfo(course_key)
 
-        return state_keys_to_problem_info[usage_key]
-
-    # Iterate through all problems submitted for this course in no particular
-    # order, and build up our answer_counts dict that we will eventually return
+    # Iterate through all problems submitted for this course in order of id,
+    # a chunk at a time, and build up our answer_counts dict that we will
+    # eventually return
     answer_counts = defaultdict(lambda: defaultdict(int))
-    for module in StudentModule.all_submitted_problems_read_only(course_key):
+    for module_id, module_state_key, state, student_id in _submitted_problem_states(course_key):
+        # Most problem state has no answers in it at all (e.g. problems which
+        # have only been viewed), so don't bother decoding it.
+        if not state or '"student_answers"' not in state:
+            continue
         try:
-            state_dict = json.loads(module.state) if module.state else {}
-            raw_answers = state_dict.get("student_answers", {})
+            raw_answers = json.loads(state).get("student_answers", {})
         except ValueError:
             log.error(
                 u"Answer Distribution: Could not parse module state for StudentModule id=%s, course=%s",
-                module.id,
+                module_id,
                 course_key,
             )
             continue
 
         try:
-            url, display_name = url_and_display_name(module.module_state_key.map_into_course(course_key))
+            url, display_name = problem_info.url_and_display_name(module_state_key)
             # Each problem part has an ID that is derived from the
             # module.module_state_key (with some suffix appended)
             for problem_part_id, raw_answer in raw_answers.items():
@@ -114,24 +109,97 @@ def answer_distributions(course_key):
                   "was later deleted from the course. This answer will be " + \
                   "omitted from the answer distribution CSV."
             log.warning(
-                msg.format(module.module_state_key, module.id, module.student_id, course_key)
+                msg.format(module_state_key, module_id, student_id, course_key)
             )
             continue
 
     return answer_counts
 
 
+def _submitted_problem_states(course_key):
+    """
+    Yield the (id, module_state_key, state, student_id) of all of the submitted
+    problems of the course, as stored in the database, fetching
+    ANSWER_DISTRIBUTION_CHUNK_SIZE of them at a time from the read replica.
+
+    Each query picks up after the last id fetched by the previous one, so that
+    neither the database nor this process ever has to hold all of the course's
+    problem state at once.
+    """
+    queryset = StudentModule.all_submitted_problems_read_only(course_key).order_by('id').values_list(
+        'id', 'module_state_key', 'state', 'student_id'
+    )
+    chunk_size = ANSWER_DISTRIBUTION_CHUNK_SIZE
+    last_id = None
+    while True:
+        chunk_queryset = queryset if last_id is None else queryset.filter(id__gt=last_id)
+        chunk = list(chunk_queryset[:chunk_size])
+        for row in chunk:
+            yield row
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1][0]
+
+
+class _ProblemInfo(object):
+    """
+    The url_name and display_name of the problems of a course, by the module_state_key
+    of their StudentModules.
+
+    All of the course's problems are loaded with a single modulestore query up front,
+    and any others (e.g. from old StudentModules whose keys don't match the course's
+    current problems) are looked up one at a time. This ignores permissions.
+    """
+    def __init__(self, course_key):
+        self.course_key = course_key
+        # dict: { module_state_key as stored : (url_name, display_name), or None if not found }
+        self._problem_info = {}
+        # dict: { problem usage key : (url_name, display_name) }
+        self._course_problem_info = {}
+        for problem in modulestore().get_items(course_key, qualifiers={'category': 'problem'}):
+            location = problem.location
+            if hasattr(location, 'version_agnostic') and hasattr(location, 'for_branch'):
+                location = location.for_branch(None).version_agnostic()
+            self._course_problem_info[location] = (problem.url_name, problem.display_name_with_default)
+
+    def url_and_display_name(self, module_state_key):
+        """
+        Return the url_name and display_name of the problem with the `module_state_key`
+        string stored in the database.
+
+        Raises:
+            InvalidKeyError: if the module_state_key does not parse
+            ItemNotFoundError: if there is no content that corresponds
+                to this module_state_key.
+        """
+        if module_state_key not in self._problem_info:
+            usage_key = UsageKey.from_string(module_state_key).map_into_course(self.course_key)
+            problem_info = self._course_problem_info.get(usage_key)
+            if problem_info is None:
+                try:
+                    problem = modulestore().get_item(usage_key)
+                    problem_info = (problem.url_name, problem.display_name_with_default)
+                except ItemNotFoundError:
+                    pass
+            self._problem_info[module_state_key] = problem_info
+
+        problem_info = self._problem_info[module_state_key]
+        if problem_info is None:
+            raise ItemNotFoundError(module_state_key)
+        return problem_info
+
+
 @transaction.commit_manually
-def grade(student, request, course, keep_raw_scores=False):
+def grade(student, request, course, keep_raw_scores=False, bulk_scores=None):
     """
     Wraps "_grade" with the manual_transaction context manager just in case
     there are unanticipated errors.
     """
     with manual_transaction():
-        return _grade(student, request, course, keep_raw_scores)
+        return _grade(student, request, course, keep_raw_scores, bulk_scores)
 
 
-def _grade(student, request, course, keep_raw_scores):
+def _grade(student, request, course, keep_raw_scores, bulk_scores=None):
     """
     Unwrapped version of "grade"
 
@@ -149,18 +217,20 @@ def _grade(student, request, course, keep_raw_scores):
       make up the final grade. (For display)
     - keep_raw_scores : if True, then value for key 'raw_scores' contains scores
       for every graded module
+    - bulk_scores : an optional BulkScores holding the score state of a batch
+      of students that includes this one, see `iterate_grades_for`.
 
     More information on the format is in the docstring for CourseGrader.
     """
     grading_context = course.grading_context
     raw_scores = []
+    grade_store = PersistedGrades(student, course, bulk_scores)
 
     # Dict of item_ids -> (earned, possible) point tuples. This *only* grabs
     # scores that were registered with the submissions API, which for the moment
-    # means only openassessment (edx-ora2)
-    submissions_scores = sub_api.get_scores(
-        course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id)
-    )
+    # means only openassessment (edx-ora2). Only fetched if some section has to
+    # be recomputed.
+    submissions_scores = None
 
     totaled_scores = {}
     # This next complicated loop is just to collect the totaled_scores, which is
@@ -174,70 +244,27 @@ def _grade(student, request, course, keep_raw_scores):
             # some problems have state that is updated independently of interaction
             # with the LMS, so they need to always be scored. (E.g. foldit.,
             # combinedopenended)
-            should_grade_section = any(
+            always_recalculate = any(
                 descriptor.always_recalculate_grades for descriptor in section['xmoduledescriptors']
             )
 
-            # If there are no problems that always have to be regraded, check to
-            # see if any of our locations are in the scores from the submissions
-            # API. If scores exist, we have to calculate grades for this section.
-            if not should_grade_section:
-                should_grade_section = any(
-                    descriptor.location.to_deprecated_string() in submissions_scores
-                    for descriptor in section['xmoduledescriptors']
+            if not always_recalculate and grade_store.has_section(section_descriptor.location):
+                entries = grade_store.get_section(section_descriptor.location)
+            else:
+                if submissions_scores is None:
+                    submissions_scores = sub_api.get_scores(
+                        course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id)
+                    )
+                entries = _calculate_section_entries(
+                    student, request, course, section, submissions_scores, always_recalculate, bulk_scores
                 )
-
-            if not should_grade_section:
-                with manual_transaction():
-                    should_grade_section = StudentModule.objects.filter(
-                        student=student,
-                        module_state_key__in=[
-                            descriptor.location for descriptor in section['xmoduledescriptors']
-                        ]
-                    ).exists()
+                if not always_recalculate:
+                    grade_store.set_section(section_descriptor.location, entries)
 
             # If we haven't seen a single problem in the section, we don't have
             # to grade it at all! We can assume 0%
-            if should_grade_section:
-                scores = []
-
-                def create_module(descriptor):
-                    '''creates an XModule instance given a descriptor'''
-                    # TODO: We need the request to pass into here. If we could forego that, our arguments
-                    # would be simpler
-                    with manual_transaction():
-                        field_data_cache = FieldDataCache([descriptor], course.id, student)
-                    return get_module_for_descriptor(student, request, descriptor, field_data_cache, course.id)
-
-                for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, create_module):
-
-                    (correct, total) = get_score(
-                        course.id, student, module_descriptor, create_module, scores_cache=submissions_scores
-                    )
-                    if correct is None and total is None:
-                        continue
-
-                    if settings.GENERATE_PROFILE_SCORES:  	# for debugging!
-                        if total > 1:
-                            correct = random.randrange(max(total - 2, 1), total + 1)
-                        else:
-                            correct = total
-
-                    graded = module_descriptor.graded
-                    if not total > 0:
-                        # We simply cannot grade a problem that is 12/0, because we might need it as a percentage
-                        graded = False
-
-                    scores.append(
-                        Score(
-                            correct,
-                            total,
-                            graded,
-                            module_descriptor.display_name_with_default,
-                            module_descriptor.location
-                        )
-                    )
-
+            if entries is not None:
+                scores = _scores_from_entries(entries, course.id)
                 _, graded_total = graders.aggregate_scores(scores, section_name)
                 if keep_raw_scores:
                     raw_scores += scores
@@ -255,6 +282,9 @@ def _grade(student, request, course, keep_raw_scores):
 
         totaled_scores[section_format] = format_scores
 
+    with manual_transaction():
+        grade_store.save()
+
     # Grading policy might be overriden by a CCX, need to reset it
     course.set_grading_policy(course.grading_policy)
     grade_summary = course.grader.grade(totaled_scores, generate_random_scores=settings.GENERATE_PROFILE_SCORES)
@@ -273,6 +303,180 @@ def _grade(student, request, course, keep_raw_scores):
     return grade_summary
 
 
+def _calculate_section_entries(
+        student, request, course, section, submissions_scores, always_recalculate, bulk_scores=None
+):
+    """
+    Compute the score entries (see `_score_entry`) of every scorable block in
+    the graded `section` of the grading context, or None if the student hasn't
+    interacted with the section at all.
+    """
+    section_descriptor = section['section_descriptor']
+    should_grade_section = always_recalculate
+
+    # If there are no problems that always have to be regraded, check to
+    # see if any of our locations are in the scores from the submissions
+    # API. If scores exist, we have to calculate grades for this section.
+    if not should_grade_section:
+        should_grade_section = any(
+            descriptor.location.to_deprecated_string() in submissions_scores
+            for descriptor in section['xmoduledescriptors']
+        )
+
+    if not should_grade_section:
+        locations = [descriptor.location for descriptor in section['xmoduledescriptors']]
+        if bulk_scores is not None:
+            should_grade_section = bulk_scores.has_state(student, locations)
+        else:
+            with manual_transaction():
+                should_grade_section = StudentModule.objects.filter(
+                    student=student,
+                    module_state_key__in=locations
+                ).exists()
+
+    if not should_grade_section:
+        return None
+
+    def create_module(descriptor):
+        '''creates an XModule instance given a descriptor'''
+        # TODO: We need the request to pass into here. If we could forego that, our arguments
+        # would be simpler
+        with manual_transaction():
+            field_data_cache = FieldDataCache([descriptor], course.id, student)
+        return get_module_for_descriptor(student, request, descriptor, field_data_cache, course.id)
+
+    entries = []
+    for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, create_module):
+
+        (correct, total) = get_score(
+            course.id, student, module_descriptor, create_module, scores_cache=submissions_scores,
+            bulk_scores=bulk_scores
+        )
+        if correct is None and total is None:
+            continue
+
+        if settings.GENERATE_PROFILE_SCORES:  	# for debugging!
+            if total > 1:
+                correct = random.randrange(max(total - 2, 1), total + 1)
+            else:
+                correct = total
+
+        entries.append(_score_entry(module_descriptor, correct, total, submissions_scores))
+    return entries
+
+
+def _score_entry(descriptor, correct, total, scores_cache):
+    """
+    Return the JSON serializable record of a block's score that is kept by
+    PersistedGrades. The weight is remembered so that later raw scores for
+    the block can be re-weighted the same way `get_score` does.
+    """
+    if descriptor.location.to_deprecated_string() in scores_cache or descriptor.always_recalculate_grades:
+        weight = None
+    else:
+        weight = descriptor.weight
+    return {
+        'usage_key': unicode(descriptor.location),
+        'earned': correct,
+        'possible': total,
+        'graded': descriptor.graded,
+        'display_name': descriptor.display_name_with_default,
+        'weight': weight,
+    }
+
+
+def _scores_from_entries(entries, course_key, graded=None):
+    """
+    Convert score entries into Scores. Blocks are graded according to their own
+    `graded` setting unless `graded` is passed in.
+    """
+    scores = []
+    for entry in entries:
+        block_graded = entry['graded'] if graded is None else graded
+        if graded is None and not entry['possible'] > 0:
+            # We simply cannot grade a problem that is 12/0, because we might need it as a percentage
+            block_graded = False
+        scores.append(
+            Score(
+                entry['earned'],
+                entry['possible'],
+                block_graded,
+                entry['display_name'],
+                UsageKey.from_string(entry['usage_key']).map_into_course(course_key)
+            )
+        )
+    return scores
+
+
+class PersistedGrades(object):
+    """
+    A student's stored subsection grades for a course (see
+    `courseware.models.PersistentSubsectionGrade`), loaded with a single query.
+
+    Stored grades are only used if the ENABLE_PERSISTENT_GRADES feature is on,
+    and only those computed against the current version of the course content;
+    any change to the course causes its subsections to be recomputed (and
+    re-stored) as they are next graded.
+    """
+    def __init__(self, student, course, bulk_scores=None):
+        self.student = student
+        self.course_key = course.id
+        self.course_version = None
+        if settings.FEATURES.get('ENABLE_PERSISTENT_GRADES') and not settings.GENERATE_PROFILE_SCORES:
+            self.course_version = course_blocks_version(course)
+        self.grades = {}
+        self.dirty = {}
+        # grades are computed from state read after this, see `save`
+        self.computed_at = bulk_scores.loaded_at if bulk_scores is not None else now()
+        if self.enabled:
+            if bulk_scores is not None:
+                self.grades = bulk_scores.persisted_grades(student, self.course_version)
+            else:
+                with manual_transaction():
+                    self.grades = PersistentSubsectionGrade.load_grades(
+                        student, self.course_key, self.course_version
+                    )
+
+    @property
+    def enabled(self):
+        """
+        Whether grades are read from and written to the store.
+        """
+        return self.course_version is not None and self.student.is_authenticated()
+
+    def has_section(self, usage_key):
+        """
+        Whether there is a stored grade for the subsection `usage_key`.
+        """
+        return usage_key in self.grades
+
+    def get_section(self, usage_key):
+        """
+        Return the stored score entries of the subsection `usage_key` (None if
+        the student never touched it).
+        """
+        return self.grades[usage_key]
+
+    def set_section(self, usage_key, entries):
+        """
+        Remember freshly computed score entries for the subsection `usage_key`,
+        to be stored by `save`.
+        """
+        if self.enabled:
+            self.grades[usage_key] = self.dirty[usage_key] = entries
+
+    def save(self):
+        """
+        Store all subsections set since the last save, unless the student's
+        state or stored grades have changed since it was read.
+        """
+        if self.dirty:
+            PersistentSubsectionGrade.save_grades(
+                self.student, self.course_key, self.course_version, self.dirty, self.computed_at
+            )
+            self.dirty = {}
+
+
 def grade_for_percentage(grade_cutoffs, percentage):
     """
     Returns a letter grade as defined in grading_policy (e.g. 'A' 'B' 'C' for 6.002x) or None.
@@ -342,7 +546,8 @@ def _progress_summary(student, request, course):
 
         course_module = getattr(course_module, '_x_module', course_module)
 
-    submissions_scores = sub_api.get_scores(course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id))
+    grade_store = PersistedGrades(student, course)
+    submissions_scores = None
 
     chapters = []
     # Don't include chapters that aren't displayable (e.g. due to error)
@@ -360,28 +565,36 @@ def _progress_summary(student, request, course):
                     continue
 
                 graded = section_module.graded
-                scores = []
+                entries = None
+                if grade_store.has_section(section_module.location):
+                    entries = grade_store.get_section(section_module.location)
+
+                # Stored grades of untouched sections have no entries, so compute them
+                if entries is None:
+                    if submissions_scores is None:
+                        submissions_scores = sub_api.get_scores(
+                            course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id)
+                        )
+                    entries = []
+                    always_recalculate = False
 
-                module_creator = section_module.xmodule_runtime.get_module
+                    module_creator = section_module.xmodule_runtime.get_module
 
-                for module_descriptor in yield_dynamic_descriptor_descendents(section_module, module_creator):
-                    course_id = course.id
-                    (correct, total) = get_score(
-                        course_id, student, module_descriptor, module_creator, scores_cache=submissions_scores
-                    )
-                    if correct is None and total is None:
-                        continue
-
-                    scores.append(
-                        Score(
-                            correct,
-                            total,
-                            graded,
-                            module_descriptor.display_name_with_default,
-                            module_descriptor.location
+                    for module_descriptor in yield_dynamic_descriptor_descendents(section_module, module_creator):
+                        always_recalculate = always_recalculate or module_descriptor.always_recalculate_grades
+                        course_id = course.id
+                        (correct, total) = get_score(
+                            course_id, student, module_descriptor, module_creator, scores_cache=submissions_scores
                         )
-                    )
+                        if correct is None and total is None:
+                            continue
+
+                        entries.append(_score_entry(module_descriptor, correct, total, submissions_scores))
 
+                    if not always_recalculate:
+                        grade_store.set_section(section_module.location, entries)
+
+                scores = _scores_from_entries(entries, course.id, graded=graded)
                 scores.reverse()
                 section_total, _ = graders.aggregate_scores(
                     scores, section_module.display_name_with_default)
@@ -404,10 +617,13 @@ def _progress_summary(student, request, course):
             'sections': sections
         })
 
+    with manual_transaction():
+        grade_store.save()
+
     return chapters
 
 
-def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None):
+def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None, bulk_scores=None):
     """
     Return the score for a user on a problem, as a tuple (correct, total).
     e.g. (5,7) if you got 5 out of 7 points.
@@ -421,6 +637,8 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
            Can return None if user doesn't have access, or if something else went wrong.
     scores_cache: A dict of location names to (earned, possible) point tuples.
            If an entry is found in this cache, it takes precedence.
+    bulk_scores: An optional BulkScores, holding the StudentModule scores of
+           `user` and the known max scores of problems.
     """
     scores_cache = scores_cache or {}
 
@@ -447,33 +665,47 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
         # These are not problems, and do not have a score
         return (None, None)
 
-    try:
-        student_module = StudentModule.objects.get(
-            student=user,
-            course_id=course_id,
-            module_state_key=problem_descriptor.location
-        )
-    except StudentModule.DoesNotExist:
-        student_module = None
+    if bulk_scores is not None:
+        student_module = bulk_scores.get_student_module(user, problem_descriptor.location)
+    else:
+        try:
+            student_module = StudentModule.objects.get(
+                student=user,
+                course_id=course_id,
+                module_state_key=problem_descriptor.location
+            )
+        except StudentModule.DoesNotExist:
+            student_module = None
 
     if student_module is not None and student_module.max_grade is not None:
         correct = student_module.grade if student_module.grade is not None else 0
         total = student_module.max_grade
     else:
-        # If the problem was not in the cache, or hasn't been graded yet,
-        # we need to instantiate the problem.
-        # Otherwise, the max score (cached in student_module) won't be available
-        problem = module_creator(problem_descriptor)
-        if problem is None:
-            return (None, None)
-
         correct = 0.0
-        total = problem.max_score()
+        total = bulk_scores.get_max_score(problem_descriptor) if bulk_scores is not None else None
+        if total is not None:
+            # Already computed for another student in the batch, so only check
+            # that the user can access the problem
+            if not has_access(user, 'load', problem_descriptor, course_id):
+                return (None, None)
+        else:
+            # If the problem was not in the cache, or hasn't been graded yet,
+            # we need to instantiate the problem.
+            # Otherwise, the max score (cached in student_module) won't be available
+            # This also checks that the user can access the problem.
+            problem = module_creator(problem_descriptor)
+            if problem is None:
+                return (None, None)
 
-        # Problem may be an error module (if something in the problem builder failed)
-        # In which case total might be None
-        if total is None:
-            return (None, None)
+            total = problem.max_score()
+
+            # Problem may be an error module (if something in the problem builder failed)
+            # In which case total might be None
+            if total is None:
+                return (None, None)
+
+            if bulk_scores is not None:
+                bulk_scores.set_max_score(problem_descriptor, total)
 
     # Now we re-weight the problem, if specified
     weight = problem_descriptor.weight
@@ -500,7 +732,7 @@ def manual_transaction():
         transaction.commit()
 
 
-def iterate_grades_for(course_or_id, students, keep_raw_scores=False):
+def iterate_grades_for(course_or_id, students, keep_raw_scores=False, batch_size=GRADING_BATCH_SIZE):
     """Given a course_id and an iterable of students (User), yield a tuple of:
 
     (student, gradeset, err_msg) for every student enrolled in the course.
@@ -517,6 +749,10 @@ def iterate_grades_for(course_or_id, students, keep_raw_scores=False):
     - grade_breakdown : A breakdown of the major components that
         make up the final grade. (For display)
     - raw_scores: contains scores for every graded module
+
+    Students are graded in batches of `batch_size`, loading the score state of
+    each batch up front (see BulkScores) instead of querying it section by
+    section and problem by problem.
     """
     if isinstance(course_or_id, (basestring, CourseKey)):
         course = courses.get_course_by_id(course_or_id)
@@ -528,25 +764,114 @@ def iterate_grades_for(course_or_id, students, keep_raw_scores=False):
     # grading that student.
     request = RequestFactory().get('/')
 
-    for student in students:
-        with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course.id)]):
-            try:
-                request.user = student
-                # Grading calls problem rendering, which calls masquerading,
-                # which checks session vars -- thus the empty session dict below.
-                # It's not pretty, but untangling that is currently beyond the
-                # scope of this feature.
-                request.session = {}
-                gradeset = grade(student, request, course, keep_raw_scores)
-                yield student, gradeset, ""
-            except Exception as exc:  # pylint: disable=broad-except
-                # Keep marching on even if this student couldn't be graded for
-                # some reason, but log it for future reference.
-                log.exception(
-                    'Cannot grade student %s (%s) in course %s because of exception: %s',
-                    student.username,
-                    student.id,
-                    course.id,
-                    exc.message
+    # Max scores of problems don't depend on the student, so they're shared by all batches
+    max_scores = {}
+    students = iter(students)
+    while True:
+        batch = list(islice(students, batch_size))
+        if not batch:
+            break
+
+        with manual_transaction():
+            bulk_scores = BulkScores(course, batch, max_scores)
+
+        for student in batch:
+            with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course.id)]):
+                try:
+                    request.user = student
+                    # Grading calls problem rendering, which calls masquerading,
+                    # which checks session vars -- thus the empty session dict below.
+                    # It's not pretty, but untangling that is currently beyond the
+                    # scope of this feature.
+                    request.session = {}
+                    gradeset = grade(student, request, course, keep_raw_scores, bulk_scores=bulk_scores)
+                    yield student, gradeset, ""
+                except Exception as exc:  # pylint: disable=broad-except
+                    # Keep marching on even if this student couldn't be graded for
+                    # some reason, but log it for future reference.
+                    log.exception(
+                        'Cannot grade student %s (%s) in course %s because of exception: %s',
+                        student.username,
+                        student.id,
+                        course.id,
+                        exc.message
+                    )
+                    yield student, {}, exc.message
+
+
+class BulkScores(object):
+    """
+    The score state of a batch of students in a course, loaded with a few
+    queries: their StudentModule scores (without the, possibly large, state)
+    and, if enabled, their persisted subsection grades. Their anonymous ids,
+    which the submissions API and module rendering need, are also resolved
+    together.
+
+    Also remembers the max scores of problems that had to be instantiated to
+    find them, since a capa problem's max score is fixed by its definition and
+    doesn't depend on the student. Once it is known, the problem isn't
+    instantiated again for students who haven't attempted it; only their
+    access to it is checked.
+    """
+    # Block types whose max score is the same for every student
+    STATIC_MAX_SCORE_TYPES = ('problem',)
+
+    def __init__(self, course, students, max_scores=None):
+        self.course_key = course.id
+        self.students = students
+        self.max_scores = max_scores if max_scores is not None else {}
+        self._persisted_grades = None
+        self._location_field = StudentModule._meta.get_field('module_state_key')
+
+        # the students' grades are computed from state read after this
+        self.loaded_at = now()
+        self.student_modules = defaultdict(dict)
+        student_modules = StudentModule.objects.filter(
+            course_id=self.course_key,
+            student__in=[student.id for student in students],
+        ).only('student', 'module_state_key', 'grade', 'max_grade')
+        for student_module in student_modules:
+            # Key by the stored form of the location, which is branch and version agnostic
+            key = self._location_field.get_prep_value(student_module.module_state_key)
+            self.student_modules[student_module.student_id][key] = student_module
+
+        # Remembered on the students, for anonymous_id_for_user to find
+        anonymous_ids_for_users(students, self.course_key)
+
+    def get_student_module(self, student, location):
+        """
+        Return the (partially loaded) StudentModule of `student` for `location`, or None.
+        """
+        return self.student_modules[student.id].get(self._location_field.get_prep_value(location))
+
+    def has_state(self, student, locations):
+        """
+        Whether `student` has a StudentModule for any of `locations`.
+        """
+        student_modules = self.student_modules[student.id]
+        return any(self._location_field.get_prep_value(location) in student_modules for location in locations)
+
+    def get_max_score(self, descriptor):
+        """
+        Return the known max score of the block `descriptor`, or None.
+        """
+        return self.max_scores.get(descriptor.location)
+
+    def set_max_score(self, descriptor, max_score):
+        """
+        Remember the max score of `descriptor`, if it's the same for all students.
+        """
+        if descriptor.location.block_type in self.STATIC_MAX_SCORE_TYPES:
+            self.max_scores[descriptor.location] = max_score
+
+    def persisted_grades(self, student, course_version):
+        """
+        Return the stored subsection grades of `student` (see PersistedGrades),
+        loading those of the whole batch on first use.
+        """
+        if self._persisted_grades is None:
+            with manual_transaction():
+                self._persisted_grades = PersistentSubsectionGrade.load_grades_for_users(
+                    self.students, self.course_key, course_version
                 )
-                yield student, {}, exc.message
+        return self._persisted_grades.get(student.id, {})
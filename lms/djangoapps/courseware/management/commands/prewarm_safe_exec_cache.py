@@ -0,0 +1,107 @@
+"""
+A Django command that fills the safe_exec cache with the results of the scripts of a course's
+problems, for every seed learners can get.
+
+Only problems with a small pool of seeds are prewarmed: problems that are never rerandomized
+(which always use the same seed) and problems rerandomized per student (which use one of
+NUM_RANDOMIZATION_BINS seeds). Problems whose scripts use the learner's anonymous_student_id
+can't share results between learners, so they are skipped.
+"""
+import logging
+from textwrap import dedent
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from capa.capa_problem import LoncapaProblem, LoncapaSystem
+from capa.safe_exec import SafeExecCache
+from edxmako.shortcuts import render_to_string
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip
+from xmodule.capa_base import NUM_RANDOMIZATION_BINS
+from xmodule.capa_base_constants import RANDOMIZATION
+from xmodule.contentstore.django import contentstore
+from xmodule.modulestore.django import modulestore, ModuleI18nService
+
+log = logging.getLogger(__name__)
+
+
+def problem_seeds(problem):
+    """
+    Return the seeds learners can get for `problem`, or None if there are too many of them to
+    prewarm.
+    """
+    if problem.rerandomize == RANDOMIZATION.NEVER:
+        return [1]
+    elif problem.rerandomize == RANDOMIZATION.PER_STUDENT:
+        return range(NUM_RANDOMIZATION_BINS)
+    return None
+
+
+class Command(BaseCommand):
+    """
+    Prewarm the safe_exec cache for the problems of a course.
+    """
+    args = "<course_id>"
+    help = dedent(__doc__).strip()
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError("course_id not specified")
+
+        try:
+            course_key = CourseKey.from_string(args[0])
+        except InvalidKeyError:
+            raise CommandError("Invalid course_id")
+
+        store = modulestore()
+        if store.get_course(course_key) is None:
+            raise CommandError("Invalid course_id")
+
+        prewarmed = skipped = failed = 0
+        for problem in store.get_items(course_key, qualifiers={'category': 'problem'}):
+            seeds = problem_seeds(problem)
+            if seeds is None or '<script' not in problem.data or 'anonymous_student_id' in problem.data:
+                skipped += 1
+                continue
+
+            for seed in seeds:
+                try:
+                    LoncapaProblem(
+                        problem_text=problem.data,
+                        id=problem.location.html_id(),
+                        capa_system=self._capa_system(problem, course_key, seed),
+                        seed=seed,
+                    )
+                except Exception:  # pylint: disable=broad-except
+                    log.exception(u"Unable to prewarm the safe_exec cache for %s", problem.location)
+                    failed += 1
+                    break
+            else:
+                prewarmed += 1
+
+        self.stdout.write(
+            u"Prewarmed {} problems, skipped {}, failed {}.\n".format(prewarmed, skipped, failed)
+        )
+
+    def _capa_system(self, problem, course_key, seed):
+        """
+        Return the LoncapaSystem to construct `problem` with, for no learner in particular.
+        """
+        return LoncapaSystem(
+            ajax_url=None,
+            anonymous_student_id=None,
+            cache=SafeExecCache(cache, stats_tags=[u'course_id:{}'.format(course_key)]),
+            can_execute_unsafe_code=lambda: can_execute_unsafe_code(course_key),
+            get_python_lib_zip=lambda: get_python_lib_zip(contentstore, course_key),
+            DEBUG=settings.DEBUG,
+            filestore=problem.runtime.resources_fs,
+            i18n=ModuleI18nService(),
+            node_path=settings.NODE_PATH,
+            render_template=render_to_string,
+            seed=seed,
+            STATIC_URL=settings.STATIC_URL,
+            xqueue=None,
+        )
@@ -0,0 +1,72 @@
+"""
+Tests of the prewarm_safe_exec_cache command.
+"""
+import textwrap
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from mock import patch
+
+from capa.problem_cache import PROBLEM_CACHE
+from capa.safe_exec import safe_exec
+from xmodule.capa_base import NUM_RANDOMIZATION_BINS
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+
+
+class PrewarmSafeExecCacheTest(ModuleStoreTestCase):
+    """
+    Tests of the prewarm_safe_exec_cache command.
+    """
+    problem_xml = textwrap.dedent("""
+        <problem>
+        <script type="loncapa/python">
+        answer = {}
+        </script>
+        <stringresponse answer="$answer">
+            <textline size="10"/>
+        </stringresponse>
+        </problem>
+    """)
+
+    def setUp(self):
+        super(PrewarmSafeExecCacheTest, self).setUp()
+        PROBLEM_CACHE.clear()
+        self.addCleanup(PROBLEM_CACHE.clear)
+        self.course = CourseFactory.create()
+
+    def add_problem(self, rerandomize, code='random.randint(0, 100)'):
+        """
+        Add a problem to the course, with a script setting the answer to `code`.
+        """
+        ItemFactory.create(
+            parent=self.course,
+            category='problem',
+            data=self.problem_xml.format(code),
+            metadata={'rerandomize': rerandomize},
+        )
+
+    def prewarm(self):
+        """
+        Run the command on the course, returning the number of times code was executed.
+        """
+        with patch('capa.capa_problem.safe_exec', wraps=safe_exec) as mock_exec:
+            call_command('prewarm_safe_exec_cache', unicode(self.course.id))
+        return mock_exec.call_count
+
+    def test_never_rerandomized(self):
+        self.add_problem('never')
+        self.assertEqual(self.prewarm(), 1)
+
+    def test_per_student(self):
+        self.add_problem('per_student')
+        self.assertEqual(self.prewarm(), NUM_RANDOMIZATION_BINS)
+
+    def test_skipped_problems(self):
+        self.add_problem('always')
+        self.add_problem('never', code='anonymous_student_id')
+        self.assertEqual(self.prewarm(), 0)
+
+    def test_invalid_course(self):
+        with self.assertRaises(CommandError):
+            call_command('prewarm_safe_exec_cache', 'not/a/course')
@@ -63,6 +63,9 @@ class FieldDataCache(object):
         '''
         self.cache = {}
         self.select_for_update = select_for_update
+        # usage ids whose StudentModules were added with add_student_modules,
+        # and so needn't be queried for
+        self._prefetched_usage_ids = set()
 
         if asides is None:
             self.asides = []
@@ -84,6 +87,17 @@ class FieldDataCache(object):
                 for field_object in self._retrieve_fields(scope, fields, descriptors):
                     self.cache[self._cache_key_from_field_object(scope, field_object)] = field_object
 
+    def add_student_modules(self, student_modules):
+        """
+        Add `student_modules`, StudentModules of this FieldDataCache's user that the
+        caller has already loaded, so that they aren't queried for again when their
+        descriptors are added.
+        """
+        for student_module in student_modules:
+            cache_key = self._cache_key_from_field_object(Scope.user_state, student_module)
+            self.cache[cache_key] = student_module
+            self._prefetched_usage_ids.add(cache_key[1])
+
     def add_descriptor_descendents(self, descriptor, depth=None, descriptor_filter=lambda descriptor: True):
         """
         Add all descendents of `descriptor` to this FieldDataCache.
@@ -202,7 +216,7 @@ class FieldDataCache(object):
             return self._chunked_query(
                 StudentModule,
                 'module_state_key__in',
-                self._all_usage_ids(descriptors),
+                self._all_usage_ids(descriptors) - self._prefetched_usage_ids,
                 course_id=self.course_id,
                 student=self.user.pk,
             )
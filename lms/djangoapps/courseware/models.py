@@ -12,18 +12,23 @@ file and check it in at the same time as your model changes. To do that,
 ASSUMPTIONS: modules have unique IDs, even across different module_types
 
 """
+import json
 import logging
+from collections import defaultdict
 
 from django.contrib.auth.models import User
 from django.conf import settings
-from django.db import models
-from django.db.models.signals import post_save
+from django.db import models, IntegrityError
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.dispatch import receiver, Signal
+from django.utils.timezone import now
 
 from model_utils.models import TimeStampedModel
 from student.models import user_by_anonymous_id
 from submissions.models import score_set, score_reset
 
+from opaque_keys.edx.keys import CourseKey, UsageKey
+from openedx.core.djangoapps.course_groups.models import CourseUserGroup, CourseUserGroupPartitionGroup
 from xmodule_django.models import CourseKeyField, LocationKeyField, BlockTypeKeyField  # pylint: disable=import-error
 
 log = logging.getLogger("edx.courseware")
@@ -256,6 +261,126 @@ class StudentFieldOverride(TimeStampedModel):
     value = models.TextField(default='null')
 
 
+class PersistentSubsectionGrade(TimeStampedModel):
+    """
+    Holds the scores a student has on the scorable blocks of one subsection of
+    a course, so that `courseware.grades` doesn't have to re-walk and
+    re-instantiate the subsection every time a grade is needed.
+
+    A row is only valid for the version of the course content it was computed
+    against (`course_version`). Rows are updated in place from SCORE_CHANGED
+    signals, and dropped when the student's state is deleted or their cohorts
+    change.
+    """
+    user = models.ForeignKey(User, db_index=True)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    usage_key = LocationKeyField(max_length=255)
+    course_version = models.CharField(max_length=255, blank=True)
+
+    # JSON list of score entries (see courseware.grades), or 'null' if the
+    # student never touched the subsection.
+    scores = models.TextField(default='null')
+
+    class Meta(object):  # pylint: disable=missing-docstring
+        unique_together = (('user', 'course_id', 'usage_key'),)
+
+    @classmethod
+    def load_grades(cls, user, course_id, course_version):
+        """
+        Return a dict mapping subsection usage keys to their stored score
+        entries, for all of `user`'s subsections in `course_id` which were
+        graded against `course_version`.
+        """
+        return {
+            grade.usage_key.map_into_course(course_id): json.loads(grade.scores)
+            for grade in cls.objects.filter(user=user, course_id=course_id, course_version=course_version)
+        }
+
+    @classmethod
+    def load_grades_for_users(cls, users, course_id, course_version):
+        """
+        Like `load_grades`, for several users at once. Returns a dict mapping
+        user ids to the stored grades of each user.
+        """
+        grades = defaultdict(dict)
+        for grade in cls.objects.filter(user__in=users, course_id=course_id, course_version=course_version):
+            grades[grade.user_id][grade.usage_key.map_into_course(course_id)] = json.loads(grade.scores)
+        return grades
+
+    @classmethod
+    def save_grades(cls, user, course_id, course_version, grades, computed_at):
+        """
+        Store `grades`, a dict mapping subsection usage keys to score entries
+        computed from the student's state as of `computed_at`, replacing any
+        rows previously stored for those subsections.
+
+        Since the student may answer while being graded, a row is only replaced
+        if it was stored before `computed_at`, and nothing is stored if the
+        student's state has changed since then. Rows changed in the meantime
+        (e.g. by `update_score`) are dropped instead, to be recomputed on next
+        use, as `grades` may not include the change.
+        """
+        state_changed = StudentModule.objects.filter(
+            student=user, course_id=course_id, modified__gte=computed_at
+        ).exists()
+        if state_changed:
+            return
+        for usage_key, scores in grades.iteritems():
+            fields = {'course_version': course_version, 'scores': json.dumps(scores), 'modified': now()}
+            rows = cls.objects.filter(user=user, course_id=course_id, usage_key=usage_key)
+            if rows.filter(modified__lt=computed_at).update(**fields):
+                continue
+            if rows.exists():
+                rows.delete()
+                continue
+            try:
+                cls.objects.create(user=user, course_id=course_id, usage_key=usage_key, **fields)
+            except IntegrityError:
+                # Another process has just stored this subsection, from state
+                # which may be newer than ours, so neither grade can be trusted
+                rows.delete()
+
+    @classmethod
+    def update_score(cls, user_id, course_id, usage_key, points_earned, points_possible):
+        """
+        Record a new raw score for the block `usage_key` in the stored grade of
+        whichever subsection contains it. If no stored subsection knows about
+        the block (e.g. it is the first one the student attempted in its
+        subsection), or the score was reset, all of the student's stored grades
+        for the course are dropped and will be recomputed on next use.
+        """
+        grades = cls.objects.filter(user_id=user_id, course_id=course_id)
+        if points_possible > 0:
+            usage_id = unicode(usage_key)
+            for grade in grades:
+                entries = json.loads(grade.scores) or []
+                for entry in entries:
+                    if entry['usage_key'] == usage_id:
+                        earned, possible = float(points_earned), float(points_possible)
+                        if entry['weight'] is not None:
+                            earned = earned * entry['weight'] / possible
+                            possible = entry['weight']
+                        entry['earned'], entry['possible'] = earned, possible
+                        grade.scores = json.dumps(entries)
+                        grade.save()
+                        return
+        grades.delete()
+
+    @classmethod
+    def clear_grades(cls, user_id, course_id):
+        """
+        Drop all of a student's stored grades for a course.
+        """
+        cls.objects.filter(user_id=user_id, course_id=course_id).delete()
+
+    @classmethod
+    def clear_grades_for_users(cls, user_ids, course_id):
+        """
+        Drop all stored grades for a course of each of the students `user_ids`.
+        """
+        cls.objects.filter(user_id__in=list(user_ids), course_id=course_id).delete()
+
+
 # Signal that indicates that a user's score for a problem has been updated.
 # This signal is generated when a scoring event occurs either within the core
 # platform or in the Submissions module. Note that this signal will be triggered
@@ -352,3 +477,70 @@ def submissions_score_reset_handler(sender, **kwargs):  # pylint: disable=unused
             u"Failed to process score_reset signal from Submissions API. "
             "user: %s, course_id: %s, usage_id: %s", user, course_id, usage_id
         )
+
+
+@receiver(SCORE_CHANGED)
+def persistent_grade_score_changed_handler(sender, **kwargs):  # pylint: disable=unused-argument
+    """
+    Keep the stored subsection grades (see PersistentSubsectionGrade) up to date
+    as scores change.
+    """
+    if not settings.FEATURES.get('ENABLE_PERSISTENT_GRADES'):
+        return
+    PersistentSubsectionGrade.update_score(
+        kwargs['user_id'],
+        CourseKey.from_string(kwargs['course_id']),
+        UsageKey.from_string(kwargs['usage_id']),
+        kwargs['points_earned'] or 0,
+        kwargs['points_possible'] or 0,
+    )
+
+
+@receiver(post_delete, sender=StudentModule)
+def persistent_grade_student_module_deleted_handler(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Deleting a student's state for a block (e.g. from the instructor dashboard)
+    doesn't send SCORE_CHANGED, so drop the student's stored grades instead.
+    """
+    if not settings.FEATURES.get('ENABLE_PERSISTENT_GRADES'):
+        return
+    PersistentSubsectionGrade.clear_grades(instance.student_id, instance.course_id)
+
+
+@receiver(m2m_changed, sender=CourseUserGroup.users.through)
+def persistent_grade_cohort_membership_changed_handler(sender, instance, action, reverse, pk_set, **kwargs):  # pylint: disable=unused-argument
+    """
+    Which blocks a student can access (and so is graded on) may depend on their
+    cohorts, so drop the stored grades of students added to or removed from a
+    cohort.
+    """
+    if not settings.FEATURES.get('ENABLE_PERSISTENT_GRADES'):
+        return
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        # `instance` is a user, `pk_set` the groups they were added to or removed from
+        if action == 'pre_clear':
+            groups = instance.course_groups.all()
+        else:
+            groups = CourseUserGroup.objects.filter(pk__in=pk_set)
+        for course_id in set(group.course_id for group in groups):
+            PersistentSubsectionGrade.clear_grades(instance.id, course_id)
+    else:
+        # `instance` is a group, `pk_set` the users added to or removed from it
+        if action == 'pre_clear':
+            pk_set = instance.users.values_list('id', flat=True)
+        PersistentSubsectionGrade.clear_grades_for_users(pk_set, instance.course_id)
+
+
+@receiver(post_save, sender=CourseUserGroupPartitionGroup)
+@receiver(post_delete, sender=CourseUserGroupPartitionGroup)
+def persistent_grade_cohort_partition_changed_handler(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drop the stored grades of a cohort's students when the partition group the
+    cohort is linked to changes.
+    """
+    if not settings.FEATURES.get('ENABLE_PERSISTENT_GRADES'):
+        return
+    group = instance.course_user_group
+    PersistentSubsectionGrade.clear_grades_for_users(group.users.values_list('id', flat=True), group.course_id)
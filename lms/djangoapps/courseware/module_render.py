@@ -29,8 +29,8 @@ from django.views.decorators.csrf import csrf_exempt
 import newrelic.agent
 
 from capa.xqueue_interface import XQueueInterface
-from courseware.access import has_access, get_user_role
-from courseware.masquerade import setup_masquerade
+from courseware.access import has_access, get_user_role, has_access_to_course_block, in_preview_mode
+from courseware.masquerade import get_masquerade_role, setup_masquerade
 from courseware.model_data import FieldDataCache, DjangoKeyValueStore
 from courseware.models import SCORE_CHANGED
 from courseware.entrance_exams import (
@@ -58,9 +58,7 @@ from xmodule.contentstore.django import contentstore
 from xmodule.modulestore.django import modulestore, ModuleI18nService
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from openedx.core.lib.xblock_utils import (
-    replace_course_urls,
-    replace_jump_to_id_urls,
-    replace_static_urls,
+    rewrite_urls,
     add_staff_markup,
     wrap_xblock,
     request_token
@@ -74,6 +72,7 @@ from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip
 from util import milestones_helpers
 from util.module_utils import yield_dynamic_descriptor_descendents
 from verify_student.services import ReverificationService
+from openedx.core.djangoapps.content.course_structures.course_blocks import get_course_blocks
 
 from .field_overrides import OverrideFieldData
 
@@ -139,6 +138,10 @@ def toc_for_course(request, course, active_chapter, active_section, field_data_c
     field_data_cache must include data from the course module and 2 levels of its descendents
     '''
 
+    course_blocks = _course_blocks_for_toc(request, course)
+    if course_blocks is not None:
+        return _toc_from_course_blocks(request, course, course_blocks, active_chapter, active_section)
+
     with modulestore().bulk_operations(course.id):
         course_module = get_module_for_descriptor(request.user, request, course, field_data_cache, course.id)
         if course_module is None:
@@ -147,12 +150,7 @@ def toc_for_course(request, course, active_chapter, active_section, field_data_c
         toc_chapters = list()
         chapters = course_module.get_display_items()
 
-        # See if the course is gated by one or more content milestones
-        required_content = milestones_helpers.get_required_content(course, request.user)
-
-        # The user may not actually have to complete the entrance exam, if one is required
-        if not user_must_complete_entrance_exam(request, request.user, course):
-            required_content = [content for content in required_content if not content == course.entrance_exam_id]
+        required_content = _required_content(request, course)
 
         for chapter in chapters:
             # Only show required content, if there is required content
@@ -189,6 +187,90 @@ def toc_for_course(request, course, active_chapter, active_section, field_data_c
         return toc_chapters
 
 
+def _required_content(request, course):
+    """
+    Return the locations (as strings) of the chapters the user is limited to by the content
+    milestones gating the course, or an empty list if the user isn't limited.
+    """
+    # See if the course is gated by one or more content milestones
+    required_content = milestones_helpers.get_required_content(course, request.user)
+
+    # The user may not actually have to complete the entrance exam, if one is required
+    if not user_must_complete_entrance_exam(request, request.user, course):
+        required_content = [content for content in required_content if not content == course.entrance_exam_id]
+    return required_content
+
+
+def _course_blocks_for_toc(request, course):
+    """
+    Return the cached summary of the chapters and sections of the course, or None if the table
+    of contents has to be built from the course's modules instead: when the summary isn't cached,
+    or when the user may see different blocks or field values than the summary records (because
+    of field overrides, masquerading, previewing draft content or partition group access).
+    """
+    if not settings.COURSE_BLOCKS_CACHE_TIMEOUT or settings.FIELD_OVERRIDE_PROVIDERS:
+        return None
+    if in_preview_mode() or get_masquerade_role(request.user, course.id) is not None:
+        return None
+
+    course_blocks = get_course_blocks(course)
+    if course_blocks is None or course_blocks['has_group_access']:
+        return None
+    return course_blocks
+
+
+def _toc_from_course_blocks(request, course, course_blocks, active_chapter, active_section):
+    """
+    Create the table of contents described by `toc_for_course` from the cached summary of the
+    chapters and sections of the course, without loading any of their modules.
+    """
+    user = request.user
+    if not has_access(user, 'load', course, course.id):
+        return None
+
+    staff_access = bool(has_access(user, 'staff', course, course.id))
+    is_beta_tester = CourseBetaTesterRole(course.id).has_user(user)
+
+    def can_load(block):
+        """
+        Return whether the user can load the chapter or section.
+        """
+        return has_access_to_course_block(user, block, course.id, staff_access, is_beta_tester)
+
+    required_content = _required_content(request, course)
+
+    toc_chapters = list()
+    for chapter in course_blocks['chapters']:
+        if not can_load(chapter):
+            continue
+
+        # Only show required content, if there is required content
+        if required_content and chapter['location'] not in required_content:
+            continue
+        if chapter['hide_from_toc']:
+            continue
+
+        sections = list()
+        for section in chapter['sections']:
+            if section['hide_from_toc'] or not can_load(section):
+                continue
+            sections.append({
+                'display_name': section['display_name'],
+                'url_name': section['url_name'],
+                'format': section['format'] if section['format'] is not None else '',
+                'due': section['due'],
+                'active': chapter['url_name'] == active_chapter and section['url_name'] == active_section,
+                'graded': section['graded'],
+            })
+        toc_chapters.append({
+            'display_name': chapter['display_name'],
+            'url_name': chapter['url_name'],
+            'sections': sections,
+            'active': chapter['url_name'] == active_chapter
+        })
+    return toc_chapters
+
+
 def get_module(user, request, usage_key, field_data_cache,
                position=None, log_if_not_found=True, wrap_xmodule_display=True,
                grade_bucket_type=None, depth=0,
@@ -552,28 +634,23 @@ def get_module_system_for_user(user, field_data_cache,
     # prefix is going to have to be specific to the module, not the directory
     # that the xml was loaded from
 
-    # Rewrite urls beginning in /static to point to course-specific content
-    block_wrappers.append(partial(
-        replace_static_urls,
-        getattr(descriptor, 'data_dir', None),
-        course_id=course_id,
-        static_asset_path=static_asset_path or descriptor.static_asset_path
-    ))
-
-    # Allow URLs of the form '/course/' refer to the root of multicourse directory
-    #   hierarchy of this course
-    block_wrappers.append(partial(replace_course_urls, course_id))
-
-    # this will rewrite intra-courseware links (/jump_to_id/<id>). This format
+    # Rewrite urls beginning in /static to point to course-specific content,
+    # allow URLs of the form '/course/' refer to the root of multicourse directory
+    #   hierarchy of this course,
+    # and rewrite intra-courseware links (/jump_to_id/<id>). This format
     # is an improvement over the /course/... format for studio authored courses,
     # because it is agnostic to course-hierarchy.
     # NOTE: module_id is empty string here. The 'module_id' will get assigned in the replacement
     # function, we just need to specify something to get the reverse() to work.
-    block_wrappers.append(partial(
-        replace_jump_to_id_urls,
+    url_rewriter = static_replace.CourseUrlRewriter.for_course(
         course_id,
-        reverse('jump_to_id', kwargs={'course_id': course_id.to_deprecated_string(), 'module_id': ''}),
-    ))
+        data_directory=getattr(descriptor, 'data_dir', None),
+        static_asset_path=static_asset_path or descriptor.static_asset_path,
+        jump_to_id_base_url=reverse(
+            'jump_to_id', kwargs={'course_id': course_id.to_deprecated_string(), 'module_id': ''}
+        ),
+    )
+    block_wrappers.append(partial(rewrite_urls, url_rewriter))
 
     if settings.FEATURES.get('DISPLAY_DEBUG_INFO_TO_STAFF'):
         if has_access(user, 'staff', descriptor, course_id):
@@ -612,12 +689,7 @@ def get_module_system_for_user(user, field_data_cache,
         # TODO (cpennington): This should be removed when all html from
         # a module is coming through get_html and is therefore covered
         # by the replace_static_urls code below
-        replace_urls=partial(
-            static_replace.replace_static_urls,
-            data_directory=getattr(descriptor, 'data_dir', None),
-            course_id=course_id,
-            static_asset_path=static_asset_path or descriptor.static_asset_path,
-        ),
+        replace_urls=url_rewriter.replace_static_urls,
         replace_course_urls=partial(
             static_replace.replace_course_urls,
             course_key=course_id
@@ -4,7 +4,12 @@ by the individual due dates feature.
 """
 import json
 
-from .field_overrides import FieldOverrideProvider
+from .field_overrides import (
+    FieldOverrideProvider,
+    get_cached_overrides,
+    invalidate_cached_overrides,
+    overrides_location_key,
+)
 from .models import StudentFieldOverride
 
 
@@ -38,19 +43,54 @@ def _get_overrides_for_user(user, block):
     Gets all of the individual student overrides for given user and block.
     Returns a dictionary of field override values keyed by field name.
     """
-    query = StudentFieldOverride.objects.filter(
-        course_id=block.runtime.course_id,
-        location=block.location,
-        student_id=user.id,
-    )
+    course_overrides = _get_course_overrides_for_user(user, block.runtime.course_id)
     overrides = {}
-    for override in query:
-        field = block.fields[override.field]
-        value = field.from_json(json.loads(override.value))
-        overrides[override.field] = value
+    for field_name, value in course_overrides.get(overrides_location_key(block.location), {}).iteritems():
+        field = block.fields[field_name]
+        overrides[field_name] = field.from_json(json.loads(value))
     return overrides
 
 
+def _get_course_overrides_for_user(user, course_id):
+    """
+    Gets all of the individual student overrides for the given user in the
+    given course, with a single query.  Returns a dictionary mapping block
+    locations to dictionaries of JSON encoded field values keyed by field name.
+    """
+    def load_overrides():
+        """
+        Loads the overrides from the database.
+        """
+        query = StudentFieldOverride.objects.filter(
+            course_id=course_id,
+            student_id=user.id,
+        ).values_list('location', 'field', 'value')
+        overrides = {}
+        for location, field, value in query:
+            overrides.setdefault(unicode(location), {})[field] = value
+        return overrides
+
+    return get_cached_overrides(_overrides_cache_key(user, course_id), load_overrides)
+
+
+def _overrides_cache_key(user, course_id):
+    """
+    Returns the key the overrides for the given user and course are cached
+    under.
+    """
+    return u'student_field_overrides.{}.{}'.format(user.id, overrides_location_key(course_id))
+
+
+def _overrides_changed(user, block):
+    """
+    Drops the cached overrides for the given user, after one of the overrides
+    on `block` has been set or cleared.
+    """
+    invalidate_cached_overrides(_overrides_cache_key(user, block.runtime.course_id))
+    if hasattr(block, '_student_overrides'):
+        block._student_overrides.pop(user.id, None)  # pylint: disable=protected-access
+
+
 def override_field_for_user(user, block, name, value):
     """
     Overrides a field for the `user`.  `block` and `name` specify the block
@@ -65,6 +105,7 @@ def override_field_for_user(user, block, name, value):
     field = block.fields[name]
     override.value = json.dumps(field.to_json(value))
     override.save()
+    _overrides_changed(user, block)
 
 
 def clear_override_for_user(user, block, name):
@@ -80,5 +121,6 @@ def clear_override_for_user(user, block, name):
             student_id=user.id,
             location=block.location,
             field=name).delete()
+        _overrides_changed(user, block)
     except StudentFieldOverride.DoesNotExist:
         pass
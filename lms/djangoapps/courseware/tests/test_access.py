@@ -18,6 +18,7 @@ from xmodule.course_module import (
 )
 from xmodule.modulestore.tests.factories import CourseFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.partitions.partitions import Group, UserPartition
 
 from util.milestones_helpers import (
     set_prerequisite_courses,
@@ -136,6 +137,35 @@ class AccessTestCase(LoginEnrollmentTestCase, ModuleStoreTestCase):
         with self.assertRaises(ValueError):
             access._has_access_descriptor(user, 'not_load_or_staff', descriptor)
 
+    def test_has_access_to_course_block_group_access(self):
+        """
+        Tests the group access check of block summaries.
+        """
+        alpha = Group(1, 'Alpha')
+        scheme = Mock(get_group_for_user=Mock(return_value=None))
+        scheme.name = 'cohort'
+        partitions = [UserPartition(0, 'Content Groups', '', [alpha], scheme=scheme)]
+        block = {
+            'visible_to_staff_only': False, 'start': None, 'days_early_for_beta': None,
+            'merged_group_access': {0: [alpha.id]},
+        }
+        course_key = self.course.course_key
+
+        # Students outside the group are denied, but staff are not
+        self.assertFalse(access.has_access_to_course_block(self.student, block, course_key, False, False, partitions))
+        self.assertTrue(access.has_access_to_course_block(self.student, block, course_key, True, False, partitions))
+
+        # Students in the group are allowed
+        scheme.get_group_for_user.return_value = alpha
+        self.assertTrue(access.has_access_to_course_block(self.student, block, course_key, False, False, partitions))
+
+        # Without the course's partitions, group access can't be checked, so it's denied
+        self.assertFalse(access.has_access_to_course_block(self.student, block, course_key, False, False))
+
+        # Summaries without group access don't need the partitions
+        del block['merged_group_access']
+        self.assertTrue(access.has_access_to_course_block(self.student, block, course_key, False, False))
+
     @patch.dict('django.conf.settings.FEATURES', {'DISABLE_START_DATES': False})
     def test__has_access_descriptor_staff_lock(self):
         """
@@ -131,6 +131,14 @@ class TestStudentModuleStorage(OtherUserFailureTestMixin, TestCase):
         with self.assertNumQueries(0):
             self.assertRaises(KeyError, self.kvs.get, user_state_key('not_a_field'))
 
+    def test_add_loaded_student_module(self):
+        "Test that a StudentModule the caller has already loaded isn't queried for again"
+        field_data_cache = FieldDataCache([], course_id, self.user)
+        field_data_cache.add_student_modules([StudentModule.objects.get(student=self.user)])
+        with self.assertNumQueries(0):
+            field_data_cache.add_descriptors_to_cache([mock_descriptor([mock_field(Scope.user_state, 'a_field')])])
+        self.assertEquals('a_value', DjangoKeyValueStore(field_data_cache).get(user_state_key('a_field')))
+
     def test_set_existing_field(self):
         "Test that setting an existing user_state field changes the value"
         # We are updating a problem, so we write to courseware_studentmodulehistory
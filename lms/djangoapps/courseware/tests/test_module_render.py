@@ -5,6 +5,7 @@ Test for lms courseware app, module render unit
 import ddt
 import itertools
 import json
+from datetime import datetime, timedelta
 from nose.plugins.attrib import attr
 from functools import partial
 
@@ -15,6 +16,7 @@ from django.conf import settings
 from django.test.client import RequestFactory
 from django.test.utils import override_settings
 from django.contrib.auth.models import AnonymousUser
+from django.utils.timezone import UTC
 from mock import MagicMock, patch, Mock
 from opaque_keys.edx.keys import UsageKey, CourseKey
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
@@ -600,6 +602,59 @@ class TestTOC(ModuleStoreTestCase):
                 self.assertIn(toc_section, actual)
 
 
+@attr('shard_1')
+@ddt.ddt
+@patch.dict('django.conf.settings.FEATURES', {'DISABLE_START_DATES': False})
+class TestTOCFromCourseBlocks(ModuleStoreTestCase):
+    """
+    Check that the Table of Contents built from the cached course blocks matches the one built
+    from the course's modules.
+    """
+    def setUp(self):
+        super(TestTOCFromCourseBlocks, self).setUp()
+        tomorrow = datetime.now(UTC()) + timedelta(days=1)
+        self.course = CourseFactory.create(start=datetime(2000, 1, 1, tzinfo=UTC()))
+        self.chapter = ItemFactory.create(parent=self.course, category='chapter', display_name='Chapter')
+        ItemFactory.create(
+            parent=self.chapter, category='sequential', display_name='Released', format='Homework', graded=True
+        )
+        ItemFactory.create(parent=self.chapter, category='sequential', display_name='Unreleased', start=tomorrow)
+        ItemFactory.create(
+            parent=self.chapter, category='sequential', display_name='Staff Only', visible_to_staff_only=True
+        )
+        ItemFactory.create(parent=self.chapter, category='sequential', display_name='Hidden', hide_from_toc=True)
+        ItemFactory.create(parent=self.course, category='chapter', display_name='Unreleased', start=tomorrow)
+        self.request = RequestFactory().get('/')
+
+    def toc(self, user):
+        """
+        Return the Table of Contents of the course for the user, with the first section active.
+        """
+        self.request.user = user
+        course = self.store.get_course(self.course.id, depth=2)
+        field_data_cache = FieldDataCache.cache_for_descriptor_descendents(self.course.id, user, course, depth=2)
+        return render.toc_for_course(
+            self.request, course, self.chapter.url_name, 'Released', field_data_cache
+        )
+
+    @ddt.data(UserFactory, GlobalStaffFactory)
+    def test_toc_matches_modules(self, user_factory):
+        user = user_factory.create()
+        expected = self.toc(user)
+        with override_settings(COURSE_BLOCKS_CACHE_TIMEOUT=60):
+            toc_from_course_blocks = render._toc_from_course_blocks  # pylint: disable=protected-access
+            with patch.object(render, '_toc_from_course_blocks', wraps=toc_from_course_blocks) as from_blocks:
+                self.assertEqual(self.toc(user), expected)
+                self.assertTrue(from_blocks.called)
+
+    def test_toc_hides_unavailable_sections(self):
+        with override_settings(COURSE_BLOCKS_CACHE_TIMEOUT=60):
+            toc = self.toc(UserFactory.create())
+        self.assertEqual([chapter['display_name'] for chapter in toc], ['Chapter'])
+        self.assertEqual([section['display_name'] for section in toc[0]['sections']], ['Released'])
+        self.assertTrue(toc[0]['sections'][0]['active'])
+
+
 @attr('shard_1')
 @ddt.ddt
 class TestHtmlModifiers(ModuleStoreTestCase):
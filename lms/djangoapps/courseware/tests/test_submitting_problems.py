@@ -9,8 +9,9 @@ from textwrap import dedent
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.urlresolvers import reverse
+from django.db import IntegrityError
 from django.test.client import RequestFactory
-from mock import patch
+from mock import Mock, patch
 from nose.plugins.attrib import attr
 
 from capa.tests.response_xml_factory import (
@@ -18,9 +19,12 @@ from capa.tests.response_xml_factory import (
     CodeResponseXMLFactory,
 )
 from courseware import grades
-from courseware.models import StudentModule
+from courseware.models import StudentModule, PersistentSubsectionGrade
 from courseware.tests.helpers import LoginEnrollmentTestCase
 from lms.djangoapps.lms_xblock.runtime import quote_slashes
+from openedx.core.djangoapps.course_groups.cohorts import set_course_cohort_settings
+from openedx.core.djangoapps.course_groups.models import CourseUserGroupPartitionGroup
+from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory
 from student.tests.factories import UserFactory
 from student.models import anonymous_id_for_user
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
@@ -554,6 +558,76 @@ class TestCourseGrader(TestSubmittingProblems):
         for name in self.hw2_names:
             self.submit_question_answer(name, {'2_1': 'Correct'})
 
+    def test_iterate_grades_for(self):
+        """
+        Check that batched grading agrees with grading students one at a time.
+        """
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        self.submit_question_answer('p2', {'2_1': 'Incorrect'})
+        other_student = UserFactory.create()
+
+        gradesets = {
+            student.id: gradeset
+            for student, gradeset, _ in grades.iterate_grades_for(
+                self.course, [self.student_user, other_student], keep_raw_scores=True, batch_size=1
+            )
+        }
+        self.assertEqual(gradesets[self.student_user.id]['percent'], 0.33)
+        self.assertEqual(gradesets[other_student.id]['percent'], 0)
+        self.assertEqual(
+            sorted(score.earned for score in gradesets[self.student_user.id]['raw_scores']),
+            [0.0, 0.0, 1.0]
+        )
+
+    def test_iterate_grades_for_group_restricted_problem(self):
+        """
+        Check that batched grading doesn't count a problem against students
+        outside its content group, once its max score is known.
+        """
+        self.basic_setup()
+        partition = UserPartition(
+            0, 'Content Groups', '', [Group(1, 'Alpha'), Group(2, 'Beta')], scheme_id='cohort'
+        )
+        self.course.user_partitions = [partition]
+        self.update_course(self.course, self.student_user.id)
+        set_course_cohort_settings(self.course.id, is_cohorted=True)
+        self.add_dropdown_to_section(self.homework.location, 'alpha_only', 1)
+        problem = self.store.get_item(self.problem_location('alpha_only'))
+        problem.group_access = {partition.id: [1]}
+        self.store.update_item(problem, self.student_user.id)
+        self.refresh_course()
+
+        other_student = UserFactory.create()
+        for group_id, user in [(1, self.student_user), (2, other_student)]:
+            cohort = CohortFactory(course_id=self.course.id, users=[user])
+            CourseUserGroupPartitionGroup.objects.create(
+                course_user_group=cohort, partition_id=partition.id, group_id=group_id
+            )
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+
+        gradesets = {
+            student.id: gradeset
+            for student, gradeset, _ in grades.iterate_grades_for(
+                self.course, [self.student_user, other_student], keep_raw_scores=True
+            )
+        }
+        self.assertEqual(len(gradesets[self.student_user.id]['raw_scores']), 4)
+        self.assertEqual(gradesets[self.student_user.id]['percent'], 0.25)
+        self.assertEqual(len(gradesets[other_student.id]['raw_scores']), 3)
+
+    def test_unattempted_problem_not_instantiated_once_max_score_known(self):
+        self.basic_setup()
+        problem = self.store.get_item(self.problem_location('p1'))
+        bulk_scores = grades.BulkScores(self.course, [self.student_user], max_scores={problem.location: 1.0})
+        module_creator = Mock()
+
+        self.assertEqual(
+            grades.get_score(self.course.id, self.student_user, problem, module_creator, bulk_scores=bulk_scores),
+            (0.0, 1.0)
+        )
+        self.assertFalse(module_creator.called)
+
     def test_dropping_grades_normally(self):
         """
         Test that the dropping policy does not change things before it should.
@@ -595,6 +669,125 @@ class TestCourseGrader(TestSubmittingProblems):
         self.assertEqual(self.score_for_hw('homework3'), [1.0, 1.0])
 
 
+@attr('shard_1')
+@patch.dict('django.conf.settings.FEATURES', {'ENABLE_PERSISTENT_GRADES': True})
+class TestPersistentCourseGrader(TestCourseGrader):
+    """
+    Runs the course grader tests with subsection grades persisted between
+    calls, and checks that the stored grades follow the student's answers.
+    """
+    def stored_grades(self):
+        """
+        Return the stored subsection grades of the student, by subsection url_name.
+        """
+        return {
+            grade.usage_key.block_id: json.loads(grade.scores)
+            for grade in PersistentSubsectionGrade.objects.filter(user=self.student_user, course_id=self.course.id)
+        }
+
+    def test_grades_stored_and_updated(self):
+        self.basic_setup()
+        self.check_grade_percent(0)
+        # the homework hasn't been touched yet
+        self.assertIsNone(self.stored_grades()[self.homework.location.block_id])
+
+        # a first answer in the subsection invalidates its stored grade
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        self.assertEqual(self.stored_grades(), {})
+        self.check_grade_percent(0.33)
+        self.assertEqual(
+            sorted(entry['earned'] for entry in self.stored_grades()[self.homework.location.block_id]),
+            [0.0, 0.0, 1.0]
+        )
+
+        # later answers update the stored grade in place
+        self.submit_question_answer('p2', {'2_1': 'Correct'})
+        self.assertEqual(
+            sorted(entry['earned'] for entry in self.stored_grades()[self.homework.location.block_id]),
+            [0.0, 1.0, 1.0]
+        )
+        self.check_grade_percent(0.67)
+        self.assertEqual(self.score_for_hw('homework'), [1.0, 1.0, 0.0])
+
+    def test_stored_grades_ignored_after_course_change(self):
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        self.check_grade_percent(0.33)
+
+        self.add_dropdown_to_section(self.homework.location, 'p4', 1)
+        self.refresh_course()
+        self.check_grade_percent(0.25)
+
+    def test_deleting_state_clears_stored_grades(self):
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        self.check_grade_percent(0.33)
+
+        StudentModule.objects.filter(student=self.student_user).delete()
+        self.assertEqual(self.stored_grades(), {})
+        self.check_grade_percent(0)
+
+    def test_grades_stored_concurrently(self):
+        """
+        Check that grading doesn't fail when another process stores the same
+        subsection grade first, and that neither grade is kept.
+        """
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+
+        def create_concurrently(**kwargs):
+            """
+            Store a grade for the subsection, as if from another process, then
+            fail like the unique constraint would.
+            """
+            PersistentSubsectionGrade(
+                user=kwargs['user'], course_id=kwargs['course_id'], usage_key=kwargs['usage_key'], scores='null'
+            ).save()
+            raise IntegrityError()
+
+        with patch.object(PersistentSubsectionGrade.objects, 'create', side_effect=create_concurrently):
+            self.check_grade_percent(0.33)
+        self.assertNotIn(self.homework.location.block_id, self.stored_grades())
+        self.check_grade_percent(0.33)
+
+    def test_stale_grades_not_stored(self):
+        """
+        Check that a grade computed before the student answers doesn't replace
+        the stored grade the answer updated.
+        """
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        self.check_grade_percent(0.33)
+
+        grade_store = grades.PersistedGrades(self.student_user, self.course)
+        self.submit_question_answer('p2', {'2_1': 'Correct'})
+        grade_store.set_section(self.homework.location, grade_store.get_section(self.homework.location))
+        grade_store.save()
+        self.check_grade_percent(0.67)
+
+        grade_store = grades.PersistedGrades(self.student_user, self.course)
+        PersistentSubsectionGrade.update_score(
+            self.student_user.id, self.course.id, self.problem_location('p3'), 1, 1
+        )
+        grade_store.set_section(self.homework.location, grade_store.get_section(self.homework.location))
+        grade_store.save()
+        self.assertNotIn(self.homework.location.block_id, self.stored_grades())
+
+    def test_cohort_change_clears_stored_grades(self):
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        self.check_grade_percent(0.33)
+        self.assertNotEqual(self.stored_grades(), {})
+
+        cohort = CohortFactory(course_id=self.course.id, users=[self.student_user])
+        self.assertEqual(self.stored_grades(), {})
+        self.check_grade_percent(0.33)
+        self.assertNotEqual(self.stored_grades(), {})
+
+        cohort.users.remove(self.student_user)
+        self.assertEqual(self.stored_grades(), {})
+
+
 @attr('shard_1')
 class ProblemWithUploadedFilesTest(TestSubmittingProblems):
     """Tests of problems with uploaded files."""
@@ -975,6 +1168,19 @@ class TestAnswerDistributions(TestSubmittingProblems):
             }
         )
 
+    @patch('courseware.grades.ANSWER_DISTRIBUTION_CHUNK_SIZE', 2)
+    def test_multiple_students_in_chunks(self):
+        self.test_multiple_students()
+
+    def test_problems_loaded_together(self):
+        # The course's problems are all loaded up front, rather than one at a time.
+        self.submit_question_answer('p1', {'2_1': u'Correct'})
+        self.submit_question_answer('p2', {'2_1': u'Incorrect'})
+
+        with patch.object(self.store, 'get_item') as mock_get_item:
+            self.assertEqual(len(grades.answer_distributions(self.course.id)), 2)
+        self.assertFalse(mock_get_item.called)
+
     def test_other_data_types(self):
         # We'll submit one problem, and then muck with the student_answers
         # dict inside its state to try different data types (str, int, float,
@@ -45,21 +45,21 @@ def get_course_topics(course_key, user):
         Get the sort key for the module (falling back to the discussion_target
         setting if absent)
         """
-        return module.sort_key or module.discussion_target
+        return module['sort_key'] or module['discussion_target']
 
     course = _get_course_or_404(course_key, user)
     discussion_modules = get_accessible_discussion_modules(course, user)
     modules_by_category = defaultdict(list)
     for module in discussion_modules:
-        modules_by_category[module.discussion_category].append(module)
+        modules_by_category[module['discussion_category']].append(module)
     courseware_topics = [
         {
             "id": None,
             "name": category,
             "children": [
                 {
-                    "id": module.discussion_id,
-                    "name": module.discussion_target,
+                    "id": module['discussion_id'],
+                    "name": module['discussion_target'],
                     "children": [],
                 }
                 for module in sorted(modules_by_category[category], key=get_module_sort_key)
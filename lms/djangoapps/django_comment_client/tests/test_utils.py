@@ -2,6 +2,7 @@
 import datetime
 import json
 import mock
+import threading
 from nose.plugins.attrib import attr
 from pytz import UTC
 from django.utils.timezone import UTC as django_utc
@@ -11,6 +12,8 @@ from django_comment_client.tests.unicode import UnicodeTestMixin
 import django_comment_client.utils as utils
 from django.core.urlresolvers import reverse
 from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import translation
 from edxmako import add_lookup
 
 from django_comment_client.tests.factories import RoleFactory
@@ -23,6 +26,7 @@ from student.tests.factories import UserFactory, CourseEnrollmentFactory
 from openedx.core.djangoapps.util.testing import ContentGroupTestCase
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+import lms.lib.comment_client.utils as cc_utils
 
 
 @attr('shard_1')
@@ -930,6 +934,28 @@ class ContentGroupCategoryMapTestCase(CategoryMapTestMixin, ContentGroupTestCase
             requesting_user=self.non_cohorted_user
         )
 
+    @override_settings(COURSE_BLOCKS_CACHE_TIMEOUT=60)
+    @mock.patch('django_comment_client.utils.course_blocks_version', mock.Mock(return_value='version'))
+    def test_cached_modules_filtered_per_user(self):
+        """
+        Verify that the discussion modules are loaded once per version of
+        the course, and still filtered by each user's content groups.
+        """
+        self.assertItemsEqual(
+            utils.get_discussion_categories_ids(self.course, self.alpha_user),
+            ['i4x-org-number-course-run', 'alpha_group_discussion', 'global_group_discussion']
+        )
+        with mock.patch('django_comment_client.utils._generate_discussion_modules') as mock_generate:
+            self.assertItemsEqual(
+                utils.get_discussion_categories_ids(self.course, self.beta_user),
+                ['i4x-org-number-course-run', 'beta_group_discussion', 'global_group_discussion']
+            )
+            self.assertItemsEqual(
+                utils.get_discussion_categories_ids(self.course, self.non_cohorted_user),
+                ['i4x-org-number-course-run', 'global_group_discussion']
+            )
+            self.assertFalse(mock_generate.called)
+
 
 class JsonResponseTestCase(TestCase, UnicodeTestMixin):
     def _test_unicode_data(self, text):
@@ -951,3 +977,38 @@ class RenderMustacheTests(TestCase):
         """
         add_lookup('main', '', package=__name__)
         self.assertEqual(utils.render_mustache('test.mustache', {}), 'Testing 1 2 3.\n')
+
+
+@attr('shard_1')
+class PerformConcurrentlyTests(TestCase):
+    """
+    Test the comment client's `perform_concurrently` utility function.
+    """
+    @override_settings(COMMENTS_SERVICE_CONCURRENCY=4)
+    def test_concurrent(self):
+        calling_thread = threading.current_thread()
+        with translation.override('eo'):
+            results = cc_utils.perform_concurrently(
+                lambda: (1, threading.current_thread() is calling_thread),
+                lambda: (2, translation.get_language()),
+                lambda: (3, cc_utils.perform_concurrently(lambda: 4)),
+            )
+        self.assertEqual(results, [(1, False), (2, 'eo'), (3, [4])])
+
+    @override_settings(COMMENTS_SERVICE_CONCURRENCY=4)
+    def test_concurrent_error(self):
+        def fail():
+            """Raise a comment client error."""
+            raise cc_utils.CommentClientRequestError('not found', 404)
+
+        with self.assertRaises(cc_utils.CommentClientRequestError):
+            cc_utils.perform_concurrently(lambda: 1, fail)
+
+    @override_settings(COMMENTS_SERVICE_CONCURRENCY=1)
+    def test_serial(self):
+        calling_thread = threading.current_thread()
+        results = cc_utils.perform_concurrently(
+            lambda: threading.current_thread() is calling_thread,
+            lambda: threading.current_thread() is calling_thread,
+        )
+        self.assertEqual(results, [True, True])
@@ -4,25 +4,30 @@ import json
 import logging
 
 import pytz
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.db import connection
 from django.http import HttpResponse
 from django.utils.timezone import UTC
 import pystache_custom as pystache
 from opaque_keys.edx.locations import i4xEncoder
-from opaque_keys.edx.keys import CourseKey
+from opaque_keys.edx.keys import CourseKey, UsageKey
+from request_cache.middleware import RequestCache
 from xmodule.modulestore.django import modulestore
 
 from django_comment_common.models import Role, FORUM_ROLE_STUDENT
 from django_comment_client.permissions import check_permissions_by_view, cached_has_permission
 from edxmako import lookup_template
 
-from courseware.access import has_access
+from courseware.access import has_access, has_access_to_course_block
+from openedx.core.djangoapps.content.course_structures.course_blocks import course_blocks_version
 from openedx.core.djangoapps.course_groups.cohorts import (
     get_course_cohort_settings, get_cohort_by_id, get_cohort_id, is_commentable_cohorted, is_course_cohorted
 )
 from openedx.core.djangoapps.course_groups.models import CourseUserGroup
+from student.roles import CourseBetaTesterRole
 
 
 log = logging.getLogger(__name__)
@@ -61,10 +66,28 @@ def has_forum_access(uname, course_id, rolename):
     return role.users.filter(username=uname).exists()
 
 
-def get_accessible_discussion_modules(course, user, include_all=False):  # pylint: disable=invalid-name
+def _discussion_module_summary(module):
     """
-    Return a list of all valid discussion modules in this course that
-    are accessible to the given user.
+    Return the fields of the discussion `module` that the category map and the access checks
+    of `has_access_to_course_block` need.
+    """
+    return {
+        'location': unicode(module.location),
+        'discussion_id': module.discussion_id,
+        'discussion_target': module.discussion_target,
+        'discussion_category': module.discussion_category,
+        'sort_key': module.sort_key,
+        'start': module.start,
+        'days_early_for_beta': module.days_early_for_beta,
+        'visible_to_staff_only': module.visible_to_staff_only,
+        'merged_group_access': getattr(module, 'merged_group_access', None),
+    }
+
+
+def _generate_discussion_modules(course):
+    """
+    Return the summaries (see `_discussion_module_summary`) of all the valid discussion modules
+    in this course.
     """
     all_modules = modulestore().get_items(course.id, qualifiers={'category': 'discussion'})
 
@@ -75,9 +98,48 @@ def get_accessible_discussion_modules(course, user, include_all=False):  # pylin
                 return False
         return True
 
+    return [_discussion_module_summary(module) for module in all_modules if has_required_keys(module)]
+
+
+def _get_discussion_modules(course):
+    """
+    Return the summaries of all the valid discussion modules in this course.
+
+    Like the course blocks, they are cached per version of the course's content (for
+    COURSE_BLOCKS_CACHE_TIMEOUT seconds, and for the rest of the request), so that they
+    don't need to be loaded from the modulestore on every forum request.
+    """
+    version = course_blocks_version(course)
+    timeout = getattr(settings, 'COURSE_BLOCKS_CACHE_TIMEOUT', 0)
+    if version is None or not timeout:
+        return _generate_discussion_modules(course)
+
+    cache_key = u'discussion_modules.{}.{}'.format(course.id, version)
+    request_cache = RequestCache.get_request_cache().data.setdefault('discussion_modules', {})
+    modules = request_cache.get(cache_key)
+    if modules is None:
+        modules = cache.get(cache_key)
+        if modules is None:
+            modules = _generate_discussion_modules(course)
+            cache.set(cache_key, modules, timeout)
+        request_cache[cache_key] = modules
+    return modules
+
+
+def get_accessible_discussion_modules(course, user, include_all=False):  # pylint: disable=invalid-name
+    """
+    Return a list of the summaries (see `_discussion_module_summary`) of all valid
+    discussion modules in this course that are accessible to the given user.
+    """
+    modules = _get_discussion_modules(course)
+    if include_all or not modules:
+        return modules
+
+    staff_access = bool(has_access(user, 'staff', course, course.id))
+    is_beta_tester = CourseBetaTesterRole(course.id).has_user(user)
     return [
-        module for module in all_modules
-        if has_required_keys(module) and (include_all or has_access(user, 'load', module, course.id))
+        module for module in modules
+        if has_access_to_course_block(user, module, course.id, staff_access, is_beta_tester, course.user_partitions)
     ]
 
 
@@ -87,10 +149,11 @@ def get_discussion_id_map(course, user):
     by discussion_id.
     """
     def get_entry(module):  # pylint: disable=missing-docstring
-        discussion_id = module.discussion_id
-        title = module.discussion_target
-        last_category = module.discussion_category.split("/")[-1].strip()
-        return (discussion_id, {"location": module.location, "title": last_category + " / " + title})
+        discussion_id = module['discussion_id']
+        title = module['discussion_target']
+        last_category = module['discussion_category'].split("/")[-1].strip()
+        location = UsageKey.from_string(module['location'])
+        return (discussion_id, {"location": location, "title": last_category + " / " + title})
 
     return dict(map(get_entry, get_accessible_discussion_modules(course, user)))
 
@@ -197,12 +260,12 @@ def get_discussion_category_map(course, user, cohorted_if_in_list=False, exclude
     course_cohort_settings = get_course_cohort_settings(course.id)
 
     for module in modules:
-        id = module.discussion_id
-        title = module.discussion_target
-        sort_key = module.sort_key
-        category = " / ".join([x.strip() for x in module.discussion_category.split("/")])
+        id = module['discussion_id']
+        title = module['discussion_target']
+        sort_key = module['sort_key']
+        category = " / ".join([x.strip() for x in module['discussion_category'].split("/")])
         # Handle case where module.start is None
-        entry_start_date = module.start if module.start else datetime.max.replace(tzinfo=pytz.UTC)
+        entry_start_date = module['start'] if module['start'] else datetime.max.replace(tzinfo=pytz.UTC)
         unexpanded_category_map[category].append({"title": title, "id": id, "sort_key": sort_key, "start_date": entry_start_date})
 
     category_map = {"entries": defaultdict(dict), "subcategories": defaultdict(dict)}
@@ -288,7 +351,7 @@ def get_discussion_categories_ids(course, user, include_all=False):
 
     """
     accessible_discussion_ids = [
-        module.discussion_id for module in get_accessible_discussion_modules(course, user, include_all=include_all)
+        module['discussion_id'] for module in get_accessible_discussion_modules(course, user, include_all=include_all)
     ]
     return course.top_level_discussion_topic_ids + accessible_discussion_ids
 
@@ -14,11 +14,13 @@ ASSUMPTIONS: modules have unique IDs, even across different module_types
 """
 from cStringIO import StringIO
 from gzip import GzipFile
+from tempfile import NamedTemporaryFile
 from uuid import uuid4
 import csv
 import json
 import hashlib
 import os.path
+import shutil
 import urllib
 
 from boto.s3.connection import S3Connection
@@ -193,9 +195,9 @@ class InstructorTask(models.Model):
 class ReportStore(object):
     """
     Simple abstraction layer that can fetch and store CSV files for reports
-    download. Should probably refactor later to create a ReportFile object that
-    can simply be appended to for the sake of memory efficiency, rather than
-    passing in the whole dataset. Doing that for now just because it's simpler.
+    download. Rows are streamed out to the store as they are produced (see
+    `store_rows()`), so callers can pass in a generator rather than the whole
+    dataset.
     """
     @classmethod
     def from_config(cls):
@@ -218,6 +220,64 @@ class ReportStore(object):
         for row in rows:
             yield [unicode(item).encode('utf-8') for item in row]
 
+    def _get_utf8_decoded_rows(self, csv_file):
+        """
+        Given a file-like object containing utf-8 encoded CSV data, yield its
+        rows with each value decoded back to unicode.
+        """
+        for row in csv.reader(csv_file):
+            yield [item.decode('utf-8') for item in row]
+
+
+class MultipartUploadFile(object):
+    """
+    A write-only file-like object which uploads what is written to it to the
+    S3 `key` as a multipart upload, in parts of at least `part_size` bytes, so
+    that no more than one part is ever held in memory.
+
+    The upload is only started once the first part is full; if `close()` is
+    called before then, the contents are left in `buffer` for the caller to
+    upload in one go.
+    """
+    def __init__(self, key, part_size, headers):
+        self.key = key
+        self.part_size = part_size
+        self.headers = headers
+        self.buffer = StringIO()
+        self.upload = None
+        self.part_count = 0
+
+    def write(self, data):
+        """Buffer `data`, uploading the buffer as a part once it is full."""
+        self.buffer.write(data)
+        if self.buffer.tell() >= self.part_size:
+            self._upload_part()
+
+    def flush(self):
+        """Parts are only uploaded once they are full, so there is nothing to flush."""
+        pass
+
+    def _upload_part(self):
+        """Upload the buffered data as the next part, starting the upload if needed."""
+        if self.upload is None:
+            self.upload = self.key.bucket.initiate_multipart_upload(self.key.key, headers=self.headers)
+        self.part_count += 1
+        self.buffer.seek(0)
+        self.upload.upload_part_from_file(self.buffer, self.part_count)
+        self.buffer = StringIO()
+
+    def close(self):
+        """Upload the last part and complete the upload, if it was started."""
+        if self.upload is not None:
+            if self.buffer.tell():
+                self._upload_part()
+            self.upload.complete_upload()
+
+    def cancel(self):
+        """Abort the upload, if it was started, so that S3 discards its parts."""
+        if self.upload is not None:
+            self.upload.cancel_upload()
+
 
 class S3ReportStore(ReportStore):
     """
@@ -231,6 +291,9 @@ class S3ReportStore(ReportStore):
     conventions on where files are stored to know what to display. Clients using
     this class can name the final file whatever they want.
     """
+    # S3 requires all but the last part of a multipart upload to be at least 5MB.
+    MULTIPART_PART_SIZE = 16 * 1024 * 1024
+
     def __init__(self, bucket_name, root_path):
         self.root_path = root_path
 
@@ -286,8 +349,12 @@ class S3ReportStore(ReportStore):
         transparent via the browser). Filenames should end in whatever
         suffix makes sense for the original file, so `.txt` instead of `.gz`
         """
-        key = self.key_for(course_id, filename)
+        self._store_key(self.key_for(course_id, filename), buff)
 
+    def _store_key(self, key, buff):
+        """
+        Store the gzip-encoded contents of `buff` under the S3 `key`.
+        """
         data = buff.getvalue()
         key.size = len(data)
         key.content_encoding = "gzip"
@@ -308,19 +375,89 @@ class S3ReportStore(ReportStore):
     def store_rows(self, course_id, filename, rows):
         """
         Given a `course_id`, `filename`, and `rows` (each row is an iterable of
-        strings), create a buffer that is a gzip'd csv file, and then `store()`
-        that buffer.
+        strings), store the rows as a gzip'd csv file.
+
+        `rows` can be a generator: rows are compressed as they are produced,
+        and uploaded in parts once there are more than MULTIPART_PART_SIZE
+        bytes of them, so the report is never held in memory as a whole.
 
         Even though we store it in gzip format, browsers will transparently
         download and decompress it. Filenames should end in `.csv`, not `.gz`.
         """
-        output_buffer = StringIO()
-        gzip_file = GzipFile(fileobj=output_buffer, mode="wb")
-        csvwriter = csv.writer(gzip_file)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
-        gzip_file.close()
+        self._store_rows_key(self.key_for(course_id, filename), rows)
 
-        self.store(course_id, filename, output_buffer)
+    def _store_rows_key(self, key, rows):
+        """
+        Stream `rows` written out as a gzip'd csv file to the S3 `key`.
+        Reports which fit in a single part are stored in one request.
+        """
+        upload_file = MultipartUploadFile(
+            key,
+            self.MULTIPART_PART_SIZE,
+            headers={"Content-Encoding": "gzip", "Content-Type": "text/csv"},
+        )
+        try:
+            gzip_file = GzipFile(fileobj=upload_file, mode="wb")
+            csv.writer(gzip_file).writerows(self._get_utf8_encoded_rows(rows))
+            gzip_file.close()
+            if upload_file.upload is None:
+                self._store_key(key, upload_file.buffer)
+            else:
+                upload_file.close()
+        except Exception:
+            upload_file.cancel()
+            raise
+
+    def part_key_for(self, course_id, group, filename):
+        """
+        Return the S3 key used for the partial report `filename` belonging to
+        `group`. Parts live under `{root_path}/parts/`, outside of the course
+        directory, so that they never show up in `links_for()`.
+        """
+        hashed_course_id = hashlib.sha1(course_id.to_deprecated_string())
+
+        key = Key(self.bucket)
+        key.key = "{}/parts/{}/{}/{}".format(
+            self.root_path,
+            hashed_course_id.hexdigest(),
+            group,
+            filename
+        )
+
+        return key
+
+    def store_part_rows(self, course_id, group, filename, rows):
+        """
+        Store `rows` as the partial report `filename` in `group`. Parts are
+        not visible to report downloads until they are merged.
+        """
+        self._store_rows_key(self.part_key_for(course_id, group, filename), rows)
+
+    def _part_keys(self, course_id, group):
+        """Return all of the S3 keys stored for `group`."""
+        return self.bucket.list(prefix=self.part_key_for(course_id, group, '').key)
+
+    def part_filenames(self, course_id, group):
+        """
+        Return the sorted names of all of the partial reports in `group`.
+        """
+        return sorted(key.key.split("/")[-1] for key in self._part_keys(course_id, group))
+
+    def read_part_rows(self, course_id, group, filename):
+        """
+        Yield the rows of the partial report `filename` in `group`, decoded to
+        unicode.
+        """
+        data = self.part_key_for(course_id, group, filename).get_contents_as_string()
+        return self._get_utf8_decoded_rows(GzipFile(fileobj=StringIO(data), mode="rb"))
+
+    def delete_parts(self, course_id, group):
+        """
+        Remove all of the partial reports stored for `group`.
+        """
+        key_names = [key.key for key in self._part_keys(course_id, group)]
+        if key_names:
+            self.bucket.delete_keys(key_names)
 
     def links_for(self, course_id):
         """
@@ -390,12 +527,72 @@ class LocalFSReportStore(ReportStore):
         """
         Given a course_id, filename, and rows (each row is an iterable of strings),
         write this data out.
+
+        `rows` can be a generator: rows are appended to a temporary file as
+        they are produced, which is only moved into place once it is complete.
+        """
+        full_path = self.path_to(course_id, filename)
+        directory = os.path.dirname(full_path)
+        if not os.path.exists(directory):
+            os.mkdir(directory)
+
+        # The temporary file is kept outside of the course directory so that
+        # it never shows up in `links_for()`.
+        temp_file = NamedTemporaryFile(dir=self.root_path, suffix='.csv', delete=False)
+        try:
+            with temp_file:
+                csv.writer(temp_file).writerows(self._get_utf8_encoded_rows(rows))
+            os.rename(temp_file.name, full_path)
+        except Exception:
+            os.remove(temp_file.name)
+            raise
+
+    def part_path_to(self, course_id, group, filename):
+        """
+        Return the full path to the partial report `filename` in `group`.
+        Parts live under `{root_path}/parts/`, outside of the course
+        directory, so that they never show up in `links_for()`.
+        """
+        return os.path.join(
+            self.root_path, 'parts', urllib.quote(course_id.to_deprecated_string(), safe=''), group, filename
+        )
+
+    def store_part_rows(self, course_id, group, filename, rows):
+        """
+        Store `rows` as the partial report `filename` in `group`. Parts are
+        not visible to report downloads until they are merged.
+        """
+        full_path = self.part_path_to(course_id, group, filename)
+        directory = os.path.dirname(full_path)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        with open(full_path, "wb") as f:
+            csv.writer(f).writerows(self._get_utf8_encoded_rows(rows))
+
+    def part_filenames(self, course_id, group):
         """
-        output_buffer = StringIO()
-        csvwriter = csv.writer(output_buffer)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+        Return the sorted names of all of the partial reports in `group`.
+        """
+        directory = self.part_path_to(course_id, group, '')
+        if not os.path.exists(directory):
+            return []
+        return sorted(os.listdir(directory))
+
+    def read_part_rows(self, course_id, group, filename):
+        """
+        Yield the rows of the partial report `filename` in `group`, decoded to
+        unicode.
+        """
+        with open(self.part_path_to(course_id, group, filename), "rb") as f:
+            for row in self._get_utf8_decoded_rows(f):
+                yield row
 
-        self.store(course_id, filename, output_buffer)
+    def delete_parts(self, course_id, group):
+        """
+        Remove all of the partial reports stored for `group`.
+        """
+        shutil.rmtree(self.part_path_to(course_id, group, ''), ignore_errors=True)
 
     def links_for(self, course_id):
         """
@@ -23,6 +23,8 @@ SUBTASK_LOCK_EXPIRE = 60 * 10  # Lock expires in 10 minutes
 # Number of times to retry if a subtask update encounters a lock on the InstructorTask.
 # (These are recursive retries, so don't make this number too large.)
 MAX_DATABASE_LOCK_RETRIES = 5
+# Number of items fetched by each query when generating the items for subtasks.
+ITEMS_PER_QUERY = 10000
 
 
 class DuplicateTaskException(Exception):
@@ -69,6 +71,29 @@ def track_memory_usage(metric, course_id):
         )
 
 
+def _iterate_queryset_by_pk(queryset, fields, items_per_query):
+    """
+    Yields the `fields` of the items of `queryset` as dicts, in order of their
+    primary key (which must be one of the `fields`), fetching `items_per_query`
+    of them at a time.
+
+    Each query picks up after the last primary key fetched by the previous one,
+    so that queries don't get slower as they go deeper into the queryset (as
+    they would with OFFSET), and the database client never has to hold all of
+    the results at once (as it does with `iterator()` on MySQL).
+    """
+    queryset = queryset.order_by('pk').values(*fields)
+    last_pk = None
+    while True:
+        page_queryset = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        page = list(page_queryset[:items_per_query])
+        for item in page:
+            yield item
+        if len(page) < items_per_query:
+            return
+        last_pk = page[-1]['pk']
+
+
 def _generate_items_for_subtask(
     item_querysets,  # pylint: disable=bad-continuation
     item_fields,
@@ -85,7 +110,6 @@ def _generate_items_for_subtask(
         `item_fields` : the fields that should be included in the dict that is returned.
             These are in addition to the 'pk' field.
         `total_num_items` : the result of summing the count of each queryset in `item_querysets`.
-        `items_per_query` : size of chunks to break the query operation into.
         `items_per_task` : maximum size of chunks to break each query chunk into for use by a subtask.
         `course_id` : course_id of the course. Only needed for the track_memory_usage context manager.
 
@@ -102,7 +126,7 @@ def _generate_items_for_subtask(
 
     with track_memory_usage('course_email.subtask_generation.memory', course_id):
         for queryset in item_querysets:
-            for item in queryset.values(*all_item_fields).iterator():
+            for item in _iterate_queryset_by_pk(queryset, all_item_fields, ITEMS_PER_QUERY):
                 if len(items_for_task) == items_per_task and num_subtasks < total_num_subtasks - 1:
                     yield items_for_task
                     num_items_queued += items_per_task
@@ -31,11 +31,12 @@ from instructor_task.tasks_helper import (
     run_main_task,
     BaseInstructorTask,
     perform_module_state_update,
-    rescore_problem_module_state,
     reset_attempts_module_state,
     delete_problem_module_state,
-    upload_grades_csv,
-    upload_problem_grade_report,
+    delegate_rescore_subtasks,
+    perform_rescore_subtask,
+    delegate_grade_report_subtasks,
+    perform_grade_report_subtask,
     upload_students_csv,
     cohort_students_and_upload
 )
@@ -58,23 +59,40 @@ def rescore_problem(entry_id, xmodule_instance_args):
 
       'student': the identifier (username or email) of a particular user whose
           problem submission should be rescored.  If not specified, all problem
-          submissions for the problem will be rescored.
+          submissions for the problem will be rescored, split into subtasks of
+          settings.RESCORE_STUDENT_MODULES_PER_SUBTASK submissions if there are
+          more of them than that.
 
     `xmodule_instance_args` provides information needed by _get_module_instance_for_task()
     to instantiate an xmodule instance.
     """
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('rescored')
-    update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
 
-    def filter_fcn(modules_to_update):
-        """Filter that matches problems which are marked as being done"""
-        return modules_to_update.filter(state__contains='"done": true')
-
-    visit_fcn = partial(perform_module_state_update, update_fcn, filter_fcn)
+    visit_fcn = partial(delegate_rescore_subtasks, rescore_problem_subtask, xmodule_instance_args, _filter_done_modules)
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
+def _filter_done_modules(modules_to_update):
+    """Filter that matches problems which are marked as being done"""
+    return modules_to_update.filter(state__contains='"done": true')
+
+
+@task()  # pylint: disable=not-callable
+def rescore_problem_subtask(entry_id, xmodule_instance_args, action_name, student_module_ids, subtask_status_dict):
+    """
+    Rescore a chunk of the StudentModules of a problem for a `rescore_problem`
+    task that has been split into subtasks.
+
+    `entry_id` is the id value of the InstructorTask entry that the subtask
+    belongs to, and `student_module_ids` lists the StudentModules to rescore.
+    `subtask_status_dict` is the subtask's initial SubtaskStatus, as a dict.
+    """
+    return perform_rescore_subtask(
+        entry_id, xmodule_instance_args, action_name, student_module_ids, subtask_status_dict
+    )
+
+
 @task(base=BaseInstructorTask)  # pylint: disable=not-callable
 def reset_problem_attempts(entry_id, xmodule_instance_args):
     """Resets problem attempts to zero for a particular problem for all students in a course.
@@ -152,7 +170,9 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
         xmodule_instance_args.get('task_id'), entry_id, action_name
     )
 
-    task_fn = partial(upload_grades_csv, xmodule_instance_args)
+    task_fn = partial(
+        delegate_grade_report_subtasks, calculate_grade_report_subtask, 'grade_report', xmodule_instance_args
+    )
     return run_main_task(entry_id, task_fn, action_name)
 
 
@@ -169,10 +189,27 @@ def calculate_problem_grade_report(entry_id, xmodule_instance_args):
         xmodule_instance_args.get('task_id'), entry_id, action_name
     )
 
-    task_fn = partial(upload_problem_grade_report, xmodule_instance_args)
+    task_fn = partial(
+        delegate_grade_report_subtasks, calculate_grade_report_subtask, 'problem_grade_report', xmodule_instance_args
+    )
     return run_main_task(entry_id, task_fn, action_name)
 
 
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
+def calculate_grade_report_subtask(entry_id, report_name, part_number, student_ids, subtask_status_dict):
+    """
+    Grade a chunk of the students enrolled in a course for a grade or problem
+    grade report, storing their rows as one part of the report.  The last
+    subtask of a report to complete merges the parts into the final report.
+
+    `entry_id` is the id value of the InstructorTask entry that the subtask
+    belongs to, `report_name` is either 'grade_report' or
+    'problem_grade_report', and `student_ids` lists the students to grade.
+    `subtask_status_dict` is the subtask's initial SubtaskStatus, as a dict.
+    """
+    return perform_grade_report_subtask(entry_id, report_name, part_number, student_ids, subtask_status_dict)
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
 def calculate_students_features_csv(entry_id, xmodule_instance_args):
     """
@@ -6,15 +6,19 @@ running state of a course.
 import json
 from collections import OrderedDict
 from datetime import datetime
+from functools import partial
 from eventtracking import tracker
-from itertools import chain
+from itertools import chain, count, islice
 from time import time
 import unicodecsv
 import logging
+import traceback
 
 from celery import Task, current_task
 from celery.states import SUCCESS, FAILURE
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.files.storage import DefaultStorage
 from django.db import transaction, reset_queries
 import dogstats_wrapper as dog_stats_api
@@ -34,11 +38,17 @@ from courseware.module_render import get_module_for_descriptor_internal
 from instructor_analytics.basic import enrolled_students_features
 from instructor_analytics.csvs import format_dictlist
 from instructor_task.models import ReportStore, InstructorTask, PROGRESS
+from instructor_task.subtasks import (
+    SUBTASK_LOCK_EXPIRE,
+    SubtaskStatus,
+    queue_subtasks_for_query,
+    check_subtask_is_valid,
+    update_subtask_status,
+)
 from lms.djangoapps.lms_xblock.runtime import LmsPartitionService
 from openedx.core.djangoapps.course_groups.cohorts import get_cohort
 from openedx.core.djangoapps.course_groups.models import CourseUserGroup
 from openedx.core.djangoapps.content.course_structures.models import CourseStructure
-from opaque_keys.edx.keys import UsageKey
 from openedx.core.djangoapps.course_groups.cohorts import add_user_to_cohort, is_course_cohorted
 from student.models import CourseEnrollment
 from verify_student.models import SoftwareSecurePhotoVerification
@@ -307,55 +317,88 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
 
     """
     start_time = time()
-    usage_keys = []
-    problem_url = task_input.get('problem_url')
-    entrance_exam_url = task_input.get('entrance_exam_url')
-    student_identifier = task_input.get('student')
+    problems = _get_problems_for_task(course_id, task_input)
+    modules_to_update = _get_modules_for_task(course_id, task_input, problems, filter_fcn)
+
+    task_progress = TaskProgress(action_name, modules_to_update.count(), start_time)
+    task_progress.update_task_state()
+
+    _update_module_states(update_fcn, problems, modules_to_update, task_progress)
+
+    return task_progress.update_task_state()
+
+
+def _get_problems_for_task(course_id, task_input):
+    """
+    Return a dict mapping the usage keys (as unicode) of the problems that `task_input`
+    applies to, to their descriptors: either the problem at its `problem_url`, or all
+    of the problems in the entrance exam at its `entrance_exam_url`.
+
+    Each descriptor is loaded once, and shared by all of the StudentModules updated for it.
+    """
     problems = {}
 
     # if problem_url is present make a usage key from it
+    problem_url = task_input.get('problem_url')
     if problem_url:
         usage_key = course_id.make_usage_key_from_deprecated_string(problem_url)
-        usage_keys.append(usage_key)
 
         # find the problem descriptor:
-        problem_descriptor = modulestore().get_item(usage_key)
-        problems[unicode(usage_key)] = problem_descriptor
+        problems[unicode(usage_key)] = modulestore().get_item(usage_key)
 
     # if entrance_exam is present grab all problems in it
+    entrance_exam_url = task_input.get('entrance_exam_url')
     if entrance_exam_url:
         problems = get_problems_in_section(entrance_exam_url)
-        usage_keys = [UsageKey.from_string(location) for location in problems.keys()]
 
-    # find the modules in question
-    modules_to_update = StudentModule.objects.filter(course_id=course_id, module_state_key__in=usage_keys)
+    return problems
+
+
+def _get_modules_for_task(course_id, task_input, problems, filter_fcn=None):
+    """
+    Return a queryset of the StudentModules of `problems` (as returned by
+    `_get_problems_for_task`) that a task with `task_input` should update,
+    optionally filtered by `filter_fcn`.
+    """
+    usage_keys = [problem.location for problem in problems.values()]
+
+    # find the modules in question, along with their students so that
+    # updating them doesn't need another query per module
+    modules_to_update = StudentModule.objects.filter(
+        course_id=course_id, module_state_key__in=usage_keys
+    ).select_related('student')
 
     # give the option of updating an individual student. If not specified,
     # then updates all students who have responded to a problem so far
-    student = None
+    student_identifier = task_input.get('student')
     if student_identifier is not None:
         # if an identifier is supplied, then look for the student,
         # and let it throw an exception if none is found.
         if "@" in student_identifier:
             student = User.objects.get(email=student_identifier)
-        elif student_identifier is not None:
+        else:
             student = User.objects.get(username=student_identifier)
-
-    if student is not None:
         modules_to_update = modules_to_update.filter(student_id=student.id)
 
     if filter_fcn is not None:
         modules_to_update = filter_fcn(modules_to_update)
 
-    task_progress = TaskProgress(action_name, modules_to_update.count(), start_time)
-    task_progress.update_task_state()
+    return modules_to_update
+
 
+def _update_module_states(update_fcn, problems, modules_to_update, task_progress):
+    """
+    Call `update_fcn` on each of the StudentModules in `modules_to_update`, with the
+    descriptor of its problem from `problems`, counting the results in `task_progress`.
+    """
     for module_to_update in modules_to_update:
         task_progress.attempted += 1
         module_descriptor = problems[unicode(module_to_update.module_state_key)]
         # There is no try here:  if there's an error, we let it throw, and the task will
         # be marked as FAILED, with a stack trace.
-        with dog_stats_api.timer('instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=action_name)]):
+        with dog_stats_api.timer(
+            'instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=task_progress.action_name)]
+        ):
             update_status = update_fcn(module_descriptor, module_to_update)
             if update_status == UPDATE_STATUS_SUCCEEDED:
                 # If the update_fcn returns true, then it performed some kind of work.
@@ -368,7 +411,116 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
             else:
                 raise UpdateProblemModuleStateError("Unexpected update_status returned: {}".format(update_status))
 
-    return task_progress.update_task_state()
+
+def delegate_rescore_subtasks(
+        create_subtask, xmodule_instance_args, filter_fcn, entry_id, course_id, task_input, action_name
+):
+    """
+    Rescore the problems that `task_input` applies to, splitting the
+    StudentModules to rescore (those passing `filter_fcn`) into chunks of no
+    more than settings.RESCORE_STUDENT_MODULES_PER_SUBTASK modules and queueing
+    a `create_subtask` worker job for each chunk, so that they are rescored in
+    parallel.
+
+    Rescoring a single student, or few enough modules to be handled by a
+    single worker job, is done directly by this task instead.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    task_id = entry.task_id
+
+    # As with bulk email, if subtasks have already been defined then this task
+    # has been requeued, and we don't want to queue a second set of them.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.warning(u"Task %s has already been processed for rescoring!  InstructorTask = %s", task_id, entry)
+        return json.loads(entry.task_output)
+
+    problems = _get_problems_for_task(course_id, task_input)
+    modules_to_update = _get_modules_for_task(course_id, task_input, problems, filter_fcn)
+    total_num_modules = modules_to_update.count()
+    modules_per_subtask = settings.RESCORE_STUDENT_MODULES_PER_SUBTASK
+    if task_input.get('student') is not None or total_num_modules <= modules_per_subtask:
+        update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
+        return perform_module_state_update(update_fcn, filter_fcn, entry_id, course_id, task_input, action_name)
+
+    TASK_LOG.info(
+        u"Task %s: Preparing to queue subtasks for rescoring for course %s, total modules: %s",
+        task_id, course_id, total_num_modules
+    )
+
+    def _create_rescore_subtask(item_list, initial_subtask_status):
+        """Creates a subtask to rescore a given list of StudentModules."""
+        return create_subtask.subtask(
+            (
+                entry_id,
+                xmodule_instance_args,
+                action_name,
+                [item['pk'] for item in item_list],
+                initial_subtask_status.to_dict(),
+            ),
+            task_id=initial_subtask_status.task_id,
+        )
+
+    # As with bulk email, the progress returned here is stored as the parent
+    # task's result, but the InstructorTask holds the "real" status.
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_rescore_subtask,
+        [modules_to_update],
+        [],
+        modules_per_subtask,
+        total_num_modules,
+    )
+
+
+def perform_rescore_subtask(entry_id, xmodule_instance_args, action_name, student_module_ids, subtask_status_dict):
+    """
+    Rescore the StudentModules identified by `student_module_ids` for the
+    InstructorTask `entry_id`, loading the descriptors of its problems only
+    once for all of them.
+
+    Updates the InstructorTask with the number of modules rescored.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    TASK_LOG.info(
+        u"Preparing to rescore %d student modules as subtask %s for instructor task %d",
+        len(student_module_ids), current_task_id, entry_id
+    )
+
+    # Raises an exception if this subtask is a duplicate, failing it immediately.
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    task_progress = TaskProgress(action_name, len(student_module_ids), time())
+    try:
+        problems = _get_problems_for_task(entry.course_id, json.loads(entry.task_input))
+        modules_to_update = StudentModule.objects.filter(id__in=student_module_ids).select_related('student')
+        update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
+        _update_module_states(update_fcn, problems, modules_to_update, task_progress)
+    except Exception:
+        # Count the modules that weren't rescored before the failure as having failed.
+        TASK_LOG.exception(
+            u"Rescore subtask %s for instructor task %d: failed unexpectedly!", current_task_id, entry_id
+        )
+        subtask_status.increment(
+            succeeded=task_progress.succeeded,
+            failed=len(student_module_ids) - task_progress.succeeded - task_progress.skipped,
+            skipped=task_progress.skipped,
+            state=FAILURE,
+        )
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        raise
+
+    # Modules deleted since the subtask was queued are counted as skipped.
+    subtask_status.increment(
+        succeeded=task_progress.succeeded,
+        failed=task_progress.failed,
+        skipped=len(student_module_ids) - task_progress.succeeded - task_progress.failed,
+        state=SUCCESS,
+    )
+    update_subtask_status(entry_id, current_task_id, subtask_status)
+    return subtask_status.to_dict()
 
 
 def _get_task_id_from_xmodule_args(xmodule_instance_args):
@@ -398,16 +550,22 @@ def _get_track_function_for_task(student, xmodule_instance_args=None, source_pag
 
 
 def _get_module_instance_for_task(course_id, student, module_descriptor, xmodule_instance_args=None,
-                                  grade_bucket_type=None):
+                                  grade_bucket_type=None, student_module=None):
     """
     Fetches a StudentModule instance for a given `course_id`, `student` object, and `module_descriptor`.
 
     `xmodule_instance_args` is used to provide information for creating a track function and an XQueue callback.
     These are passed, along with `grade_bucket_type`, to get_module_for_descriptor_internal, which sidesteps
     the need for a Request object when instantiating an xmodule instance.
+
+    If the caller has already loaded the student's StudentModule for `module_descriptor`, passing it as
+    `student_module` saves querying for it again.
     """
     # reconstitute the problem's corresponding XModule:
-    field_data_cache = FieldDataCache.cache_for_descriptor_descendents(course_id, student, module_descriptor)
+    field_data_cache = FieldDataCache([], course_id, student)
+    if student_module is not None:
+        field_data_cache.add_student_modules([student_module])
+    field_data_cache.add_descriptor_descendents(module_descriptor)
 
     # get request-related tracking information from args passthrough, and supplement with task-specific
     # information:
@@ -457,7 +615,10 @@ def rescore_problem_module_state(xmodule_instance_args, module_descriptor, stude
     course_id = student_module.course_id
     student = student_module.student
     usage_key = student_module.module_state_key
-    instance = _get_module_instance_for_task(course_id, student, module_descriptor, xmodule_instance_args, grade_bucket_type='rescore')
+    instance = _get_module_instance_for_task(
+        course_id, student, module_descriptor, xmodule_instance_args, grade_bucket_type='rescore',
+        student_module=student_module
+    )
 
     if instance is None:
         # Either permissions just changed, or someone is trying to be clever
@@ -543,6 +704,8 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp):
                 [row1_colum1, row1_colum2, ...],
                 ...
             ]
+            or a generator of such rows, which is streamed out to the
+            ReportStore as rows are produced.
         csv_name: Name of the resulting CSV
         course_id: ID of the course
     """
@@ -559,7 +722,7 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp):
     tracker.emit(REPORT_REQUESTED_EVENT_NAME, {"report_type": csv_name, })
 
 
-def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):  # pylint: disable=too-many-statements
+def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
     """
     For a given `course_id`, generate a grades CSV file for all students that
     are enrolled, and store using a `ReportStore`. Once created, the files can
@@ -568,9 +731,8 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     buffered, so we'll never write part of a CSV file to S3 -- i.e. any files
     that are visible in ReportStore will be complete ones.
 
-    As we start to add more CSV downloads, it will probably be worthwhile to
-    make a more general CSVDoc class instead of building out the rows like we
-    do here.
+    The rows are generated as they are uploaded, so memory use doesn't grow
+    with the number of students; only the error rows are kept until the end.
     """
     start_time = time()
     start_date = datetime.now(UTC)
@@ -587,25 +749,9 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     )
     TASK_LOG.info(u'%s, Task type: %s, Starting task execution', task_info_string, action_name)
 
-    course = get_course_by_id(course_id)
-    course_is_cohorted = is_course_cohorted(course.id)
-    cohorts_header = ['Cohort Name'] if course_is_cohorted else []
-
-    experiment_partitions = get_split_user_partitions(course.user_partitions)
-    group_configs_header = [u'Experiment Group ({})'.format(partition.name) for partition in experiment_partitions]
-
-    certificate_info_header = ['Certificate Eligible', 'Certificate Delivered', 'Certificate Type']
-    certificate_whitelist = CertificateWhitelist.objects.filter(course_id=course_id, whitelist=True)
-    whitelisted_user_ids = [entry.user_id for entry in certificate_whitelist]
-
-    # Loop over all our students and build our CSV lists in memory
-    header = None
-    rows = []
-    err_rows = [["id", "username", "error_msg"]]
     current_step = {'step': 'Calculating Grades'}
 
     total_enrolled_students = enrolled_students.count()
-    student_counter = 0
     TASK_LOG.info(
         u'%s, Task type: %s, Current step: %s, Starting grade calculation for total students: %s',
         task_info_string,
@@ -613,30 +759,100 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
         current_step,
         total_enrolled_students
     )
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students):
-        # Periodically update task status (this is a cache write)
+
+    def _report_progress():
+        """
+        Periodically update task status (this is a cache write), and add a log
+        entry for each student graded to get a sense of the task's progress.
+        """
         if task_progress.attempted % status_interval == 0:
             task_progress.update_task_state(extra_meta=current_step)
-        task_progress.attempted += 1
-
-        # Now add a log entry after each student is graded to get a sense
-        # of the task's progress
-        student_counter += 1
         TASK_LOG.info(
             u'%s, Task type: %s, Current step: %s, Grade calculation in-progress for students: %s/%s',
             task_info_string,
             action_name,
             current_step,
-            student_counter,
+            task_progress.attempted + 1,
             total_enrolled_students
         )
 
+    # Students are graded as their rows are uploaded
+    err_rows = []
+    rows = _iter_grade_report_rows(
+        course_id, enrolled_students.iterator(), task_progress, err_rows, _report_progress
+    )
+    upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
+
+    TASK_LOG.info(
+        u'%s, Task type: %s, Current step: %s, Grade calculation completed for students: %s/%s',
+        task_info_string,
+        action_name,
+        current_step,
+        task_progress.attempted,
+        total_enrolled_students
+    )
+
+    current_step = {'step': 'Uploading CSVs'}
+    task_progress.update_task_state(extra_meta=current_step)
+    TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
+
+    # If there are any error rows (don't count the header), write them out as well
+    if len(err_rows) > 1:
+        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
+
+    # One last update before we close out...
+    TASK_LOG.info(u'%s, Task type: %s, Finalizing grade task', task_info_string, action_name)
+    return task_progress.update_task_state(extra_meta=current_step)
+
+
+def _grade_report_rows(course_id, students, task_progress, progress_fcn=None):
+    """
+    Grade `students` in the course identified by `course_id`, and return a
+    tuple of the lists of rows for the grade report and for its error report
+    (see `_iter_grade_report_rows`).
+    """
+    err_rows = []
+    rows = list(_iter_grade_report_rows(course_id, students, task_progress, err_rows, progress_fcn))
+    return rows, err_rows
+
+
+def _iter_grade_report_rows(course_id, students, task_progress, err_rows, progress_fcn=None):
+    """
+    Grade `students` in the course identified by `course_id`, yielding the
+    rows for the grade report as each student is graded, and appending the
+    rows for its error report to the list `err_rows`.
+
+    The grade report rows start with a header row once any student has been
+    graded successfully, and the error rows always start with a header row.
+    `task_progress` is updated as each student is graded, and `progress_fcn`,
+    if given, is called before each student is counted.
+    """
+    course = get_course_by_id(course_id)
+    course_is_cohorted = is_course_cohorted(course.id)
+    cohorts_header = ['Cohort Name'] if course_is_cohorted else []
+
+    experiment_partitions = get_split_user_partitions(course.user_partitions)
+    group_configs_header = [u'Experiment Group ({})'.format(partition.name) for partition in experiment_partitions]
+
+    certificate_info_header = ['Certificate Eligible', 'Certificate Delivered', 'Certificate Type']
+    certificate_whitelist = CertificateWhitelist.objects.filter(course_id=course_id, whitelist=True)
+    whitelisted_user_ids = [entry.user_id for entry in certificate_whitelist]
+
+    # Loop over all our students and generate their CSV rows
+    header = None
+    err_rows.append(["id", "username", "error_msg"])
+
+    for student, gradeset, err_msg in iterate_grades_for(course_id, students):
+        if progress_fcn is not None:
+            progress_fcn()
+        task_progress.attempted += 1
+
         if gradeset:
             # We were able to successfully grade this student for this course.
             task_progress.succeeded += 1
             if not header:
                 header = [section['label'] for section in gradeset[u'section_breakdown']]
-                rows.append(
+                yield (
                     ["id", "email", "username", "grade"] + header + cohorts_header +
                     group_configs_header + ['Enrollment Track', 'Verification Status'] + certificate_info_header
                 )
@@ -677,7 +893,7 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
             # possible for a student to have a 0.0 show up in their row but
             # still have 100% for the course.
             row_percents = [percents.get(label, 0.0) for label in header]
-            rows.append(
+            yield (
                 [student.id, student.email, student.username, gradeset['percent']] +
                 row_percents + cohorts_group_name + group_configs_group_names +
                 [enrollment_mode] + [verification_status] + certificate_info
@@ -687,31 +903,6 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
             task_progress.failed += 1
             err_rows.append([student.id, student.username, err_msg])
 
-    TASK_LOG.info(
-        u'%s, Task type: %s, Current step: %s, Grade calculation completed for students: %s/%s',
-        task_info_string,
-        action_name,
-        current_step,
-        student_counter,
-        total_enrolled_students
-    )
-
-    # By this point, we've got the rows we're going to stuff into our CSV files.
-    current_step = {'step': 'Uploading CSVs'}
-    task_progress.update_task_state(extra_meta=current_step)
-    TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
-
-    # Perform the actual upload
-    upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
-
-    # If there are any error rows (don't count the header), write them out as well
-    if len(err_rows) > 1:
-        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
-
-    # One last update before we close out...
-    TASK_LOG.info(u'%s, Task type: %s, Finalizing grade task', task_info_string, action_name)
-    return task_progress.update_task_state(extra_meta=current_step)
-
 
 def _order_problems(blocks):
     """
@@ -763,6 +954,19 @@ def _order_problems(blocks):
     return problems
 
 
+def _get_problems_for_report(course_id):
+    """
+    Return the ordered problem headers for a problem grade report of the
+    course identified by `course_id` (see `_order_problems`), or None if the
+    course structure has not been generated yet.
+    """
+    try:
+        course_structure = CourseStructure.objects.get(course_id=course_id)
+    except CourseStructure.DoesNotExist:
+        return None
+    return _order_problems(course_structure.ordered_blocks)
+
+
 def upload_problem_grade_report(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
     """
     Generate a CSV containing all students' problem grades within a given
@@ -774,26 +978,72 @@ def upload_problem_grade_report(_xmodule_instance_args, _entry_id, course_id, _t
     enrolled_students = CourseEnrollment.users_enrolled_in(course_id)
     task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
 
+    problems = _get_problems_for_report(course_id)
+    if problems is None:
+        return task_progress.update_task_state(
+            extra_meta={'step': 'Generating course structure. Please refresh and try again.'}
+        )
+
+    current_step = {'step': 'Calculating Grades'}
+
+    def _report_progress():
+        """Periodically update task status (this is a cache write)."""
+        if task_progress.attempted % status_interval == 0:
+            task_progress.update_task_state(extra_meta=current_step)
+
+    # Students are graded as their rows are uploaded
+    error_rows = []
+    rows = _iter_problem_grade_report_rows(
+        course_id, enrolled_students.iterator(), problems, task_progress, error_rows, _report_progress
+    )
+
+    # Perform the upload if any students have been successfully graded. Looking
+    # for the first student's row grades every student if none of them can be.
+    first_rows = list(islice(rows, 2))
+    if len(first_rows) > 1:
+        upload_csv_to_report_store(chain(first_rows, rows), 'problem_grade_report', course_id, start_date)
+    # If there are any error rows, write them out as well
+    if len(error_rows) > 1:
+        upload_csv_to_report_store(error_rows, 'problem_grade_report_err', course_id, start_date)
+
+    return task_progress.update_task_state(extra_meta={'step': 'Uploading CSV'})
+
+
+def _problem_grade_report_rows(course_id, students, problems, task_progress, progress_fcn=None):
+    """
+    Grade `students` on each of the `problems` (as returned by
+    `_get_problems_for_report`) in the course identified by `course_id`, and
+    return a tuple of the lists of rows for the problem grade report and for
+    its error report (see `_iter_problem_grade_report_rows`).
+    """
+    error_rows = []
+    rows = list(_iter_problem_grade_report_rows(
+        course_id, students, problems, task_progress, error_rows, progress_fcn
+    ))
+    return rows, error_rows
+
+
+def _iter_problem_grade_report_rows(course_id, students, problems, task_progress, error_rows, progress_fcn=None):
+    """
+    Grade `students` on each of the `problems` (as returned by
+    `_get_problems_for_report`) in the course identified by `course_id`,
+    yielding the rows for the problem grade report as each student is graded,
+    and appending the rows for its error report to the list `error_rows`.
+    Both reports start with a header row.
+
+    `task_progress` is updated as each student is graded, and `progress_fcn`,
+    if given, is called after each student is counted.
+    """
     # This struct encapsulates both the display names of each static item in the
     # header row as values as well as the django User field names of those items
     # as the keys.  It is structured in this way to keep the values related.
     header_row = OrderedDict([('id', 'Student ID'), ('email', 'Email'), ('username', 'Username')])
 
-    try:
-        course_structure = CourseStructure.objects.get(course_id=course_id)
-        blocks = course_structure.ordered_blocks
-        problems = _order_problems(blocks)
-    except CourseStructure.DoesNotExist:
-        return task_progress.update_task_state(
-            extra_meta={'step': 'Generating course structure. Please refresh and try again.'}
-        )
-
     # Just generate the static fields for now.
-    rows = [list(header_row.values()) + ['Final Grade'] + list(chain.from_iterable(problems.values()))]
-    error_rows = [list(header_row.values()) + ['error_msg']]
-    current_step = {'step': 'Calculating Grades'}
+    error_rows.append(list(header_row.values()) + ['error_msg'])
+    yield list(header_row.values()) + ['Final Grade'] + list(chain.from_iterable(problems.values()))
 
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students, keep_raw_scores=True):
+    for student, gradeset, err_msg in iterate_grades_for(course_id, students, keep_raw_scores=True):
         student_fields = [getattr(student, field_name) for field_name in header_row]
         task_progress.attempted += 1
 
@@ -818,20 +1068,221 @@ def upload_problem_grade_report(_xmodule_instance_args, _entry_id, course_id, _t
                 # the case that the student does not have access to it (e.g. A/B
                 # test or cohorted courseware).
                 earned_possible_values.append(['N/A', 'N/A'])
-        rows.append(student_fields + [final_grade] + list(chain.from_iterable(earned_possible_values)))
-
         task_progress.succeeded += 1
-        if task_progress.attempted % status_interval == 0:
-            task_progress.update_task_state(extra_meta=current_step)
+        if progress_fcn is not None:
+            progress_fcn()
 
-    # Perform the upload if any students have been successfully graded
-    if len(rows) > 1:
-        upload_csv_to_report_store(rows, 'problem_grade_report', course_id, start_date)
-    # If there are any error rows, write them out as well
-    if len(error_rows) > 1:
-        upload_csv_to_report_store(error_rows, 'problem_grade_report_err', course_id, start_date)
+        yield student_fields + [final_grade] + list(chain.from_iterable(earned_possible_values))
 
-    return task_progress.update_task_state(extra_meta={'step': 'Uploading CSV'})
+
+def delegate_grade_report_subtasks(
+        create_subtask, report_name, xmodule_instance_args, entry_id, course_id, task_input, action_name
+):
+    """
+    Generate the `report_name` report ('grade_report' or
+    'problem_grade_report') for a given `course_id`, splitting the enrolled
+    students into chunks of no more than
+    settings.GRADES_DOWNLOAD_STUDENTS_PER_SUBTASK students and queueing a
+    `create_subtask` worker job for each chunk.
+
+    Each worker job stores a partial report, and the last one to complete
+    merges the parts into the final report (see
+    `perform_grade_report_subtask`). Courses small enough to be handled by a
+    single worker job are graded directly by this task instead.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    task_id = entry.task_id
+
+    # As with bulk email, if subtasks have already been defined then this task
+    # has been requeued, and we don't want to queue a second set of them.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.warning(
+            u"Task %s has already been processed for %s!  InstructorTask = %s", task_id, report_name, entry
+        )
+        return json.loads(entry.task_output)
+
+    enrolled_students = CourseEnrollment.users_enrolled_in(course_id)
+    total_num_students = enrolled_students.count()
+    students_per_subtask = settings.GRADES_DOWNLOAD_STUDENTS_PER_SUBTASK
+    if total_num_students <= students_per_subtask:
+        upload_fcn = upload_problem_grade_report if report_name == 'problem_grade_report' else upload_grades_csv
+        return upload_fcn(xmodule_instance_args, entry_id, course_id, task_input, action_name)
+
+    if report_name == 'problem_grade_report' and _get_problems_for_report(course_id) is None:
+        return TaskProgress(action_name, total_num_students, time()).update_task_state(
+            extra_meta={'step': 'Generating course structure. Please refresh and try again.'}
+        )
+
+    TASK_LOG.info(
+        u"Task %s: Preparing to queue subtasks for %s for course %s, total students: %s",
+        task_id, report_name, course_id, total_num_students
+    )
+
+    part_numbers = count()
+
+    def _create_grade_report_subtask(item_list, initial_subtask_status):
+        """Creates a subtask to grade a given list of students."""
+        return create_subtask.subtask(
+            (
+                entry_id,
+                report_name,
+                next(part_numbers),
+                [item['pk'] for item in item_list],
+                initial_subtask_status.to_dict(),
+            ),
+            task_id=initial_subtask_status.task_id,
+            routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+        )
+
+    # As with bulk email, the progress returned here is stored as the parent
+    # task's result, but the InstructorTask holds the "real" status.
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_grade_report_subtask,
+        [enrolled_students],
+        [],
+        students_per_subtask,
+        total_num_students,
+    )
+
+
+def _grade_report_part_group(entry, csv_name):
+    """
+    Return the ReportStore group holding the partial `csv_name` reports
+    written by the subtasks of the InstructorTask `entry`.
+    """
+    return u'{}/{}'.format(entry.task_id, csv_name)
+
+
+def perform_grade_report_subtask(entry_id, report_name, part_number, student_ids, subtask_status_dict):
+    """
+    Grade the students identified by `student_ids` for the `report_name`
+    report of the InstructorTask `entry_id`, and store their rows as part
+    number `part_number` of the report and of its error report.
+
+    Updates the InstructorTask with the number of students graded, and if this
+    was the last of its subtasks to complete, merges all of the parts into the
+    final reports.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    TASK_LOG.info(
+        u"Preparing to grade %d students for part %d of %s as subtask %s for instructor task %d",
+        len(student_ids), part_number, report_name, current_task_id, entry_id
+    )
+
+    # Raises an exception if this subtask is a duplicate, failing it immediately.
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    course_id = entry.course_id
+    try:
+        task_progress = TaskProgress(None, len(student_ids), time())
+        students = User.objects.filter(id__in=student_ids)
+        if report_name == 'problem_grade_report':
+            rows, err_rows = _problem_grade_report_rows(
+                course_id, students, _get_problems_for_report(course_id), task_progress
+            )
+        else:
+            rows, err_rows = _grade_report_rows(course_id, students, task_progress)
+
+        report_store = ReportStore.from_config()
+        part_filename = u'{:05d}.csv'.format(part_number)
+        # Don't count the headers
+        for csv_name, csv_rows in ((report_name, rows), (report_name + '_err', err_rows)):
+            if len(csv_rows) > 1:
+                report_store.store_part_rows(
+                    course_id, _grade_report_part_group(entry, csv_name), part_filename, csv_rows
+                )
+    except Exception:
+        # Since we don't know how far the subtask got, count all of its
+        # students as having failed.  The remaining parts still get merged.
+        TASK_LOG.exception(
+            u"Grade report subtask %s for instructor task %d: failed unexpectedly!", current_task_id, entry_id
+        )
+        subtask_status.increment(failed=len(student_ids), state=FAILURE)
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        _merge_grade_report_parts(entry_id, report_name)
+        raise
+
+    subtask_status.increment(succeeded=task_progress.succeeded, failed=task_progress.failed, state=SUCCESS)
+    update_subtask_status(entry_id, current_task_id, subtask_status)
+    _merge_grade_report_parts(entry_id, report_name)
+    return subtask_status.to_dict()
+
+
+def _merge_grade_report_parts(entry_id, report_name):
+    """
+    Once all of the subtasks of the InstructorTask `entry_id` have completed,
+    stream their partial reports into the final `report_name` report and its
+    error report, and remove the parts.
+
+    More than one subtask may see the InstructorTask as complete, so the merge
+    is guarded by a lock to make sure that it only happens once. If the merge
+    fails, the InstructorTask is marked as failed, since it has no report.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    if entry.task_state != SUCCESS:
+        return
+
+    # cache.add fails if the key already exists
+    lock_key = u'grade-report-merge-{}'.format(entry.task_id)
+    if not cache.add(lock_key, 'true', SUBTASK_LOCK_EXPIRE):
+        return
+
+    try:
+        _upload_merged_grade_report(entry, report_name)
+    except Exception as exc:  # pylint: disable=broad-except
+        TASK_LOG.exception(u"Merging %s parts for instructor task %d failed", report_name, entry_id)
+        entry.task_output = InstructorTask.create_output_for_failure(exc, traceback.format_exc())
+        entry.task_state = FAILURE
+        entry.save_now()
+        cache.delete(lock_key)
+
+
+def _upload_merged_grade_report(entry, report_name):
+    """
+    Stream the partial reports of the InstructorTask `entry` into the final
+    `report_name` report and its error report, and remove the parts.
+    """
+    course_id = entry.course_id
+    report_date = entry.created or datetime.now(UTC)
+    report_store = ReportStore.from_config()
+    for csv_name in (report_name, report_name + '_err'):
+        group = _grade_report_part_group(entry, csv_name)
+        part_filenames = report_store.part_filenames(course_id, group)
+        if part_filenames:
+            rows = _merged_part_rows(report_store, course_id, group, part_filenames)
+            upload_csv_to_report_store(rows, csv_name, course_id, report_date)
+    report_store.delete_parts(course_id, entry.task_id)
+    TASK_LOG.info(u"Merged %s parts for instructor task %d", report_name, entry.id)
+
+
+def _merged_part_rows(report_store, course_id, group, part_filenames):
+    """
+    Yield the rows of the partial reports `part_filenames` in `group` as a
+    single report, with the header row of the first part.
+    """
+    header = None
+    for part_filename in part_filenames:
+        part_rows = report_store.read_part_rows(course_id, group, part_filename)
+        part_header = next(part_rows, None)
+        if part_header is None:
+            continue
+        if header is None:
+            header = part_header
+            yield header
+
+        if part_header == header:
+            for row in part_rows:
+                yield row
+        else:
+            # Each part's grade columns come from the first student it graded,
+            # so line them up with the final header by label.
+            columns = [part_header.index(label) if label in part_header else None for label in header]
+            for row in part_rows:
+                yield [row[index] if index is not None else u'' for index in columns]
 
 
 def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input, action_name):
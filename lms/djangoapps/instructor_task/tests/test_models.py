@@ -3,7 +3,10 @@ Tests for instructor_task/models.py.
 """
 
 from cStringIO import StringIO
+from gzip import GzipFile
+import hashlib
 import mock
+import os
 import time
 from datetime import datetime
 from unittest import TestCase
@@ -30,10 +33,38 @@ class MockKey(object):
         return "http://fake-edx-s3.edx.org/"
 
 
+class MockMultipartUpload(object):
+    """ Mocking a boto S3 MultiPartUpload object. """
+    def __init__(self, key_name):
+        self.key_name = key_name
+        self.parts = {}
+        self.completed = False
+        self.cancelled = False
+
+    def upload_part_from_file(self, fp, part_num):
+        """ Expected method on a MultiPartUpload object. """
+        self.parts[part_num] = fp.read()
+
+    def complete_upload(self):
+        """ Expected method on a MultiPartUpload object. """
+        self.completed = True
+
+    def cancel_upload(self):
+        """ Expected method on a MultiPartUpload object. """
+        self.cancelled = True
+
+
 class MockBucket(object):
     """ Mocking a boto S3 Bucket object. """
     def __init__(self, _name):
         self.keys = []
+        self.uploads = []
+
+    def initiate_multipart_upload(self, key_name, headers):  # pylint: disable=unused-argument
+        """ Expected method on a Bucket object. """
+        upload = MockMultipartUpload(key_name)
+        self.uploads.append(upload)
+        return upload
 
     def store_key(self, key):
         """ Not a Bucket method, created just to store the keys in the Bucket for testing purposes. """
@@ -93,6 +124,45 @@ class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase
         """ Create and return a LocalFSReportStore. """
         return LocalFSReportStore.from_config()
 
+    def test_parts(self):
+        """
+        Test that partial reports can be read back in order, are kept out of
+        the download links, and can be deleted.
+        """
+        report_store = self.create_report_store()
+        report_store.store_part_rows(self.course_id, 'task/report', '00001.csv', [[u'id'], [u'n\xedno']])
+        report_store.store_part_rows(self.course_id, 'task/report', '00000.csv', [[u'id'], [1]])
+
+        self.assertEqual(report_store.part_filenames(self.course_id, 'task/report'), ['00000.csv', '00001.csv'])
+        self.assertEqual(
+            list(report_store.read_part_rows(self.course_id, 'task/report', '00001.csv')),
+            [[u'id'], [u'n\xedno']]
+        )
+        self.assertEqual(report_store.links_for(self.course_id), [])
+
+        report_store.delete_parts(self.course_id, 'task')
+        self.assertEqual(report_store.part_filenames(self.course_id, 'task/report'), [])
+
+    def test_store_rows_from_generator(self):
+        """
+        Test that rows can be streamed to a report, and that a report which
+        fails part way through is never stored.
+        """
+        report_store = self.create_report_store()
+        report_store.store_rows(self.course_id, 'report.csv', ([u'n\xedno', i] for i in range(3)))
+        with open(report_store.path_to(self.course_id, 'report.csv')) as report_file:
+            self.assertEqual(report_file.read(), 'n\xc3\xadno,0\r\nn\xc3\xadno,1\r\nn\xc3\xadno,2\r\n')
+
+        def failing_rows():
+            """ Yield a row, then fail. """
+            yield [u'id']
+            raise ValueError
+
+        with self.assertRaises(ValueError):
+            report_store.store_rows(self.course_id, 'failed.csv', failing_rows())
+        self.assertEqual([link[0] for link in report_store.links_for(self.course_id)], ['report.csv'])
+        self.assertEqual([name for name in os.listdir(report_store.root_path) if name.endswith('.csv')], [])
+
 
 @mock.patch('instructor_task.models.S3Connection', new=MockS3Connection)
 @mock.patch('instructor_task.models.Key', new=MockKey)
@@ -105,3 +175,49 @@ class S3ReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase):
     def create_report_store(self):
         """ Create and return a S3ReportStore. """
         return S3ReportStore.from_config()
+
+    def test_store_rows_in_parts(self):
+        """
+        Test that reports larger than a part are streamed to S3 as a multipart
+        upload, and smaller ones are stored in one go.
+        """
+        report_store = self.create_report_store()
+        report_store.MULTIPART_PART_SIZE = 100
+        # Hashes, so that the report doesn't compress down to a single part
+        rows = [[u'n\xedno', hashlib.sha1(str(i)).hexdigest()] for i in range(1000)]
+        report_store.store_rows(self.course_id, 'report.csv', iter(rows))
+
+        upload, = report_store.bucket.uploads
+        self.assertTrue(upload.completed)
+        self.assertGreater(len(upload.parts), 1)
+        data = ''.join(upload.parts[part_num] for part_num in sorted(upload.parts))
+        self.assertEqual(
+            list(report_store._get_utf8_decoded_rows(GzipFile(fileobj=StringIO(data), mode="rb"))),  # pylint: disable=protected-access
+            rows
+        )
+        self.assertEqual(report_store.bucket.keys, [])
+
+        report_store.MULTIPART_PART_SIZE = S3ReportStore.MULTIPART_PART_SIZE
+        report_store.store_rows(self.course_id, 'small_report.csv', iter(rows[:10]))
+        self.assertEqual(len(report_store.bucket.uploads), 1)
+        self.assertEqual(len(report_store.bucket.keys), 1)
+
+    def test_failed_upload_cancelled(self):
+        """
+        Test that the multipart upload of a report that fails part way through
+        is cancelled.
+        """
+        report_store = self.create_report_store()
+        report_store.MULTIPART_PART_SIZE = 10
+
+        def failing_rows():
+            """ Yield some rows, then fail. """
+            for i in range(100):
+                yield [i]
+            raise ValueError
+
+        with self.assertRaises(ValueError):
+            report_store.store_rows(self.course_id, 'report.csv', failing_rows())
+        upload, = report_store.bucket.uploads
+        self.assertTrue(upload.cancelled)
+        self.assertFalse(upload.completed)
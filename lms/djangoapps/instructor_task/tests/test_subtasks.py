@@ -80,3 +80,16 @@ class TestSubtasks(InstructorTaskCourseTestCase):
         self.assertEqual(len(mock_create_subtask_fcn_args[0][0][0]), 3)
         self.assertEqual(len(mock_create_subtask_fcn_args[1][0][0]), 3)
         self.assertEqual(len(mock_create_subtask_fcn_args[2][0][0]), 5)
+
+    @patch('instructor_task.subtasks.ITEMS_PER_QUERY', 2)
+    def test_queue_subtasks_for_query_in_pages(self):
+        """Test queue_subtasks_for_query() when the items are fetched by more than one query."""
+
+        mock_create_subtask_fcn = Mock()
+        self._queue_subtasks(mock_create_subtask_fcn, 3, 7, 0)
+
+        # Check that each item is in exactly one subtask
+        item_lists = [args[0][0] for args in mock_create_subtask_fcn.call_args_list]
+        self.assertEqual([len(item_list) for item_list in item_lists], [3, 3, 1])
+        item_pks = [item['pk'] for item_list in item_lists for item in item_list]
+        self.assertEqual(item_pks, sorted(set(item_pks)))
@@ -7,9 +7,15 @@ Tests that CSV grade report generation works with unicode emails.
 
 """
 import ddt
+import json
 from mock import Mock, patch
 import tempfile
 import unicodecsv
+from uuid import uuid4
+
+from celery.states import SUCCESS, FAILURE
+from django.core.cache import cache
+from django.test.utils import override_settings
 
 from capa.tests.response_xml_factory import MultipleChoiceResponseXMLFactory
 from certificates.tests.factories import GeneratedCertificateFactory, CertificateWhitelistFactory
@@ -24,10 +30,13 @@ from student.models import CourseEnrollment
 from verify_student.tests.factories import SoftwareSecurePhotoVerificationFactory
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.partitions.partitions import Group, UserPartition
-from instructor_task.models import ReportStore
+from instructor_task.models import InstructorTask, ReportStore
+from instructor_task.tasks import calculate_grade_report_subtask
 from instructor_task.tasks_helper import (
-    cohort_students_and_upload, upload_grades_csv, upload_problem_grade_report, upload_students_csv
+    cohort_students_and_upload, upload_grades_csv, upload_problem_grade_report, upload_students_csv,
+    delegate_grade_report_subtasks, _merged_part_rows
 )
+from instructor_task.tests.factories import InstructorTaskFactory
 from openedx.core.djangoapps.util.testing import ContentGroupTestCase, TestConditionalContent
 
 
@@ -264,6 +273,82 @@ class TestInstructorGradeReport(TestReportMixin, InstructorTaskCourseTestCase):
         self.assertDictContainsSubset({'attempted': 1, 'succeeded': 1, 'failed': 0}, result)
 
 
+@override_settings(GRADES_DOWNLOAD_STUDENTS_PER_SUBTASK=2)
+class TestGradeReportSubtasks(TestReportMixin, InstructorTaskCourseTestCase):
+    """
+    Tests that grade reports for larger courses are split across subtasks
+    and merged into a single report.
+    """
+    def setUp(self):
+        super(TestGradeReportSubtasks, self).setUp()
+        self.course = CourseFactory.create()
+        self.usernames = [u'student{}'.format(index) for index in range(5)]
+        for username in self.usernames:
+            self.create_student(username)
+        self.entry = InstructorTaskFactory.create(
+            course_id=self.course.id, task_type='grade_course', task_id=str(uuid4()), task_output=''
+        )
+
+    def _delegate(self, report_name):
+        """
+        Run the parent grade report task for `report_name`.  Subtasks are
+        run eagerly in tests.
+        """
+        with patch('instructor_task.tasks_helper._get_current_task'):
+            return delegate_grade_report_subtasks(
+                calculate_grade_report_subtask, report_name, None, self.entry.id, self.course.id, {}, 'graded'
+            )
+
+    def test_grade_report(self):
+        self._delegate('grade_report')
+
+        entry = InstructorTask.objects.get(pk=self.entry.id)
+        self.assertEqual(entry.task_state, SUCCESS)
+        self.assertEqual(json.loads(entry.subtasks)['total'], 3)
+        self.assertDictContainsSubset(
+            {'attempted': 5, 'succeeded': 5, 'failed': 0}, json.loads(entry.task_output)
+        )
+        self.verify_rows_in_csv(
+            [{'username': username} for username in self.usernames],
+            verify_order=False,
+            ignore_other_columns=True,
+        )
+
+        report_store = ReportStore.from_config()
+        self.assertEqual(len(report_store.links_for(self.course.id)), 1)
+        self.assertEqual(report_store.part_filenames(self.course.id, u'{}/grade_report'.format(entry.task_id)), [])
+
+    def test_merge_failure_recorded(self):
+        with patch(
+            'instructor_task.tasks_helper.upload_csv_to_report_store', side_effect=IOError('Storage unavailable')
+        ):
+            self._delegate('grade_report')
+
+        entry = InstructorTask.objects.get(pk=self.entry.id)
+        self.assertEqual(entry.task_state, FAILURE)
+        self.assertDictContainsSubset(
+            {'exception': 'IOError', 'message': 'Storage unavailable'}, json.loads(entry.task_output)
+        )
+        self.assertIsNone(cache.get(u'grade-report-merge-{}'.format(entry.task_id)))
+
+    @override_settings(GRADES_DOWNLOAD_STUDENTS_PER_SUBTASK=10)
+    def test_small_course_not_split(self):
+        result = self._delegate('grade_report')
+
+        self.assertDictContainsSubset({'attempted': 5, 'succeeded': 5, 'failed': 0}, result)
+        self.assertEqual(InstructorTask.objects.get(pk=self.entry.id).subtasks, '')
+
+    def test_merged_headers_lined_up(self):
+        report_store = ReportStore.from_config()
+        report_store.store_part_rows(self.course.id, 'task/report', '00000.csv', [['id', 'HW'], [1, 0.5]])
+        report_store.store_part_rows(self.course.id, 'task/report', '00001.csv', [['id', 'Lab', 'HW'], [2, 1.0, 0.25]])
+
+        self.assertEqual(
+            list(_merged_part_rows(report_store, self.course.id, 'task/report', ['00000.csv', '00001.csv'])),
+            [[u'id', u'HW'], [u'1', u'0.5'], [u'2', u'0.25']]
+        )
+
+
 class TestProblemGradeReport(TestReportMixin, InstructorTaskModuleTestCase):
     """
     Test that the problem CSV generation works.
@@ -262,6 +262,11 @@ FEATURES = {
     # grades CSV files to S3 and give links for downloads.
     'ENABLE_S3_GRADE_DOWNLOADS': False,
 
+    # Store each student's subsection scores (courseware.models.PersistentSubsectionGrade)
+    # and update them as problems are scored, instead of recomputing every
+    # subsection each time a grade or the progress page is requested.
+    'ENABLE_PERSISTENT_GRADES': False,
+
     # whether to use password policy enforcement or not
     'ENFORCE_PASSWORD_POLICY': True,
 
@@ -700,6 +705,30 @@ DOC_STORE_CONFIG = {
     # as the collection name for asset metadata.
     # Otherwise, a default collection name will be used.
 }
+# Split modulestore structures are immutable, so they are cached in process (as compressed
+# pickles, LRU, bounded by this many bytes) in front of the optional 'course_structure_cache'
+# entry in CACHES. Set to 0 to disable the in-process tier.
+COURSE_STRUCTURE_LOCAL_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# Update the cached metadata inheritance tree of old mongo courses in place for each edit to a
+# container, rather than recomputing it from every container in the course.
+INCREMENTAL_METADATA_INHERITANCE_UPDATES = True
+# The chapters and sections of published courses, used to build the courseware table of
+# contents, are cached for this many seconds per version of the course's content. Set to 0 to
+# build the table of contents from the course's modules instead.
+COURSE_BLOCKS_CACHE_TIMEOUT = 60 * 60 * 24
+# The static, course and jump_to_id URLs in the content of a course are rewritten by one shared
+# rewriter per course, which caches up to this many rewritten fragments (up to 1MB of them) and
+# staticfiles lookups. Set to 0 to rewrite every fragment from scratch. Never cached when DEBUG is on.
+STATIC_URL_REWRITE_CACHE_SIZE = 200
+# Course assets too large for the django cache are copied to this local DIRECTORY
+# by StaticContentServer (up to MAX_FILE_BYTES each, and MAX_BYTES in total), so
+# that repeated and range requests for them don't read them from the contentstore.
+# Leave DIRECTORY unset to disable.
+CONTENTSERVER_DISK_CACHE = {
+    'DIRECTORY': None,
+    'MAX_BYTES': 2 * 1024 * 1024 * 1024,
+    'MAX_FILE_BYTES': 512 * 1024 * 1024,
+}
 MODULESTORE = {
     'default': {
         'ENGINE': 'xmodule.modulestore.mixed.MixedModuleStore',
@@ -1582,6 +1611,11 @@ BULK_EMAIL_LOG_SENT_EMAILS = False
 # parallel, and what the SES rate is.
 BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS = 0.02
 
+# Number of connections each bulk email task opens to the email backend, to
+# send that many messages at once.  Each task's messages are still sent to
+# the recipients in order, as many at a time as there are connections.
+BULK_EMAIL_SEND_CONCURRENCY = 1
+
 ############################# Email Opt In ####################################
 
 # Minimum age for organization-wide email opt in
@@ -1952,6 +1986,16 @@ GRADES_DOWNLOAD = {
     'ROOT_PATH': '/tmp/edx-s3/grades',
 }
 
+# Grade and problem grade reports for courses with more enrollments than this
+# are split into subtasks of this many students each, and the partial reports
+# are merged once all of the subtasks have completed.
+GRADES_DOWNLOAD_STUDENTS_PER_SUBTASK = 1000
+
+###################### Rescoring ######################
+# Rescoring a problem for more submissions than this splits them into
+# subtasks of this many submissions each, which are rescored in parallel.
+RESCORE_STUDENT_MODULES_PER_SUBTASK = 1000
+
 
 #### PASSWORD POLICY SETTINGS #####
 PASSWORD_MIN_LENGTH = 8
@@ -2252,6 +2296,16 @@ API_DATE_FORMAT = '%Y-%m-%d'
 # Enrollment API Cache Timeout
 ENROLLMENT_COURSE_DETAILS_CACHE_TIMEOUT = 60
 
+# How long (in seconds) each user's course enrollments are cached for by
+# CourseEnrollment. Set to 0 to only cache them for the duration of a request.
+ENROLLMENT_USER_CACHE_TIMEOUT = 300
+
+# Comments service client: the size of the pool of (keep-alive) connections
+# shared by a process, and how many requests views may make in parallel
+COMMENTS_SERVICE_POOL_SIZE = 10
+COMMENTS_SERVICE_KEEP_ALIVE = True
+COMMENTS_SERVICE_CONCURRENCY = 4
+
 # for Student Notes we would like to avoid too frequent token refreshes (default is 30 seconds)
 if FEATURES['ENABLE_EDXNOTES']:
     OAUTH_ID_TOKEN_EXPIRATION = 60 * 60
@@ -2323,6 +2377,12 @@ CHECKPOINT_PATTERN = r'(?P<checkpoint_name>[^/]+)'
 # this setting.
 FIELD_OVERRIDE_PROVIDERS = ()
 
+# Number of seconds that all of the field overrides of a student (or of a CCX)
+# in a course are kept in the django cache, after being loaded with a single
+# query. The cached overrides are invalidated whenever an override is set or
+# cleared. Set to 0 to only keep them for the length of a request.
+FIELD_OVERRIDES_CACHE_TIMEOUT = 60 * 60
+
 # PROFILE IMAGE CONFIG
 # WARNING: Certain django storage backends do not support atomic
 # file overwrites (including the default, OverwriteStorage) - instead
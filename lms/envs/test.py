@@ -159,6 +159,21 @@ update_module_store_settings(
     },
 )
 
+# Tests count mongo queries, so don't let structures outlive a single test
+COURSE_STRUCTURE_LOCAL_CACHE_MAX_BYTES = 0
+# ... nor let edits skip the query that recomputes the metadata inheritance tree
+INCREMENTAL_METADATA_INHERITANCE_UPDATES = False
+# ... nor serve the table of contents without loading the course's chapters and sections
+COURSE_BLOCKS_CACHE_TIMEOUT = 0
+# ... nor let rewritten fragments and staticfiles lookups outlive a single test
+STATIC_URL_REWRITE_CACHE_SIZE = 0
+
+# The test database is rolled back between tests but the cache isn't, so don't
+# let field overrides outlive a single request
+FIELD_OVERRIDES_CACHE_TIMEOUT = 0
+# ... nor the enrollments of a user
+ENROLLMENT_USER_CACHE_TIMEOUT = 0
+
 CONTENTSTORE = {
     'ENGINE': 'xmodule.contentstore.mongo.MongoContentStore',
     'DOC_STORE_CONFIG': {
@@ -301,6 +316,11 @@ GIT_REPO_DIR = TEST_ROOT / "course_repos"
 CELERY_ALWAYS_EAGER = True
 CELERY_RESULT_BACKEND = 'djcelery.backends.cache:CacheBackend'
 
+######################### COMMENTS SERVICE ###############################
+
+# Make requests to the comments service one at a time, in a predictable order
+COMMENTS_SERVICE_CONCURRENCY = 1
+
 ######################### MARKETING SITE ###############################
 
 MKTG_URL_LINK_MAP = {
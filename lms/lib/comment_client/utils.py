@@ -1,14 +1,27 @@
 from contextlib import contextmanager
 import dogstats_wrapper as dog_stats_api
 import logging
+from multiprocessing.pool import ThreadPool
+import os
 import requests
+from requests.adapters import HTTPAdapter
+import threading
 from django.conf import settings
+from django.utils import translation
 from time import time
 from uuid import uuid4
 from django.utils.translation import get_language
 
 log = logging.getLogger(__name__)
 
+# The session and thread pool shared by this process's requests to the
+# comments service, and the id of the process that created them
+_session = None
+_pool = None
+_owner_pid = None
+_lock = threading.Lock()
+_pool_thread = threading.local()
+
 
 def strip_none(dic):
     return dict([(k, v) for k, v in dic.iteritems() if v is not None])
@@ -50,6 +63,80 @@ def request_timer(request_id, method, url, tags=None):
     )
 
 
+def _check_owner():
+    """
+    Drop the session and thread pool if they were created by another process,
+    as connections and threads don't survive a fork.
+    """
+    global _session, _pool, _owner_pid  # pylint: disable=global-statement
+    if _owner_pid != os.getpid():
+        _session = None
+        _pool = None
+        _owner_pid = os.getpid()
+
+
+def get_session():
+    """
+    Return the requests Session used to talk to the comments service.
+
+    It is shared by the whole process, so requests reuse the (keep-alive)
+    connections of its pool instead of opening a new one each time. The pool
+    size is set by COMMENTS_SERVICE_POOL_SIZE; set COMMENTS_SERVICE_KEEP_ALIVE
+    to False to close connections after each request.
+    """
+    global _session  # pylint: disable=global-statement
+    with _lock:
+        _check_owner()
+        if _session is None:
+            session = requests.Session()
+            pool_size = getattr(settings, 'COMMENTS_SERVICE_POOL_SIZE', 10)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            if not getattr(settings, 'COMMENTS_SERVICE_KEEP_ALIVE', True):
+                session.headers['Connection'] = 'close'
+            _session = session
+        return _session
+
+
+def perform_concurrently(*calls):
+    """
+    Call each of `calls`, functions taking no arguments, and return the list
+    of their results, running up to COMMENTS_SERVICE_CONCURRENCY of them at the
+    same time in a shared thread pool. If any of them raises an exception, the
+    one of the first such call is raised.
+
+    This is meant for fetching independent data from the comments service in
+    parallel: the calls shouldn't use the database, since the pool's threads
+    outlive requests. They run in the current language, and serially when
+    concurrency is disabled or when called from a pool thread.
+    """
+    global _pool  # pylint: disable=global-statement
+    concurrency = getattr(settings, 'COMMENTS_SERVICE_CONCURRENCY', 4)
+    if concurrency <= 1 or len(calls) <= 1 or getattr(_pool_thread, 'active', False):
+        return [call() for call in calls]
+
+    with _lock:
+        _check_owner()
+        if _pool is None:
+            _pool = ThreadPool(concurrency)
+        pool = _pool
+
+    language = get_language()
+
+    def call_in_pool_thread(call):
+        """Call `call` in the requesting thread's language."""
+        _pool_thread.active = True
+        translation.activate(language)
+        try:
+            return call()
+        finally:
+            translation.deactivate()
+            _pool_thread.active = False
+
+    return pool.map(call_in_pool_thread, calls)
+
+
 def perform_request(method, url, data_or_params=None, raw=False,
                     metric_action=None, metric_tags=None, paged_results=False):
 
@@ -76,7 +163,7 @@ def perform_request(method, url, data_or_params=None, raw=False,
         data = None
         params = merge_dict(data_or_params, request_id_dict)
     with request_timer(request_id, method, url, metric_tags):
-        response = requests.request(
+        response = get_session().request(
             method,
             url,
             data=data,
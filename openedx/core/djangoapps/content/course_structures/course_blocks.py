@@ -0,0 +1,109 @@
+"""
+A summary of the blocks that make up the navigation of a course: its chapters and their sections,
+with the fields needed to build the courseware table of contents and to check access to them.
+
+The summary is cached per version of the course's content, so it never needs to be invalidated.
+It is generated when the course is published, or else the first time it is needed.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+from xmodule.error_module import ErrorDescriptor
+
+
+log = logging.getLogger(__name__)
+
+
+def course_blocks_version(course):
+    """
+    Return a string identifying the current version of the course's content, or None if the
+    modulestore doesn't track one (e.g. for XML courses).
+    """
+    get_subtree_edited_on = getattr(course.runtime, 'get_subtree_edited_on', None)
+    if get_subtree_edited_on is None:
+        return None
+    edited_on = get_subtree_edited_on(course)
+    return edited_on.isoformat() if edited_on is not None else None
+
+
+def _cache_key(course_key, version):
+    """
+    Return the key the course blocks of the given version of a course are cached under.
+    """
+    return u'course_blocks.{}.{}'.format(course_key, version)
+
+
+def _block_summary(block):
+    """
+    Return the fields of `block` that the table of contents and access checks need.
+    """
+    is_error = isinstance(block, ErrorDescriptor)
+    return {
+        'location': unicode(block.location),
+        'url_name': block.url_name,
+        'display_name': block.display_name_with_default,
+        'format': getattr(block, 'format', None),
+        'graded': getattr(block, 'graded', False),
+        'start': getattr(block, 'start', None),
+        'due': getattr(block, 'due', None),
+        'days_early_for_beta': getattr(block, 'days_early_for_beta', None),
+        'hide_from_toc': getattr(block, 'hide_from_toc', False),
+        # error blocks can only be loaded by staff
+        'visible_to_staff_only': is_error or getattr(block, 'visible_to_staff_only', False),
+        'has_group_access': not is_error and bool(getattr(block, 'merged_group_access', None)),
+    }
+
+
+def generate_course_blocks(course):
+    """
+    Return the summary of the chapters and sections of `course`, as a dict with:
+
+        chapters: a list of chapter summaries (see `_block_summary`), each with a list of the
+            summaries of its `sections`
+        has_group_access: whether access to any of the chapters or sections is restricted to
+            groups of a user partition
+    """
+    chapters = []
+    for chapter in course.get_children():
+        summary = _block_summary(chapter)
+        summary['sections'] = [_block_summary(section) for section in chapter.get_children()]
+        chapters.append(summary)
+
+    return {
+        'chapters': chapters,
+        'has_group_access': any(
+            block['has_group_access'] for chapter in chapters for block in [chapter] + chapter['sections']
+        ),
+    }
+
+
+def cache_course_blocks(course):
+    """
+    Generate the course blocks of `course` and cache them, if caching is enabled by the
+    COURSE_BLOCKS_CACHE_TIMEOUT setting. Returns the course blocks.
+    """
+    course_blocks = generate_course_blocks(course)
+    version = course_blocks_version(course)
+    timeout = getattr(settings, 'COURSE_BLOCKS_CACHE_TIMEOUT', 0)
+    if version is not None and timeout:
+        cache.set(_cache_key(course.id, version), course_blocks, timeout)
+    return course_blocks
+
+
+def get_course_blocks(course):
+    """
+    Return the course blocks of `course`, generating and caching them if they aren't cached yet.
+    Returns None if the modulestore doesn't track the version of the course's content, so that
+    the blocks can't be cached.
+    """
+    version = course_blocks_version(course)
+    if version is None:
+        return None
+
+    course_blocks = cache.get(_cache_key(course.id, version))
+    if course_blocks is None:
+        log.debug(u'Generating the course blocks of %s', course.id)
+        course_blocks = cache_course_blocks(course)
+    return course_blocks
@@ -3,8 +3,11 @@ import logging
 
 from celery.task import task
 from opaque_keys.edx.keys import CourseKey
+from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.django import modulestore
 
+from .course_blocks import cache_course_blocks
+
 
 log = logging.getLogger('edx.celery.task')
 
@@ -77,3 +80,14 @@ def update_course_structure(course_key):
     if not created:
         cs.structure_json = structure_json
         cs.save()
+
+    # Warm the cache of the published course's chapters and sections, so that the first learner
+    # to view the courseware after a publish doesn't have to wait for them to be loaded.
+    try:
+        store = modulestore()
+        with store.branch_setting(ModuleStoreEnum.Branch.published_only, course_key):
+            course = store.get_course(course_key, depth=2)
+            if course is not None:
+                cache_course_blocks(course)
+    except Exception:  # pylint: disable=broad-except
+        log.exception(u'An error occurred while caching the course blocks of %s', course_key)
@@ -1,8 +1,13 @@
 import json
 
+from django.test.utils import override_settings
+from mock import patch
+
+from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.django import SignalHandler
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+from openedx.core.djangoapps.content.course_structures.course_blocks import generate_course_blocks, get_course_blocks
 from openedx.core.djangoapps.content.course_structures.models import CourseStructure
 from openedx.core.djangoapps.content.course_structures.signals import listen_for_course_publish
 from openedx.core.djangoapps.content.course_structures.tasks import _generate_course_structure, update_course_structure
@@ -163,3 +168,64 @@ class CourseStructureTaskTests(ModuleStoreTestCase):
         cs = CourseStructure.objects.get(course_id=course_id)
         self.assertEqual(cs.course_id, course_id)
         self.assertEqual(cs.structure, structure)
+
+
+@override_settings(COURSE_BLOCKS_CACHE_TIMEOUT=60)
+class CourseBlocksTests(ModuleStoreTestCase):
+    """
+    Tests of the cached summary of the chapters and sections of a course.
+    """
+    def setUp(self):
+        super(CourseBlocksTests, self).setUp()
+        self.course = CourseFactory.create()
+        self.chapter = ItemFactory.create(parent=self.course, category='chapter', display_name='Chapter')
+        self.sequential = ItemFactory.create(
+            parent=self.chapter, category='sequential', display_name='Sequential', format='Homework', graded=True
+        )
+
+    def get_course(self):
+        """
+        Return the published course, loaded to the depth the course blocks need.
+        """
+        with self.store.branch_setting(ModuleStoreEnum.Branch.published_only, self.course.id):
+            return self.store.get_course(self.course.id, depth=2)
+
+    def test_generate_course_blocks(self):
+        course_blocks = generate_course_blocks(self.get_course())
+        self.assertFalse(course_blocks['has_group_access'])
+        self.assertEqual(len(course_blocks['chapters']), 1)
+        chapter = course_blocks['chapters'][0]
+        self.assertEqual(chapter['location'], unicode(self.chapter.location))
+        self.assertEqual(chapter['display_name'], 'Chapter')
+        self.assertEqual(len(chapter['sections']), 1)
+        section = chapter['sections'][0]
+        self.assertEqual(section['url_name'], self.sequential.url_name)
+        self.assertEqual(section['format'], 'Homework')
+        self.assertTrue(section['graded'])
+        self.assertFalse(section['visible_to_staff_only'])
+
+    def test_get_course_blocks_cached(self):
+        course = self.get_course()
+        expected = get_course_blocks(course)
+        with patch(
+            'openedx.core.djangoapps.content.course_structures.course_blocks.generate_course_blocks'
+        ) as mock_generate:
+            self.assertEqual(get_course_blocks(course), expected)
+            self.assertFalse(mock_generate.called)
+
+    def test_new_version_regenerated(self):
+        get_course_blocks(self.get_course())
+        ItemFactory.create(parent=self.course, category='chapter', display_name='New Chapter')
+        course_blocks = get_course_blocks(self.get_course())
+        self.assertEqual(
+            [chapter['display_name'] for chapter in course_blocks['chapters']], ['Chapter', 'New Chapter']
+        )
+
+    def test_update_course_structure_caches_course_blocks(self):
+        update_course_structure(unicode(self.course.id))
+        with patch(
+            'openedx.core.djangoapps.content.course_structures.course_blocks.generate_course_blocks'
+        ) as mock_generate:
+            course_blocks = get_course_blocks(self.get_course())
+            self.assertFalse(mock_generate.called)
+        self.assertEqual(course_blocks['chapters'][0]['display_name'], 'Chapter')
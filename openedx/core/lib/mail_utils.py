@@ -7,16 +7,35 @@ import textwrap
 MAX_LINE_LENGTH = 900
 
 
-def wrap_message(message, width=MAX_LINE_LENGTH):
+def _wrap_line(line, width):
+    """
+    Wrap a single line of a message to `width`.
+    """
+    return textwrap.fill(
+        line, width, expand_tabs=False, replace_whitespace=False, drop_whitespace=False, break_on_hyphens=False
+    )
+
+
+def wrap_message(message, width=MAX_LINE_LENGTH, wrapped_lines=None):
     """
     RFC 2822 states that line lengths in emails must be less than 998. Some MTA's add newlines to messages if any line
     exceeds a certain limit (the exact limit varies). Sendmail goes so far as to add '!\n' after the 990th character in
     a line. To ensure that messages look consistent this helper function wraps long lines to a conservative length.
+
+    Wrapping is slow for long lines, so when wrapping many messages which share most of their lines (such as the same
+    email sent to many recipients), pass the same dict as `wrapped_lines` each time (and the same `width`) to only
+    wrap each distinct line once.
     """
     lines = message.split('\n')
-    wrapped_lines = [textwrap.fill(
-        line, width, expand_tabs=False, replace_whitespace=False, drop_whitespace=False, break_on_hyphens=False
-    ) for line in lines]
-    wrapped_message = '\n'.join(wrapped_lines)
+    if wrapped_lines is None:
+        wrapped_message_lines = [_wrap_line(line, width) for line in lines]
+    else:
+        wrapped_message_lines = []
+        for line in lines:
+            wrapped_line = wrapped_lines.get(line)
+            if wrapped_line is None:
+                wrapped_line = wrapped_lines[line] = _wrap_line(line, width)
+            wrapped_message_lines.append(wrapped_line)
+    wrapped_message = '\n'.join(wrapped_message_lines)
 
     return wrapped_message